@@ -1,18 +1,20 @@
 from __future__ import annotations
 
-import copy
+import bisect
 import itertools
 import functools
 import logging
 import random
 import secrets
+import sys
 import typing  # this can go away when Python 3.8 support is dropped
 from argparse import Namespace
+from array import array
 from collections import Counter, deque
 from collections.abc import Collection, MutableSequence
 from enum import IntEnum, IntFlag
-from typing import Any, Callable, Dict, Iterable, Iterator, List, Mapping, NamedTuple, Optional, Set, Tuple, \
-                   TypedDict, Union, Type, ClassVar
+from typing import Any, Callable, Dict, FrozenSet, Iterable, Iterator, List, Mapping, NamedTuple, Optional, Set, \
+                   Tuple, TypedDict, Union, Type, ClassVar
 
 import NetUtils
 import Options
@@ -95,11 +97,17 @@ class MultiWorld():
         region_cache: Dict[int, Dict[str, Region]]
         entrance_cache: Dict[int, Dict[str, Entrance]]
         location_cache: Dict[int, Dict[str, Location]]
+        # the locations of location_cache by whether they hold an item
+        filled_locations: Dict[int, OrderedLocations]
+        unfilled_locations: Dict[int, OrderedLocations]
 
         def __init__(self, players: int):
             self.region_cache = {player: {} for player in range(1, players+1)}
             self.entrance_cache = {player: {} for player in range(1, players+1)}
             self.location_cache = {player: {} for player in range(1, players+1)}
+            self.filled_locations = {player: OrderedLocations() for player in range(1, players+1)}
+            self.unfilled_locations = {player: OrderedLocations() for player in range(1, players+1)}
+            self._location_order = itertools.count()
 
         def __iadd__(self, other: Iterable[Region]):
             self.extend(other)
@@ -120,6 +128,37 @@ class MultiWorld():
             self.region_cache[new_id] = {}
             self.entrance_cache[new_id] = {}
             self.location_cache[new_id] = {}
+            self.filled_locations[new_id] = OrderedLocations()
+            self.unfilled_locations[new_id] = OrderedLocations()
+
+        def add_location(self, location: Location) -> None:
+            assert location.name not in self.location_cache[location.player], \
+                f"{location.name} already exists in the location cache."
+            self.location_cache[location.player][location.name] = location
+            location._location_order = next(self._location_order)
+            location._region_manager = self
+            self._index_location(location, location.item)
+
+        def remove_location(self, location: Location) -> None:
+            del self.location_cache[location.player][location.name]
+            self._unindex_location(location)
+            location._region_manager = None
+
+        def location_item_changed(self, location: Location, item: Optional[Item]) -> None:
+            """Called by Location when its item is about to be set to item."""
+            if (location.item is None) != (item is None):
+                self._unindex_location(location)
+                self._index_location(location, item)
+
+        def _index_location(self, location: Location, item: Optional[Item]) -> None:
+            if item is None:
+                self.unfilled_locations[location.player].add(location)
+            else:
+                self.filled_locations[location.player].add(location)
+
+        def _unindex_location(self, location: Location) -> None:
+            self.unfilled_locations[location.player].discard(location)
+            self.filled_locations[location.player].discard(location)
 
         def __iter__(self) -> Iterator[Region]:
             for regions in self.region_cache.values():
@@ -415,10 +454,16 @@ class MultiWorld():
                                            for player in self.regions.location_cache))
 
     def get_unfilled_locations(self, player: Optional[int] = None) -> List[Location]:
-        return [location for location in self.get_locations(player) if location.item is None]
+        return self._get_indexed_locations(self.regions.unfilled_locations, player)
 
     def get_filled_locations(self, player: Optional[int] = None) -> List[Location]:
-        return [location for location in self.get_locations(player) if location.item is not None]
+        return self._get_indexed_locations(self.regions.filled_locations, player)
+
+    @staticmethod
+    def _get_indexed_locations(index: Dict[int, OrderedLocations], player: Optional[int]) -> List[Location]:
+        if player is not None:
+            return index[player].copy()
+        return list(itertools.chain.from_iterable(index.values()))
 
     def get_reachable_locations(self, state: Optional[CollectionState] = None, player: Optional[int] = None) -> List[Location]:
         state: CollectionState = state if state else self.state
@@ -456,7 +501,14 @@ class MultiWorld():
         else:
             return all((self.has_beaten_game(state, p) for p in range(1, self.players + 1)))
 
-    def can_beat_game(self, starting_state: Optional[CollectionState] = None) -> bool:
+    def can_beat_game(self, starting_state: Optional[CollectionState] = None,
+                      locations: Optional[Iterable[Location]] = None) -> bool:
+        """
+        Checks if the game can be beaten by collecting progression items, starting from starting_state.
+
+        :param starting_state: state to start from, instead of an empty state with the precollected items
+        :param locations: locations to collect from, instead of all locations of the multiworld
+        """
         if starting_state:
             if self.has_beaten_game(starting_state):
                 return True
@@ -465,16 +517,16 @@ class MultiWorld():
             if self.has_beaten_game(self.state):
                 return True
             state = CollectionState(self)
-        prog_locations = {location for location in self.get_locations() if location.item
-                          and location.item.advancement and location not in state.locations_checked}
+        if locations is None:
+            locations = self.get_locations()
+        locations_checked = state.locations_checked
+        search = SphereSearch(state, (location for location in locations if location.item
+                                      and location.item.advancement and location not in locations_checked))
 
-        while prog_locations:
-            sphere: Set[Location] = set()
+        while search:
             # build up spheres of collection radius.
             # Everything in each sphere is independent from each other in dependencies and only depends on lower spheres
-            for location in prog_locations:
-                if location.can_reach(state):
-                    sphere.add(location)
+            sphere = search.next_sphere()
 
             if not sphere:
                 # ran out of places and did not finish yet, quit
@@ -482,7 +534,6 @@ class MultiWorld():
 
             for location in sphere:
                 state.collect(location.item, True, location)
-            prog_locations -= sphere
 
             if self.has_beaten_game(state):
                 return True
@@ -498,23 +549,17 @@ class MultiWorld():
         unreachable locations.
         """
         state = CollectionState(self)
-        locations = set(self.get_filled_locations())
-
-        while locations:
-            sphere: Set[Location] = set()
+        search = SphereSearch(state, self.get_filled_locations())
 
-            for location in locations:
-                if location.can_reach(state):
-                    sphere.add(location)
+        while search:
+            sphere = set(search.next_sphere())
             yield sphere
             if not sphere:
-                if locations:
-                    yield locations  # unreachable locations
+                yield set(search.unchecked_locations())  # unreachable locations
                 break
 
             for location in sphere:
                 state.collect(location.item, True, location)
-            locations -= sphere
 
     def fulfills_accessibility(self, state: Optional[CollectionState] = None):
         """Check if accessibility rules are fulfilled with current or supplied state."""
@@ -548,22 +593,19 @@ class MultiWorld():
             """Check if all access rules are fulfilled"""
             if not beatable_fulfilled:
                 return False
-            if any(location_condition(location) for location in locations):
+            if any(location_condition(location) for location in search.unchecked_locations()):
                 return False  # still locations required to be collected
             return True
 
-        locations = [location for location in self.get_locations() if location_relevant(location)]
+        search = SphereSearch(state, (location for location in self.get_locations() if location_relevant(location)))
 
-        while locations:
-            sphere: List[Location] = []
-            for n in range(len(locations) - 1, -1, -1):
-                if locations[n].can_reach(state):
-                    sphere.append(locations.pop(n))
+        while search:
+            sphere = search.next_sphere()
 
             if not sphere:
                 # ran out of places and did not finish yet, quit
                 logging.warning(f"Could not access required locations for accessibility check."
-                                f" Missing: {locations}")
+                                f" Missing: {search.unchecked_locations()}")
                 return False
 
             for location in sphere:
@@ -582,23 +624,251 @@ class MultiWorld():
 PathValue = Tuple[str, Optional["PathValue"]]
 
 
+class ItemCounter(Counter):
+    """
+    Counter of item names for one player, remembering which names changed since the last reachability update.
+    Counts of names in item_name_to_slot are also kept in the integer indexed counts array and in the mask of slots
+    that have a count above 0, for rule helpers that want to avoid looking up names, see CollectionState.has_slot.
+    """
+    changed: Set[str]
+    item_name_to_slot: Mapping[str, int]
+    counts: array
+    mask: int
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        self.changed = set()
+        self.item_name_to_slot = {}
+        self.counts = array("i")
+        self.mask = 0
+        super().__init__(*args, **kwargs)
+
+    @classmethod
+    def with_slots(cls, item_name_to_slot: Mapping[str, int]) -> ItemCounter:
+        ret = cls()
+        ret.item_name_to_slot = item_name_to_slot
+        ret.counts = array("i", bytes(ret.counts.itemsize * len(item_name_to_slot)))
+        return ret
+
+    def _sync(self, key: str, value: int) -> None:
+        """Keeps changed, counts and mask in sync with the new count of key, called before changing it."""
+        self.changed.add(key)
+        slot = self.item_name_to_slot.get(key)
+        if slot is not None:
+            self.counts[slot] = value
+            if value > 0:
+                self.mask |= 1 << slot
+            else:
+                self.mask &= ~(1 << slot)
+
+    def __setitem__(self, key: str, value: int) -> None:
+        self._sync(key, value)
+        super().__setitem__(key, value)
+
+    def __delitem__(self, key: str) -> None:
+        self._sync(key, 0)
+        super().__delitem__(key)
+
+    # dict and Counter implement the following without going through __setitem__ and __delitem__, at least some of
+    # the time, so they are routed through them here
+    def update(self, iterable: Any = None, /, **kwargs: int) -> None:
+        if iterable is not None:
+            if isinstance(iterable, Mapping):
+                for key, count in iterable.items():
+                    self[key] = self[key] + count
+            else:
+                for key in iterable:
+                    self[key] = self[key] + 1
+        if kwargs:
+            self.update(kwargs)
+
+    def subtract(self, iterable: Any = None, /, **kwargs: int) -> None:
+        if iterable is not None:
+            if isinstance(iterable, Mapping):
+                for key, count in iterable.items():
+                    self[key] = self[key] - count
+            else:
+                for key in iterable:
+                    self[key] = self[key] - 1
+        if kwargs:
+            self.subtract(kwargs)
+
+    def clear(self) -> None:
+        self.changed.update(self)
+        self.counts = array("i", bytes(len(self.counts) * self.counts.itemsize))
+        self.mask = 0
+        super().clear()
+
+    def pop(self, key: str, *default: Any) -> Any:
+        if key in self:
+            self._sync(key, 0)
+        return super().pop(key, *default)
+
+    def popitem(self) -> Tuple[str, int]:
+        key, value = super().popitem()
+        self._sync(key, 0)
+        return key, value
+
+    def setdefault(self, key: str, default: int = 0) -> int:
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def copy(self) -> ItemCounter:
+        ret = self.__class__.__new__(self.__class__)
+        dict.update(ret, self)
+        ret.changed = self.changed.copy()
+        ret.item_name_to_slot = self.item_name_to_slot
+        ret.counts = self.counts[:]
+        ret.mask = self.mask
+        return ret
+
+
+if sys.version_info >= (3, 10):
+    _bit_count = int.bit_count
+else:
+    def _bit_count(value: int) -> int:
+        return bin(value).count("1")
+
+
+class _RecordingCounter:
+    """Read-only view of a player's item counter, recording which item names get looked up."""
+    __slots__ = ("counter", "names", "wildcard")
+
+    def __init__(self, counter: Counter[str]) -> None:
+        self.counter = counter
+        self.names = set()
+        self.wildcard = False
+
+    def __getitem__(self, item: str) -> int:
+        self.names.add(item)
+        return self.counter[item]
+
+    def __contains__(self, item: str) -> bool:
+        self.names.add(item)
+        return item in self.counter
+
+    def get(self, item: str, default: Any = None) -> Any:
+        self.names.add(item)
+        return self.counter.get(item, default)
+
+    def __iter__(self) -> Iterator[str]:
+        self.wildcard = True
+        return iter(self.counter)
+
+    def __len__(self) -> int:
+        self.wildcard = True
+        return len(self.counter)
+
+    def __getattr__(self, name: str) -> Any:
+        # anything else (items(), values(), total(), ...) may look at every name
+        self.wildcard = True
+        return getattr(self.counter, name)
+
+
+class _RecordingProgItems:
+    """Stands in for CollectionState.prog_items while an Entrance's access rule is evaluated."""
+    __slots__ = ("prog_items", "player", "counter", "foreign")
+
+    def __init__(self, prog_items: Mapping[int, Counter[str]], player: int) -> None:
+        self.prog_items = prog_items
+        self.player = player
+        self.counter = _RecordingCounter(prog_items[player])
+        self.foreign = False
+
+    def __getitem__(self, player: int) -> Any:
+        if player == self.player:
+            return self.counter
+        self.foreign = True
+        return self.prog_items[player]
+
+    def __getattr__(self, name: str) -> Any:
+        self.foreign = True
+        return getattr(self.prog_items, name)
+
+    def requirements(self) -> Optional[FrozenSet[str]]:
+        """Item names the rule depended on, or None if it can't be known which changes affect it."""
+        if self.foreign or self.counter.wildcard:
+            return None
+        return frozenset(self.counter.names)
+
+
+class _RecordingRegionSet:
+    """Stands in for one player's reachable regions, remembering which regions were checked."""
+    __slots__ = ("regions", "checked", "wildcard")
+
+    def __init__(self, regions: Set[Region]) -> None:
+        self.regions = regions
+        self.checked = set()
+        self.wildcard = False
+
+    def __contains__(self, region: Region) -> bool:
+        self.checked.add(region)
+        return region in self.regions
+
+    def __iter__(self) -> Iterator[Region]:
+        self.wildcard = True
+        return iter(self.regions)
+
+    def __len__(self) -> int:
+        self.wildcard = True
+        return len(self.regions)
+
+    def __getattr__(self, name: str) -> Any:
+        self.wildcard = True
+        return getattr(self.regions, name)
+
+
+class _RecordingRegions:
+    """Stands in for CollectionState.reachable_regions while an access rule is evaluated."""
+    __slots__ = ("reachable_regions", "player", "regions", "foreign")
+
+    def __init__(self, reachable_regions: Mapping[int, Set[Region]], player: int) -> None:
+        self.reachable_regions = reachable_regions
+        self.player = player
+        self.regions = _RecordingRegionSet(reachable_regions[player])
+        self.foreign = False
+
+    def __getitem__(self, player: int) -> Any:
+        if player == self.player:
+            return self.regions
+        self.foreign = True
+        return self.reachable_regions[player]
+
+    def __getattr__(self, name: str) -> Any:
+        self.foreign = True
+        return getattr(self.reachable_regions, name)
+
+
 class CollectionState():
     prog_items: Dict[int, Counter[str]]
     multiworld: MultiWorld
     reachable_regions: Dict[int, Set[Region]]
     blocked_connections: Dict[int, Set[Entrance]]
+    blocked_requirements: Dict[int, Dict[Entrance, FrozenSet[str]]]
+    """item names each blocked connection looked at when it was last found to be blocked, for incremental updates"""
+    blocked_locations: Dict[int, Dict[Location, Tuple[int, Tuple[Tuple[str, int], ...]]]]
+    """number of reachable regions and counts of the item names a location's rule looked at when it last failed"""
     events: Set[Location]
     path: Dict[Union[Region, Entrance], PathValue]
     locations_checked: Set[Location]
     stale: Dict[int, bool]
+    debug_reachability: ClassVar[bool] = False
+    """verify every incremental reachability update against a full search, raising on any difference"""
     additional_init_functions: List[Callable[[CollectionState, MultiWorld], None]] = []
     additional_copy_functions: List[Callable[[CollectionState, CollectionState], CollectionState]] = []
 
     def __init__(self, parent: MultiWorld):
-        self.prog_items = {player: Counter() for player in parent.get_all_ids()}
+        from worlds.AutoWorld import AutoWorldRegister
+        world_types = AutoWorldRegister.world_types
+        self.prog_items = {
+            player: ItemCounter.with_slots(getattr(world_types.get(parent.game[player]), "item_name_to_slot", {}))
+            for player in parent.get_all_ids()
+        }
         self.multiworld = parent
         self.reachable_regions = {player: set() for player in parent.get_all_ids()}
         self.blocked_connections = {player: set() for player in parent.get_all_ids()}
+        self.blocked_requirements = {player: {} for player in parent.get_all_ids()}
+        self.blocked_locations = {player: {} for player in parent.get_all_ids()}
         self.events = set()
         self.path = {}
         self.locations_checked = set()
@@ -611,6 +881,17 @@ class CollectionState():
 
     def update_reachable_regions(self, player: int):
         self.stale[player] = False
+        if self.multiworld.worlds[player].incremental_reachability:
+            self._update_reachable_regions_incremental(player)
+            if self.debug_reachability:
+                self._verify_reachable_regions(player)
+        else:
+            self._update_reachable_regions_full(player)
+        changed = getattr(self.prog_items[player], "changed", None)
+        if changed:
+            changed.clear()
+
+    def _update_reachable_regions_full(self, player: int):
         reachable_regions = self.reachable_regions[player]
         blocked_connections = self.blocked_connections[player]
         queue = deque(self.blocked_connections[player])
@@ -641,16 +922,108 @@ class CollectionState():
                     if new_entrance in blocked_connections and new_entrance not in queue:
                         queue.append(new_entrance)
 
+    def _update_reachable_regions_incremental(self, player: int):
+        """
+        Same search as _update_reachable_regions_full, but only retries blocked connections that looked at an item name
+        which changed since they were last tried, or that are unblocked by a newly reached region through an indirect
+        condition. Requires the player's World to opt in through World.incremental_reachability.
+        """
+        all_reachable_regions = self.reachable_regions
+        reachable_regions = all_reachable_regions[player]
+        blocked_connections = self.blocked_connections[player]
+        blocked_requirements = self.blocked_requirements[player]
+        prog_items = self.prog_items
+        changed: Optional[Set[str]] = getattr(prog_items[player], "changed", None)
+        if changed is None:
+            queue = deque(blocked_connections)
+        else:
+            queue = deque(connection for connection in blocked_connections
+                          if connection not in blocked_requirements
+                          or not blocked_requirements[connection].isdisjoint(changed))
+        start = self.multiworld.get_region("Menu", player)
+
+        # init on first call - this can't be done on construction since the regions don't exist yet
+        if start not in reachable_regions:
+            reachable_regions.add(start)
+            blocked_connections.update(start.exits)
+            queue.extend(start.exits)
+
+        while queue:
+            connection = queue.popleft()
+            new_region = connection.connected_region
+            if new_region in reachable_regions:
+                blocked_connections.remove(connection)
+                blocked_requirements.pop(connection, None)
+                continue
+            recorder = _RecordingProgItems(prog_items, player)
+            region_recorder = _RecordingRegions(all_reachable_regions, player)
+            self.prog_items = recorder
+            self.reachable_regions = region_recorder
+            try:
+                reached = connection.can_reach(self)
+            finally:
+                self.prog_items = prog_items
+                self.reachable_regions = all_reachable_regions
+            if reached:
+                assert new_region, f"tried to search through an Entrance \"{connection}\" with no Region"
+                reachable_regions.add(new_region)
+                blocked_connections.remove(connection)
+                blocked_requirements.pop(connection, None)
+                blocked_connections.update(new_region.exits)
+                queue.extend(new_region.exits)
+                self.path[new_region] = (new_region.name, self.path.get(connection, None))
+
+                # Retry connections if the new region can unblock them
+                for new_entrance in self.multiworld.indirect_connections.get(new_region, set()):
+                    if new_entrance in blocked_connections and new_entrance not in queue:
+                        queue.append(new_entrance)
+            else:
+                # a rule that looked at other regions is retried every time, as any new region might unblock it
+                requirements = recorder.requirements()
+                if requirements is None or region_recorder.foreign or region_recorder.regions.wildcard \
+                        or region_recorder.regions.checked - {connection.parent_region}:
+                    blocked_requirements.pop(connection, None)
+                else:
+                    blocked_requirements[connection] = requirements
+
+    def _verify_reachable_regions(self, player: int) -> None:
+        """Compare the incrementally found regions of a player against a full search from scratch."""
+        start = self.multiworld.get_region("Menu", player)
+        reachable_regions = {start}
+        blocked_connections = set(start.exits)
+        progress = True
+        while progress:
+            progress = False
+            for connection in tuple(blocked_connections):
+                if connection.connected_region in reachable_regions:
+                    blocked_connections.remove(connection)
+                elif connection.access_rule(self):
+                    reachable_regions.add(connection.connected_region)
+                    blocked_connections.remove(connection)
+                    blocked_connections.update(connection.connected_region.exits)
+                    progress = True
+        if reachable_regions != self.reachable_regions[player]:
+            raise RuntimeError(
+                f"Incremental reachability for player {player} diverged from a full search. "
+                f"Missing: {sorted(map(str, reachable_regions - self.reachable_regions[player]))}, "
+                f"extra: {sorted(map(str, self.reachable_regions[player] - reachable_regions))}")
+
     def copy(self) -> CollectionState:
-        ret = CollectionState(self.multiworld)
-        ret.prog_items = copy.deepcopy(self.prog_items)
-        ret.reachable_regions = {player: copy.copy(self.reachable_regions[player]) for player in
-                                 self.reachable_regions}
-        ret.blocked_connections = {player: copy.copy(self.blocked_connections[player]) for player in
-                                   self.blocked_connections}
-        ret.events = copy.copy(self.events)
-        ret.path = copy.copy(self.path)
-        ret.locations_checked = copy.copy(self.locations_checked)
+        ret = self.__class__.__new__(self.__class__)
+        ret.multiworld = self.multiworld
+        ret.prog_items = {player: counter.copy() for player, counter in self.prog_items.items()}
+        ret.reachable_regions = {player: regions.copy() for player, regions in self.reachable_regions.items()}
+        ret.blocked_connections = {player: connections.copy()
+                                   for player, connections in self.blocked_connections.items()}
+        ret.blocked_requirements = {player: requirements.copy()
+                                    for player, requirements in self.blocked_requirements.items()}
+        ret.blocked_locations = {player: blocked.copy() for player, blocked in self.blocked_locations.items()}
+        ret.events = self.events.copy()
+        ret.path = self.path.copy()
+        ret.locations_checked = self.locations_checked.copy()
+        ret.stale = self.stale.copy()
+        for function in self.additional_init_functions:
+            function(ret, self.multiworld)
         for function in self.additional_copy_functions:
             ret = function(self, ret)
         return ret
@@ -688,13 +1061,57 @@ class CollectionState():
         locations = {location for location in locations if location.advancement and location not in self.events and
                      not key_only or getattr(location.item, "locked_dungeon_item", False)}
         while reachable_events:
-            reachable_events = {location for location in locations if location.can_reach(self)}
+            reachable_events = {location for location in locations if self._try_location(location)}
             locations -= reachable_events
             for event in reachable_events:
                 self.events.add(event)
                 assert isinstance(event.item, Item), "tried to collect Event with no Item"
                 self.collect(event.item, True, event)
 
+    def _try_location(self, location: Location) -> bool:
+        """
+        Same as location.can_reach(self), but doesn't evaluate access rules that can't have changed their result since
+        they last failed. Rules of locations in regions that can't be reached aren't evaluated at all, and
+        for worlds with World.incremental_reachability, blocked_locations remembers what a failed rule depended on.
+        """
+        region = location.parent_region
+        if type(location).can_reach is not Location.can_reach or type(region).can_reach is not Region.can_reach:
+            return location.can_reach(self)
+        player = region.player
+        if self.stale[player]:
+            self.update_reachable_regions(player)
+        reachable_regions = self.reachable_regions[player]
+        if region not in reachable_regions:
+            return False
+        if not self.multiworld.worlds[player].incremental_reachability:
+            return location.can_reach(self)
+        blocked = self.blocked_locations[player]
+        requirements = blocked.get(location, None)
+        if requirements is not None and requirements[0] == len(reachable_regions):
+            counter = self.prog_items[player]
+            if all(counter[item] == count for item, count in requirements[1]):
+                return False
+
+        prog_items = self.prog_items
+        all_reachable_regions = self.reachable_regions
+        item_recorder = _RecordingProgItems(prog_items, player)
+        region_recorder = _RecordingRegions(all_reachable_regions, player)
+        self.prog_items = item_recorder
+        self.reachable_regions = region_recorder
+        try:
+            reached = location.can_reach(self)
+        finally:
+            self.prog_items = prog_items
+            self.reachable_regions = all_reachable_regions
+        if not reached:
+            names = item_recorder.requirements()
+            if names is None or region_recorder.foreign:
+                blocked.pop(location, None)
+            else:
+                counter = prog_items[player]
+                blocked[location] = len(reachable_regions), tuple((item, counter[item]) for item in names)
+        return reached
+
     # item name related
     def has(self, item: str, player: int, count: int = 1) -> bool:
         return self.prog_items[player][item] >= count
@@ -762,9 +1179,13 @@ class CollectionState():
         """Returns True if the state contains at least `count` items present in a specified item group.
         Ignores duplicates of the same item.
         """
-        found: int = 0
+        world = self.multiworld.worlds[player]
         player_prog_items = self.prog_items[player]
-        for item_name in self.multiworld.worlds[player].item_name_groups[item_name_group]:
+        group_mask = world.item_name_group_masks.get(item_name_group)
+        if group_mask is not None and getattr(player_prog_items, "item_name_to_slot", None) is world.item_name_to_slot:
+            return _bit_count(player_prog_items.mask & group_mask) >= count
+        found: int = 0
+        for item_name in world.item_name_groups[item_name_group]:
             found += player_prog_items[item_name] > 0
             if found >= count:
                 return True
@@ -781,12 +1202,36 @@ class CollectionState():
     def count_group_unique(self, item_name_group: str, player: int) -> int:
         """Returns the cumulative count of items from an item group present in state.
         Ignores duplicates of the same item."""
+        world = self.multiworld.worlds[player]
         player_prog_items = self.prog_items[player]
+        group_mask = world.item_name_group_masks.get(item_name_group)
+        if group_mask is not None and getattr(player_prog_items, "item_name_to_slot", None) is world.item_name_to_slot:
+            return _bit_count(player_prog_items.mask & group_mask)
         return sum(
             player_prog_items[item_name] > 0
-            for item_name in self.multiworld.worlds[player].item_name_groups[item_name_group]
+            for item_name in world.item_name_groups[item_name_group]
         )
 
+    # item slot related, see World.item_name_to_slot and World.get_item_slot_mask
+    def has_slot(self, slot: int, player: int, count: int = 1) -> bool:
+        """Returns True if the item with this slot index is in state at least `count` times."""
+        return self.prog_items[player].counts[slot] >= count
+
+    def count_slot(self, slot: int, player: int) -> int:
+        return self.prog_items[player].counts[slot]
+
+    def has_all_slots(self, slot_mask: int, player: int) -> bool:
+        """Returns True if each item of the slot mask is in state at least once."""
+        return self.prog_items[player].mask & slot_mask == slot_mask
+
+    def has_any_slots(self, slot_mask: int, player: int) -> bool:
+        """Returns True if at least one item of the slot mask is in state at least once."""
+        return bool(self.prog_items[player].mask & slot_mask)
+
+    def count_slots_unique(self, slot_mask: int, player: int) -> int:
+        """Returns how many different items of the slot mask are in state."""
+        return _bit_count(self.prog_items[player].mask & slot_mask)
+
     # Item related
     def collect(self, item: Item, event: bool = False, location: Optional[Location] = None) -> bool:
         if location:
@@ -811,9 +1256,80 @@ class CollectionState():
             # invalidate caches, nothing can be trusted anymore now
             self.reachable_regions[item.player] = set()
             self.blocked_connections[item.player] = set()
+            self.blocked_requirements[item.player] = {}
+            self.blocked_locations[item.player] = {}
             self.stale[item.player] = True
 
 
+class SphereSearch:
+    """
+    Finds logical spheres among a fixed collection of locations, one sphere at a time.
+    Locations get a dense index in the order they were given in, the ones not in a sphere yet are kept as a bitset of
+    those indices. Locations get tried through CollectionState._try_location, so rules that can't have changed their
+    result since they failed are skipped. Collecting the items of a sphere is up to the caller.
+    """
+    __slots__ = ("state", "locations", "unchecked", "_pending")
+
+    state: CollectionState
+    locations: Tuple[Location, ...]
+    unchecked: int
+    """bitset of the indices of locations that were not in a sphere yet"""
+    _pending: List[int]
+    """the indices in unchecked, in order"""
+
+    def __init__(self, state: CollectionState, locations: Iterable[Location]) -> None:
+        self.state = state
+        self.locations = tuple(locations)
+        self.unchecked = (1 << len(self.locations)) - 1
+        self._pending = list(range(len(self.locations)))
+
+    def copy(self, state: CollectionState) -> SphereSearch:
+        """Returns a search through the locations this one didn't find yet, for state."""
+        ret = self.__class__.__new__(self.__class__)
+        ret.state = state
+        ret.locations = self.locations
+        ret.unchecked = self.unchecked
+        ret._pending = self._pending.copy()
+        return ret
+
+    def __len__(self) -> int:
+        """Number of locations that were not in a sphere yet."""
+        return len(self._pending)
+
+    def next_sphere(self, among: Optional[int] = None) -> List[Location]:
+        """
+        Returns the locations that were not in a sphere yet and can be reached with state, and checks them off.
+
+        :param among: bitset of indices to limit the search to, instead of all locations
+        """
+        locations = self.locations
+        try_location = self.state._try_location
+        sphere: List[Location] = []
+        pending: List[int] = []
+        sphere_bits = 0
+        for index in self._pending if among is None else self.indices(self.unchecked & among):
+            location = locations[index]
+            if try_location(location):
+                sphere.append(location)
+                sphere_bits |= 1 << index
+            else:
+                pending.append(index)
+        self.unchecked &= ~sphere_bits
+        self._pending = pending if among is None else self.indices(self.unchecked)
+        return sphere
+
+    def unchecked_locations(self, among: Optional[int] = None) -> List[Location]:
+        """Returns the locations that were not in a sphere yet, limited to the indices in bitset among if given."""
+        locations = self.locations
+        return [locations[index] for index in (self._pending if among is None
+                                               else self.indices(self.unchecked & among))]
+
+    @staticmethod
+    def indices(bits: int) -> List[int]:
+        """Returns the indices set in bitset bits, in order."""
+        return [index for index, bit in enumerate(reversed(bin(bits)[2:])) if bit == "1"]
+
+
 class Entrance:
     access_rule: Callable[[CollectionState], bool] = staticmethod(lambda state: True)
     hide_path: bool = False
@@ -889,13 +1405,11 @@ class Region:
         def __delitem__(self, index: int) -> None:
             location: Location = self._list.__getitem__(index)
             self._list.__delitem__(index)
-            del(self.region_manager.location_cache[location.player][location.name])
+            self.region_manager.remove_location(location)
 
         def insert(self, index: int, value: Location) -> None:
-            assert value.name not in self.region_manager.location_cache[value.player], \
-                f"{value.name} already exists in the location cache."
+            self.region_manager.add_location(value)
             self._list.insert(index, value)
-            self.region_manager.location_cache[value.player][value.name] = value
 
     class EntranceRegister(Register):
         def __delitem__(self, index: int) -> None:
@@ -1025,6 +1539,42 @@ class LocationProgressType(IntEnum):
     EXCLUDED = 3
 
 
+class OrderedLocations:
+    """Some of the locations of a player, in the order they were added to the location cache."""
+    __slots__ = ("_orders", "_locations")
+
+    def __init__(self):
+        self._orders: List[int] = []
+        self._locations: List[Location] = []
+
+    def add(self, location: Location) -> None:
+        index = bisect.bisect_left(self._orders, location._location_order)
+        self._orders.insert(index, location._location_order)
+        self._locations.insert(index, location)
+
+    def discard(self, location: Location) -> None:
+        index = bisect.bisect_left(self._orders, location._location_order)
+        if index < len(self._locations) and self._locations[index] is location:
+            del self._orders[index]
+            del self._locations[index]
+
+    def copy(self) -> List[Location]:
+        return self._locations.copy()
+
+    def __contains__(self, location: object) -> bool:
+        order = getattr(location, "_location_order", None)
+        if order is None:
+            return False
+        index = bisect.bisect_left(self._orders, order)
+        return index < len(self._locations) and self._locations[index] is location
+
+    def __iter__(self) -> Iterator[Location]:
+        return iter(self._locations)
+
+    def __len__(self) -> int:
+        return len(self._locations)
+
+
 class Location:
     game: str = "Generic"
     player: int
@@ -1037,7 +1587,10 @@ class Location:
     always_allow = staticmethod(lambda state, item: False)
     access_rule: Callable[[CollectionState], bool] = staticmethod(lambda state: True)
     item_rule = staticmethod(lambda item: True)
-    item: Optional[Item] = None
+    _item: Optional[Item] = None
+    _location_order: int
+    """when the location was added to the location cache of _region_manager"""
+    _region_manager: Optional[MultiWorld.RegionManager] = None
 
     def __init__(self, player: int, name: str = '', address: Optional[int] = None, parent: Optional[Region] = None):
         self.player = player
@@ -1045,6 +1598,17 @@ class Location:
         self.address = address
         self.parent_region = parent
 
+    @property
+    def item(self) -> Optional[Item]:
+        return self._item
+
+    @item.setter
+    def item(self, item: Optional[Item]) -> None:
+        # keep the filled and unfilled location indexes up to date, however the item gets placed
+        if self._region_manager is not None:
+            self._region_manager.location_item_changed(self, item)
+        self._item = item
+
     def can_fill(self, state: CollectionState, item: Item, check_access=True) -> bool:
         return ((self.always_allow(state, item) and item.name not in state.multiworld.worlds[item.player].options.non_local_items)
                 or ((self.progress_type != LocationProgressType.EXCLUDED or not (item.advancement or item.useful))
@@ -1250,22 +1814,36 @@ class Spoiler:
                     break
 
         # in the second phase, we cull each sphere such that the game is still beatable,
-        # reducing each range of influence to the bare minimum required inside it
+        # reducing each range of influence to the bare minimum required inside it.
+        # Removing an item can only affect its own sphere and the ones after it, so only those get checked again.
         restore_later = {}
+        later_locations: Set[Location] = set(sphere_candidates)
+        total = sum(map(len, collection_spheres))
+        checked = 0
         for num, sphere in reversed(tuple(enumerate(collection_spheres))):
+            later_locations |= sphere
             to_delete = set()
+            # All locations of a sphere are reachable from its start, so if one copy of an item is required,
+            # removing another copy of it from the same sphere can't leave the game beatable either.
+            required_items: Set[Tuple[str, int]] = set()
             for location in sphere:
-                # we remove the item at location and check if game is still beatable
-                logging.debug('Checking if %s (Player %d) is required to beat the game.', location.item.name,
-                              location.item.player)
                 old_item = location.item
+                checked += 1
+                if not checked % 100:
+                    logging.info(f"Culling playthrough at {checked}/{total} progression items checked.")
+                if (old_item.name, old_item.player) in required_items:
+                    continue
+                # we remove the item at location and check if game is still beatable
+                logging.debug('Checking if %s (Player %d) is required to beat the game.', old_item.name,
+                              old_item.player)
                 location.item = None
-                if multiworld.can_beat_game(state_cache[num]):
+                if multiworld.can_beat_game(state_cache[num], later_locations):
                     to_delete.add(location)
                     restore_later[location] = old_item
                 else:
                     # still required, got to keep it around
                     location.item = old_item
+                    required_items.add((old_item.name, old_item.player))
 
             # cull entries in spheres for spoiler walkthrough at end
             sphere -= to_delete
@@ -1276,7 +1854,7 @@ class Spoiler:
             logging.debug('Checking if %s (Player %d) is required to beat the game.', item.name, item.player)
             multiworld.precollected_items[item.player].remove(item)
             multiworld.state.remove(item)
-            if not multiworld.can_beat_game():
+            if not multiworld.can_beat_game(locations=prog_locations):
                 multiworld.push_precollected(item)
             else:
                 removed_precollected.append(item)
@@ -1343,12 +1921,14 @@ class Spoiler:
             return list(pathpairs)
 
         self.paths = {}
-        topology_worlds = (player for player in multiworld.player_ids if multiworld.worlds[player].topology_present)
-        for player in topology_worlds:
-            self.paths.update(
-                {str(location): get_path(state, location.parent_region)
-                 for sphere in collection_spheres for location in sphere
-                 if location.player == player})
+        topology_locations: Dict[int, List[Location]] = {
+            player: [] for player in multiworld.player_ids if multiworld.worlds[player].topology_present}
+        for sphere in collection_spheres:
+            for location in sphere:
+                if location.player in topology_locations:
+                    topology_locations[location.player].append(location)
+        for player, locations in topology_locations.items():
+            self.paths.update({str(location): get_path(state, location.parent_region) for location in locations})
             if player in multiworld.get_game_players("A Link to the Past"):
                 # If Pyramid Fairy Entrance needs to be reached, also path to Big Bomb Shop
                 # Maybe move the big bomb over to the Event system instead?
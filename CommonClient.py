@@ -182,7 +182,9 @@ class CommonContext:
             self.lookup_type: typing.Literal["item", "location"] = lookup_type
             self._unknown_item: typing.Callable[[int], str] = lambda key: f"Unknown {lookup_type} (ID: {key})"
             self._archipelago_lookup: typing.Dict[int, str] = {}
-            self._flat_store: typing.Dict[int, str] = Utils.KeyedDefaultDict(self._unknown_item)
+            self._game_tables: typing.Dict[str, typing.Mapping[int, str]] = {}
+            self._flat_store: typing.ChainMap[int, str] = collections.ChainMap(
+                Utils.KeyedDefaultDict(self._unknown_item))
             self._game_store: typing.Dict[str, typing.ChainMap[int, str]] = collections.defaultdict(
                 lambda: collections.ChainMap(self._archipelago_lookup, Utils.KeyedDefaultDict(self._unknown_item)))
             self.warned: bool = False
@@ -237,10 +239,18 @@ class CommonContext:
 
         def update_game(self, game: str, name_to_id_lookup_table: typing.Dict[str, int]) -> None:
             """Overrides existing lookup tables for a particular game."""
-            id_to_name_lookup_table = Utils.KeyedDefaultDict(self._unknown_item)
-            id_to_name_lookup_table.update({code: name for name, code in name_to_id_lookup_table.items()})
-            self._game_store[game] = collections.ChainMap(self._archipelago_lookup, id_to_name_lookup_table)
-            self._flat_store.update(id_to_name_lookup_table)  # Only needed for legacy lookup method.
+            self.update_game_names(game, {code: name for name, code in name_to_id_lookup_table.items()})
+
+        def update_game_names(self, game: str, id_to_name_lookup_table: typing.Mapping[int, str]) -> None:
+            """Overrides existing lookup tables for a particular game with an id -> name mapping, which is only read
+            when names are looked up, like the ones of a Utils.DataPackageCache.
+            """
+            self._game_store[game] = collections.ChainMap(self._archipelago_lookup, id_to_name_lookup_table,
+                                                          Utils.KeyedDefaultDict(self._unknown_item))
+            # Only needed for legacy lookup method, where the tables updated last take precedence.
+            self._game_tables.pop(game, None)
+            self._game_tables[game] = id_to_name_lookup_table
+            self._flat_store.maps[:-1] = reversed(self._game_tables.values())
             if game == "Archipelago":
                 # Keep track of the Archipelago data package separately so if it gets updated in a custom datapackage,
                 # it updates in all chain maps automatically.
@@ -555,15 +565,14 @@ class CommonContext:
             # no action required if local version is new enough
             if (not remote_checksum and (remote_version > local_version or remote_version == 0)) \
                     or remote_checksum != local_checksum:
-                cached_game = Utils.load_data_package_for_checksum(game, remote_checksum)
-                cache_version: int = cached_game.get("version", 0)
-                cache_checksum: typing.Optional[str] = cached_game.get("checksum")
-                # download remote version if cache is not new enough
-                if (not remote_checksum and (remote_version > cache_version or remote_version == 0)) \
-                        or remote_checksum != cache_checksum:
+                # names get read from the cache when they are looked up
+                cached_game = Utils.open_data_package_cache(game, remote_checksum)
+                # download remote version if there is no cache for its checksum
+                if cached_game is None:
                     needed_updates.add(game)
                 else:
-                    self.update_game(cached_game, game)
+                    self.item_names.update_game_names(game, cached_game.item_names)
+                    self.location_names.update_game_names(game, cached_game.location_names)
         if needed_updates:
             await self.send_msgs([{"cmd": "GetDataPackage", "games": [game_name]} for game_name in needed_updates])
 
@@ -577,9 +586,6 @@ class CommonContext:
 
     def consume_network_data_package(self, data_package: dict):
         self.update_data_package(data_package)
-        current_cache = Utils.persistent_load().get("datapackage", {}).get("games", {})
-        current_cache.update(data_package["games"])
-        Utils.persistent_store("datapackage", "games", current_cache)
         logger.info(f"Got new ID/Name DataPackage for {', '.join(data_package['games'])}")
         for game, game_data in data_package["games"].items():
             Utils.store_data_package_for_checksum(game, game_data)
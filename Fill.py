@@ -1,10 +1,11 @@
 import collections
 import itertools
 import logging
+import time
 import typing
 from collections import Counter, deque
 
-from BaseClasses import CollectionState, Item, Location, LocationProgressType, MultiWorld
+from BaseClasses import CollectionState, Item, Location, LocationProgressType, MultiWorld, SphereSearch
 from Options import Accessibility
 
 from worlds.AutoWorld import call_all
@@ -28,6 +29,14 @@ def sweep_from_pool(base_state: CollectionState, itempool: typing.Sequence[Item]
     return new_state
 
 
+def _reachability_decides_fill(location: Location) -> bool:
+    """
+    If True, Location.can_fill with access check is can_fill without access check followed by can_reach,
+    so a location found unreachable can be skipped for every item until the state changes.
+    """
+    return type(location).can_fill is Location.can_fill and location.always_allow is Location.always_allow
+
+
 def fill_restrictive(multiworld: MultiWorld, base_state: CollectionState, locations: typing.List[Location],
                      item_pool: typing.List[Item], single_player_placement: bool = False, lock: bool = False,
                      swap: bool = True, on_place: typing.Optional[typing.Callable[[Location], None]] = None,
@@ -61,16 +70,17 @@ def fill_restrictive(multiworld: MultiWorld, base_state: CollectionState, locati
         # grab one item per player
         items_to_place = [items.pop()
                           for items in reachable_items.values() if items]
-        for item in items_to_place:
-            for p, pool_item in enumerate(item_pool):
-                if pool_item is item:
-                    item_pool.pop(p)
-                    break
+        # remove all of them from the pool in one pass, instead of searching the pool once per item
+        ids_to_place = {id(item) for item in items_to_place}
+        item_pool[:] = [pool_item for pool_item in item_pool if id(pool_item) not in ids_to_place]
+        item = items_to_place[-1]
         maximum_exploration_state = sweep_from_pool(
             base_state, item_pool + unplaced_items, multiworld.get_filled_locations(item.player)
             if single_player_placement else None)
 
         has_beaten_game = multiworld.has_beaten_game(maximum_exploration_state)
+        # ids of locations found unreachable in maximum_exploration_state, where reachability alone decides can_fill
+        unreachable_locations: typing.Set[int] = set()
 
         while items_to_place:
             # if we have run out of locations to fill,break out of this loop
@@ -90,12 +100,21 @@ def fill_restrictive(multiworld: MultiWorld, base_state: CollectionState, locati
                 perform_access_check = True
 
             for i, location in enumerate(locations):
-                if (not single_player_placement or location.player == item_to_place.player) \
-                        and location.can_fill(maximum_exploration_state, item_to_place, perform_access_check):
-                    # popping by index is faster than removing by content,
-                    spot_to_fill = locations.pop(i)
-                    # skipping a scan for the element
-                    break
+                if single_player_placement and location.player != item_to_place.player:
+                    continue
+                if perform_access_check and _reachability_decides_fill(location):
+                    if id(location) in unreachable_locations \
+                            or not location.can_fill(maximum_exploration_state, item_to_place, False):
+                        continue
+                    if not location.can_reach(maximum_exploration_state):
+                        unreachable_locations.add(id(location))
+                        continue
+                elif not location.can_fill(maximum_exploration_state, item_to_place, perform_access_check):
+                    continue
+                # popping by index is faster than removing by content,
+                spot_to_fill = locations.pop(i)
+                # skipping a scan for the element
+                break
 
             else:
                 # we filled all reachable spots.
@@ -624,7 +643,7 @@ def balance_multiworld_progression(multiworld: MultiWorld) -> None:
         logging.debug(balanceable_players)
         state: CollectionState = CollectionState(multiworld)
         checked_locations: typing.Set[Location] = set()
-        unchecked_locations: typing.Set[Location] = set(multiworld.get_locations())
+        search = SphereSearch(state, multiworld.get_locations())
 
         total_locations_count: typing.Counter[int] = Counter(
             location.player
@@ -644,10 +663,11 @@ def balance_multiworld_progression(multiworld: MultiWorld) -> None:
         sphere_num: int = 1
         moved_item_count: int = 0
 
-        def get_sphere_locations(sphere_state: CollectionState,
-                                 locations: typing.Set[Location]) -> typing.Set[Location]:
-            sphere_state.sweep_for_events(key_only=True, locations=locations)
-            return {loc for loc in locations if sphere_state.can_reach(loc)}
+        def get_sphere_locations(sphere_search: SphereSearch, among: typing.Optional[int] = None) \
+                -> typing.Set[Location]:
+            """Checks off and returns the next sphere of sphere_search, after collecting its reachable key events."""
+            sphere_search.state.sweep_for_events(key_only=True, locations=sphere_search.unchecked_locations(among))
+            return set(sphere_search.next_sphere(among))
 
         def item_percentage(player: int, num: int) -> float:
             return num / total_locations_count[player]
@@ -656,13 +676,23 @@ def balance_multiworld_progression(multiworld: MultiWorld) -> None:
         if len(total_locations_count) == 0:
             return
 
+        # Spheres found ahead of the current one while balancing, each with the search that found it.
+        # Until items get moved, later spheres and balancing continue from these instead of searching again.
+        checkpoints: typing.Deque[typing.Tuple[SphereSearch, typing.Set[Location]]] = deque()
+
         while True:
+            sphere_start = time.perf_counter()
+            balancing_time = 0.
+            searched_ahead = 0
             # Gather non-locked locations.
             # This ensures that only shuffled locations get counted for progression balancing,
             #   i.e. the items the players will be checking.
-            sphere_locations = get_sphere_locations(state, unchecked_locations)
+            if checkpoints:
+                search, sphere_locations = checkpoints.popleft()
+                state = search.state
+            else:
+                sphere_locations = get_sphere_locations(search)
             for location in sphere_locations:
-                unchecked_locations.remove(location)
                 if not location.locked:
                     reachable_locations_count[location.player] += 1
 
@@ -673,6 +703,7 @@ def balance_multiworld_progression(multiworld: MultiWorld) -> None:
                 for player, num in reachable_locations_count.items()
             }
             logging.debug(f"Reachable percentages: {debug_percentages}\n")
+            current_sphere_num = sphere_num
             sphere_num += 1
 
             if checked_locations:
@@ -690,16 +721,15 @@ def balance_multiworld_progression(multiworld: MultiWorld) -> None:
                         and item_percentage(player, reachables) < threshold_percentages[player])
                 }
                 if balancing_players:
-                    balancing_state = state.copy()
-                    balancing_unchecked_locations = unchecked_locations.copy()
+                    balancing_start = time.perf_counter()
                     balancing_reachables = reachable_locations_count.copy()
-                    balancing_sphere = sphere_locations.copy()
+                    balancing_sphere = sphere_locations
                     candidate_items: typing.Dict[int, typing.Set[Location]] = collections.defaultdict(set)
+                    balancing_depth = 0
                     while True:
                         # Check locations in the current sphere and gather progression items to swap earlier
                         for location in balancing_sphere:
                             if location.advancement:
-                                balancing_state.collect(location.item, True, location)
                                 player = location.item.player
                                 # only replace items that end up in another player's world
                                 if (not location.locked and not location.item.skip_in_prog_balancing and
@@ -708,9 +738,19 @@ def balance_multiworld_progression(multiworld: MultiWorld) -> None:
                                         location.progress_type != LocationProgressType.PRIORITY):
                                     candidate_items[player].add(location)
                                     logging.debug(f"Candidate item: {location.name}, {location.item.name}")
-                        balancing_sphere = get_sphere_locations(balancing_state, balancing_unchecked_locations)
+                        if balancing_depth == len(checkpoints):
+                            # continue searching from the last sphere found so far, after collecting its items
+                            last_search, last_sphere = checkpoints[-1] if checkpoints else (search, sphere_locations)
+                            ahead_search = last_search.copy(last_search.state.copy())
+                            for location in last_sphere:
+                                if location.advancement:
+                                    ahead_search.state.collect(location.item, True, location)
+                            checkpoints.append((ahead_search, get_sphere_locations(ahead_search)))
+                            searched_ahead += 1
+                        balancing_search, balancing_sphere = checkpoints[balancing_depth]
+                        balancing_depth += 1
+                        balancing_state = balancing_search.state
                         for location in balancing_sphere:
-                            balancing_unchecked_locations.remove(location)
                             if not location.locked:
                                 balancing_reachables[location.player] += 1
                         if multiworld.has_beaten_game(balancing_state) or all(
@@ -722,9 +762,12 @@ def balance_multiworld_progression(multiworld: MultiWorld) -> None:
                             raise RuntimeError('Not all required items reachable. Something went terribly wrong here.')
                     # Gather a set of locations which we can swap items into
                     unlocked_locations: typing.Dict[int, typing.Set[Location]] = collections.defaultdict(set)
-                    for l in unchecked_locations:
-                        if l not in balancing_unchecked_locations:
-                            unlocked_locations[l.player].add(l)
+                    unlocked = 0  # bitset of the indices of these locations for balancing_players
+                    for index in search.indices(search.unchecked & ~balancing_search.unchecked):
+                        l = search.locations[index]
+                        unlocked_locations[l.player].add(l)
+                        if l.player in balancing_players:
+                            unlocked |= 1 << index
                     items_to_replace: typing.List[Location] = []
                     for player in balancing_players:
                         locations_to_test = unlocked_locations[player]
@@ -746,7 +789,7 @@ def balance_multiworld_progression(multiworld: MultiWorld) -> None:
                                 if not multiworld.has_beaten_game(reducing_state):
                                     items_to_replace.append(testing)
                             else:
-                                reduced_sphere = get_sphere_locations(reducing_state, locations_to_test)
+                                reduced_sphere = get_sphere_locations(SphereSearch(reducing_state, locations_to_test))
                                 p = item_percentage(player, reachable_locations_count[player] + len(reduced_sphere))
                                 if p < threshold_percentages[player]:
                                     items_to_replace.append(testing)
@@ -778,17 +821,21 @@ def balance_multiworld_progression(multiworld: MultiWorld) -> None:
 
                     if old_moved_item_count < moved_item_count:
                         logging.debug(f"Moved {moved_item_count} items so far\n")
-                        unlocked = {fresh for player in balancing_players for fresh in unlocked_locations[player]}
-                        for location in get_sphere_locations(state, unlocked):
-                            unchecked_locations.remove(location)
+                        # the moved items change what is reachable in later spheres
+                        checkpoints.clear()
+                        for location in get_sphere_locations(search, unlocked):
                             if not location.locked:
                                 reachable_locations_count[location.player] += 1
                             sphere_locations.add(location)
+                    balancing_time = time.perf_counter() - balancing_start
 
             for location in sphere_locations:
                 if location.advancement:
                     state.collect(location.item, True, location)
             checked_locations |= sphere_locations
+            logging.debug(f"Sphere {current_sphere_num} took {time.perf_counter() - sphere_start:.4f} seconds, "
+                          f"{balancing_time:.4f} of which balancing. Searched {searched_ahead} new spheres ahead, "
+                          f"{len(checkpoints)} spheres ahead are known.")
 
             if multiworld.has_beaten_game(state):
                 break
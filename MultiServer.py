@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import argparse
 import asyncio
+import bisect
 import collections
 import contextlib
 import copy
@@ -13,6 +14,7 @@ import itertools
 import logging
 import math
 import operator
+import os
 import pickle
 import random
 import threading
@@ -100,6 +102,111 @@ def get_saving_second(seed_name: str, interval: int = 60) -> int:
     return int(hashlib.sha256(seed_name.encode()).hexdigest(), 16) % interval
 
 
+class Histogram:
+    """Counts of observed values per bucket, with their sum and maximum, in the manner of a Prometheus histogram."""
+    __slots__ = ("buckets", "counts", "total", "maximum")
+
+    def __init__(self, buckets: typing.Sequence[float]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last one counts values above all buckets
+        self.total = 0.
+        self.maximum = 0.
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.total += value
+        if value > self.maximum:
+            self.maximum = value
+
+    @property
+    def count(self) -> int:
+        return sum(self.counts)
+
+    def prometheus_lines(self, name: str, labels: str = "") -> typing.Iterator[str]:
+        cumulative = 0
+        for bound, count in zip((*self.buckets, "+Inf"), self.counts):
+            cumulative += count
+            yield f'{name}_bucket{{{labels}{"," if labels else ""}le="{bound}"}} {cumulative}'
+        labels = f"{{{labels}}}" if labels else ""
+        yield f"{name}_sum{labels} {self.total}"
+        yield f"{name}_count{labels} {cumulative}"
+
+
+class Metrics:
+    """Optional measurements of where the server spends its time, shown by /metrics and served as Prometheus text."""
+    seconds_buckets = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1., 2.5)
+    bytes_buckets = (64, 256, 1024, 4096, 16384, 65536, 262144, 1048576)
+    # client commands are counted by name, anything else as "other" so that clients can't grow the metrics
+    commands = frozenset({"Connect", "GetDataPackage", "ConnectUpdate", "Sync", "LocationChecks", "LocationScouts",
+                          "StatusUpdate", "Say", "Bounce", "Get", "Set", "SetNotify"})
+
+    def __init__(self):
+        self.command_seconds: typing.Dict[str, Histogram] = {}
+        self.broadcast_bytes = Histogram(self.bytes_buckets)
+        self.broadcast_sent_bytes = 0
+        self.loop_lag = Histogram(self.seconds_buckets)
+        self.recent_loop_lag: typing.Deque[float] = collections.deque(maxlen=60)
+        self.save_seconds = Histogram(self.seconds_buckets)
+
+    def observe_command(self, cmd: typing.Any, seconds: float) -> None:
+        if cmd not in self.commands:
+            cmd = "other"
+        histogram = self.command_seconds.get(cmd)
+        if histogram is None:
+            histogram = self.command_seconds[cmd] = Histogram(self.seconds_buckets)
+        histogram.observe(seconds)
+
+    def observe_broadcast(self, size: int, recipients: int) -> None:
+        self.broadcast_bytes.observe(size)
+        self.broadcast_sent_bytes += size * recipients
+
+    async def sample_loop_lag(self, interval: float = 1.) -> None:
+        """Measures how late the event loop wakes up from sleeping, until cancelled."""
+        loop = asyncio.get_running_loop()
+        while True:
+            scheduled = loop.time() + interval
+            await asyncio.sleep(interval)
+            lag = max(0., loop.time() - scheduled)
+            self.loop_lag.observe(lag)
+            self.recent_loop_lag.append(lag)
+
+    def summary(self) -> str:
+        lines = ["Command | Count | Total s | Average ms | Max ms"]
+        for cmd, histogram in sorted(self.command_seconds.items(), key=lambda entry: -entry[1].total):
+            lines.append(f"{cmd} | {histogram.count} | {histogram.total:.3f} | "
+                         f"{histogram.total / histogram.count * 1000:.2f} | {histogram.maximum * 1000:.2f}")
+        broadcasts = self.broadcast_bytes.count
+        lines.append(f"Broadcasts: {broadcasts}, averaging {self.broadcast_bytes.total / (broadcasts or 1):.0f} bytes, "
+                     f"{Utils.format_SI_prefix(self.broadcast_sent_bytes, power=1024)}B sent in total")
+        if self.recent_loop_lag:
+            lines.append(f"Event loop lag: {max(self.recent_loop_lag) * 1000:.2f} ms at most in the last "
+                         f"{len(self.recent_loop_lag)} samples, {self.loop_lag.maximum * 1000:.2f} ms overall")
+        saves = self.save_seconds.count
+        if saves:
+            lines.append(f"Saves: {saves}, averaging {self.save_seconds.total / saves * 1000:.2f} ms, "
+                         f"{self.save_seconds.maximum * 1000:.2f} ms at most")
+        return "\n".join(lines)
+
+    def prometheus_text(self) -> str:
+        lines = ["# HELP archipelago_command_seconds Time spent handling client commands.",
+                 "# TYPE archipelago_command_seconds histogram"]
+        for cmd, histogram in self.command_seconds.items():
+            lines.extend(histogram.prometheus_lines("archipelago_command_seconds", f'cmd="{cmd}"'))
+        lines += ["# HELP archipelago_broadcast_bytes Size of broadcast messages.",
+                  "# TYPE archipelago_broadcast_bytes histogram",
+                  *self.broadcast_bytes.prometheus_lines("archipelago_broadcast_bytes"),
+                  "# HELP archipelago_broadcast_sent_bytes_total Size of broadcast messages times their recipients.",
+                  "# TYPE archipelago_broadcast_sent_bytes_total counter",
+                  f"archipelago_broadcast_sent_bytes_total {self.broadcast_sent_bytes}",
+                  "# HELP archipelago_event_loop_lag_seconds How late the event loop woke up from sleeping.",
+                  "# TYPE archipelago_event_loop_lag_seconds histogram",
+                  *self.loop_lag.prometheus_lines("archipelago_event_loop_lag_seconds"),
+                  "# HELP archipelago_save_seconds Time spent saving.",
+                  "# TYPE archipelago_save_seconds histogram",
+                  *self.save_seconds.prometheus_lines("archipelago_save_seconds")]
+        return "\n".join(lines) + "\n"
+
+
 class Client(Endpoint):
     version = Version(0, 0, 0)
     tags: typing.List[str] = []
@@ -160,13 +267,20 @@ class Context:
     clients: typing.Dict[int, typing.Dict[int, typing.List[Client]]]
     locations: LocationStore  # typing.Dict[int, typing.Dict[int, typing.Tuple[int, int, int]]]
     location_checks: typing.Dict[typing.Tuple[int, int], typing.Set[int]]
+    dirty_received_items: typing.Set[typing.Tuple[int, int]]  # (team, slot) with items not sent to clients yet
     hints_used: typing.Dict[typing.Tuple[int, int], int]
     groups: typing.Dict[int, typing.Set[int]]
     save_version = 2
     stored_data: typing.Dict[str, object]
+    save_journal: bool
+    """append changes to a journal next to the save file, only writing the whole save once the journal outgrows it"""
+    journal_stored_data: typing.Set[str]  # stored_data keys changed since they were last journaled
+    journal_sections: typing.Set[str]  # other get_save() sections changed since they were last journaled
     read_data: typing.Dict[str, object]
     stored_data_notification_clients: typing.Dict[str, typing.Set[Client]]
     slot_info: typing.Dict[int, NetworkSlot]
+    _spheres: typing.Union[typing.List[typing.Dict[int, typing.Set[int]]],
+                           typing.Callable[[], typing.List[typing.Dict[int, typing.Set[int]]]]]
     generator_version = Version(0, 0, 0)
     checksums: typing.Dict[str, str]
     item_names: typing.Dict[str, typing.Dict[int, str]] = (
@@ -186,12 +300,23 @@ class Context:
     def __init__(self, host: str, port: int, server_password: str, password: str, location_check_points: int,
                  hint_cost: int, item_cheat: bool, release_mode: str = "disabled", collect_mode="disabled",
                  remaining_mode: str = "disabled", auto_shutdown: typing.SupportsFloat = 0, compatibility: int = 2,
-                 log_network: bool = False, logger: logging.Logger = logging.getLogger()):
+                 log_network: bool = False, save_journal: bool = False, metrics: bool = False,
+                 logger: logging.Logger = logging.getLogger()):
         self.logger = logger
         super(Context, self).__init__()
         self.slot_info = {}
         self.log_network = log_network
+        self.save_journal = save_journal
+        self.metrics: typing.Optional[Metrics] = Metrics() if metrics else None
+        self.journal_stored_data = set()
+        self.journal_sections = set()
+        self._journal_generation = 0
+        self._journal_size = 0
+        self._snapshot_size = 0
+        self._journal_received_items = {}
+        self._journal_location_checks = {}
         self.endpoints = []
+        self.received_messages = 0  # client commands processed, for load reporting
         self.clients = {}
         self.compatibility: int = compatibility
         self.shutdown_task = None
@@ -209,6 +334,7 @@ class Context:
         self.server = None
         self.countdown_timer = 0
         self.received_items = {}
+        self.dirty_received_items = set()
         self.start_inventory = {}
         self.name_aliases: typing.Dict[team_slot, str] = {}
         self.location_checks = collections.defaultdict(set)
@@ -216,6 +342,9 @@ class Context:
         self.location_check_points = location_check_points
         self.hints_used = collections.defaultdict(int)
         self.hints: typing.Dict[team_slot, typing.Set[NetUtils.Hint]] = collections.defaultdict(set)
+        # (team, finding_player, location) -> (slot, hint) of not found hints in self.hints[team, slot] for it
+        self.hint_index: typing.Dict[typing.Tuple[int, int, int], typing.Set[typing.Tuple[int, NetUtils.Hint]]] = \
+            collections.defaultdict(set)
         self.release_mode: str = release_mode
         self.remaining_mode: str = remaining_mode
         self.collect_mode: str = collect_mode
@@ -270,9 +399,9 @@ class Context:
             self.non_hintable_names[world_name] = world.hint_blacklist
 
         for game_package in self.gamespackage.values():
-            # remove groups from data sent to clients
-            del game_package["item_name_groups"]
-            del game_package["location_name_groups"]
+            # remove groups from data sent to clients, unless an earlier Context in this process already did
+            game_package.pop("item_name_groups", None)
+            game_package.pop("location_name_groups", None)
 
     def _init_game_data(self):
         for game_name, game_package in self.gamespackage.items():
@@ -341,6 +470,8 @@ class Context:
             self.logger.exception("Exception during broadcast_send_encoded_msgs")
             return False
         else:
+            if self.metrics:
+                self.metrics.observe_broadcast(len(msg), len(sockets))
             if self.log_network:
                 self.logger.info(f"Outgoing broadcast: {msg}")
             return True
@@ -402,14 +533,11 @@ class Context:
         self.data_filename = multidatapath
 
     @staticmethod
-    def decompress(data: bytes) -> dict:
-        format_version = data[0]
-        if format_version > 3:
-            raise Utils.VersionException("Incompatible multidata.")
-        return restricted_loads(zlib.decompress(data[1:]))
+    def decompress(data: bytes) -> typing.MutableMapping[str, typing.Any]:
+        return Utils.loads_multidata(data)
 
-    def _load(self, decoded_obj: dict, game_data_packages: typing.Dict[str, typing.Any],
-              use_embedded_server_options: bool):
+    def _load(self, decoded_obj: typing.MutableMapping[str, typing.Any],
+              game_data_packages: typing.Dict[str, typing.Any], use_embedded_server_options: bool):
 
         self.read_data = {}
         mdata_ver = decoded_obj["minimum_versions"]["server"]
@@ -444,10 +572,10 @@ class Context:
         self.seed_name = decoded_obj["seed_name"]
         self.random.seed(self.seed_name)
         self.connect_names = decoded_obj['connect_names']
-        self.locations = LocationStore(decoded_obj.pop("locations"))  # pre-emptively free memory
-        self.slot_data = decoded_obj['slot_data']
-        for slot, data in self.slot_data.items():
-            self.read_data[f"slot_data_{slot}"] = lambda data=data: data
+        self.locations = LocationStore(dict(decoded_obj.pop("locations")))  # pre-emptively free memory
+        self.slot_data = decoded_obj['slot_data']  # of format 4 and up, each slot's data is decompressed on first use
+        for slot in self.slot_data:
+            self.read_data[f"slot_data_{slot}"] = lambda local_slot=slot: self.slot_data[local_slot]
         self.er_hint_data = {int(player): {int(address): name for address, name in loc_data.items()}
                              for player, loc_data in decoded_obj["er_hint_data"].items()}
 
@@ -457,6 +585,7 @@ class Context:
 
         for slot, hints in decoded_obj["precollected_hints"].items():
             self.hints[0, slot].update(hints)
+            self.index_hints(0, slot, hints)
 
         # declare slots that aren't players as done
         for slot, slot_info in self.slot_info.items():
@@ -486,7 +615,20 @@ class Context:
             self.read_data[f"location_name_groups_{game_name}"] = lambda lgame=game_name: self.location_name_groups[lgame]
 
         # sorted access spheres
-        self.spheres = decoded_obj.get("spheres", [])
+        if isinstance(decoded_obj, Utils.MultidataSections):
+            self._spheres = decoded_obj.lazy("spheres", [])
+        else:
+            self.spheres = decoded_obj.get("spheres", [])
+
+    @property
+    def spheres(self) -> typing.List[typing.Dict[int, typing.Set[int]]]:
+        if callable(self._spheres):
+            self._spheres = self._spheres()
+        return self._spheres
+
+    @spheres.setter
+    def spheres(self, value: typing.List[typing.Dict[int, typing.Set[int]]]) -> None:
+        self._spheres = value
 
     # saving
 
@@ -502,28 +644,139 @@ class Context:
         return False
 
     def _save(self, exit_save: bool = False) -> bool:
+        start = time.perf_counter()
         try:
-            encoded_save = pickle.dumps(self.get_save())
-            with open(self.save_filename, "wb") as f:
-                f.write(zlib.compress(encoded_save))
+            if self.save_journal and not exit_save and self._journal_size < self._snapshot_size:
+                self._append_journal()
+            else:
+                self._write_snapshot()
         except Exception as e:
             self.logger.exception(e)
             return False
         else:
+            if self.metrics:
+                self.metrics.save_seconds.observe(time.perf_counter() - start)
             return True
 
+    # save journal
+    # The save file is a snapshot of get_save(), tagged with a generation. The journal holds records of the changes
+    # made since, each only applied on load if its generation matches the snapshot. Location checks and received items
+    # only grow, so their new entries are found by size, everything else is marked as changed where it changes,
+    # through journal_stored_data and journal_sections.
+
+    @property
+    def journal_filename(self) -> str:
+        return self.save_filename + ".journal"
+
+    def _write_snapshot(self) -> None:
+        self._journal_generation += 1
+        save = self.get_save()
+        save["journal_generation"] = self._journal_generation
+        self._reset_journal()
+        encoded_save = zlib.compress(pickle.dumps(save))
+        with open(self.save_filename, "wb") as f:
+            f.write(encoded_save)
+        self._snapshot_size = len(encoded_save)
+        self._truncate_journal()
+
+    def _truncate_journal(self) -> None:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(self.journal_filename)
+        self._journal_size = 0
+
+    def _reset_journal(self) -> None:
+        """Remember the current state, so the next journal record only contains what changed after it."""
+        self.journal_stored_data.clear()
+        self.journal_sections.clear()
+        self._journal_received_items = {key: len(items) for key, items in self.received_items.items()}
+        self._journal_location_checks = {key: len(checks) for key, checks in self.location_checks.items()}
+
+    def _append_journal(self) -> None:
+        record: typing.Dict[str, typing.Any] = {"generation": self._journal_generation}
+        location_checks = {}
+        for key, checks in tuple(self.location_checks.items()):
+            if len(checks) != self._journal_location_checks.get(key, 0):
+                location_checks[key] = set(checks)
+                self._journal_location_checks[key] = len(location_checks[key])
+        if location_checks:
+            record["location_checks"] = location_checks
+        received_items = {}
+        for key, items in tuple(self.received_items.items()):
+            start = self._journal_received_items.get(key, 0)
+            if len(items) > start:
+                received_items[key] = start, items[start:]
+                self._journal_received_items[key] = start + len(received_items[key][1])
+        if received_items:
+            record["received_items"] = received_items
+        # values may change again while this runs, in which case they are marked as changed again
+        stored_data_keys = self.journal_stored_data.copy()
+        self.journal_stored_data.difference_update(stored_data_keys)
+        if stored_data_keys:
+            record["stored_data"] = {key: self.stored_data[key] for key in stored_data_keys}
+        section_names = self.journal_sections.copy()
+        self.journal_sections.difference_update(section_names)
+        if section_names:
+            save_sections = self._save_sections()
+            record["sections"] = {name: save_sections[name]() for name in section_names}
+
+        if len(record) > 1:
+            encoded_record = zlib.compress(pickle.dumps(record))
+            with open(self.journal_filename, "ab") as f:
+                f.write(len(encoded_record).to_bytes(4, "little"))
+                f.write(encoded_record)
+            self._journal_size += 4 + len(encoded_record)
+
+    def _replay_journal(self, save_data: typing.Dict[str, typing.Any]) -> int:
+        """Applies the journal records belonging to snapshot save_data to it. Returns how many were applied."""
+        try:
+            with open(self.journal_filename, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return 0
+        generation = save_data.get("journal_generation", 0)
+        applied = 0
+        offset = 0
+        while offset < len(data):
+            length = int.from_bytes(data[offset:offset + 4], "little")
+            try:
+                record = restricted_loads(zlib.decompress(data[offset + 4:offset + 4 + length]))
+            except Exception as e:  # the server may have gone down while writing the last record
+                self.logger.warning(f"Ignoring incomplete save journal record: {e}")
+                break
+            offset += 4 + length
+            if record["generation"] != generation:
+                continue
+            save_data["location_checks"].update(record.get("location_checks", {}))
+            for key, (start, items) in record.get("received_items", {}).items():
+                received_items = save_data["received_items"].setdefault(key, [])
+                received_items[start:] = items
+            save_data["stored_data"].update(record.get("stored_data", {}))
+            save_data.update(record.get("sections", {}))
+            applied += 1
+        return applied
+
     def init_save(self, enabled: bool = True):
         self.saving = enabled
         if self.saving:
             if not self.save_filename:
-                import os
                 name, ext = os.path.splitext(self.data_filename)
                 self.save_filename = name + '.apsave' if ext.lower() in ('.archipelago', '.zip') \
                     else self.data_filename + '_' + 'apsave'
             try:
                 with open(self.save_filename, 'rb') as f:
-                    save_data = restricted_loads(zlib.decompress(f.read()))
-                    self.set_save(save_data)
+                    encoded_save = f.read()
+                save_data = restricted_loads(zlib.decompress(encoded_save))
+                replayed = self._replay_journal(save_data)
+                self.set_save(save_data)
+                self._journal_generation = save_data.get("journal_generation", 0)
+                if replayed:
+                    self.logger.info(f"Applied {replayed} records of the save journal.")
+                    self._write_snapshot()
+                else:
+                    # records of another snapshot must not be followed by records of this one
+                    self._truncate_journal()
+                    self._reset_journal()
+                    self._snapshot_size = len(encoded_save)
             except FileNotFoundError:
                 self.logger.error('No save data found, starting a new game')
             except Exception as e:
@@ -558,33 +811,34 @@ class Context:
                 import atexit
                 atexit.register(self._save, True)  # make sure we save on exit too
 
-    def get_save(self) -> dict:
-        self.recheck_hints()
-        d = {
-            "version": self.save_version,
-            "connect_names": self.connect_names,
-            "received_items": self.received_items,
-            "hints_used": dict(self.hints_used),
-            "hints": dict(self.hints),
-            "location_checks": dict(self.location_checks),
-            "name_aliases": self.name_aliases,
-            "client_game_state": dict(self.client_game_state),
-            "client_activity_timers": tuple(
+    def _save_sections(self) -> typing.Dict[str, typing.Callable[[], typing.Any]]:
+        """Functions returning each section of get_save(), so single sections can be read without the others."""
+        return {
+            "version": lambda: self.save_version,
+            "connect_names": lambda: self.connect_names,
+            "received_items": lambda: self.received_items,
+            "hints_used": lambda: dict(self.hints_used),
+            "hints": lambda: dict(self.hints),
+            "location_checks": lambda: dict(self.location_checks),
+            "name_aliases": lambda: self.name_aliases,
+            "client_game_state": lambda: dict(self.client_game_state),
+            "client_activity_timers": lambda: tuple(
                 (key, value.timestamp()) for key, value in self.client_activity_timers.items()),
-            "client_connection_timers": tuple(
+            "client_connection_timers": lambda: tuple(
                 (key, value.timestamp()) for key, value in self.client_connection_timers.items()),
-            "random_state": self.random.getstate(),
-            "group_collected": dict(self.group_collected),
-            "stored_data": self.stored_data,
-            "game_options": {"hint_cost": self.hint_cost, "location_check_points": self.location_check_points,
-                             "server_password": self.server_password, "password": self.password,
-                             "release_mode": self.release_mode,
-                             "remaining_mode": self.remaining_mode, "collect_mode": self.collect_mode,
-                             "item_cheat": self.item_cheat, "compatibility": self.compatibility}
-
+            "random_state": lambda: self.random.getstate(),
+            "group_collected": lambda: dict(self.group_collected),
+            "stored_data": lambda: self.stored_data,
+            "game_options": lambda: {"hint_cost": self.hint_cost, "location_check_points": self.location_check_points,
+                                     "server_password": self.server_password, "password": self.password,
+                                     "release_mode": self.release_mode,
+                                     "remaining_mode": self.remaining_mode, "collect_mode": self.collect_mode,
+                                     "item_cheat": self.item_cheat, "compatibility": self.compatibility},
         }
 
-        return d
+    def get_save(self) -> dict:
+        self.recheck_hints()
+        return {name: get_section() for name, get_section in self._save_sections().items()}
 
     def set_save(self, savedata: dict):
         if self.connect_names != savedata["connect_names"]:
@@ -605,6 +859,9 @@ class Context:
              in savedata["client_activity_timers"]})
         self.location_checks.update(savedata["location_checks"])
         self.random.setstate(savedata["random_state"])
+        self.recheck_hints()
+        for (team, slot), hints in self.hints.items():
+            self.index_hints(team, slot, hints)
 
         if "game_options" in savedata:
             self.hint_cost = savedata["game_options"]["hint_cost"]
@@ -635,12 +892,34 @@ class Context:
         return 0
 
     def recheck_hints(self, team: typing.Optional[int] = None, slot: typing.Optional[int] = None):
-        for hint_team, hint_slot in self.hints:
-            if (team is None or team == hint_team) and (slot is None or slot == hint_slot):
-                self.hints[hint_team, hint_slot] = {
-                    hint.re_check(self, hint_team) for hint in
-                    self.hints[hint_team, hint_slot]
-                }
+        if team is not None and slot is not None:
+            keys = [(team, slot)] if (team, slot) in self.hints else []
+        else:
+            keys = [(hint_team, hint_slot) for hint_team, hint_slot in self.hints
+                    if (team is None or team == hint_team) and (slot is None or slot == hint_slot)]
+        for hint_team, hint_slot in keys:
+            hints = {hint.re_check(self, hint_team) for hint in self.hints[hint_team, hint_slot]}
+            if hints != self.hints[hint_team, hint_slot]:
+                self.hints[hint_team, hint_slot] = hints
+                self.journal_sections.add("hints")
+
+    def index_hints(self, team: int, slot: int, hints: typing.Iterable[NetUtils.Hint]):
+        """Remember the not found hints added to self.hints[team, slot], so checking their location updates them."""
+        for hint in hints:
+            if not hint.found:
+                self.hint_index[team, hint.finding_player, hint.location].add((slot, hint))
+
+    def update_found_hints(self, team: int, finding_player: int, locations: typing.Iterable[int]) -> typing.Set[int]:
+        """Marks hints for newly checked locations of finding_player as found. Returns the slots whose hints changed."""
+        changed: typing.Set[int] = set()
+        for location in locations:
+            for slot, hint in self.hint_index.pop((team, finding_player, location), ()):
+                slot_hints = self.hints[team, slot]
+                if hint in slot_hints:  # may have been replaced by recheck_hints already
+                    slot_hints.remove(hint)
+                    slot_hints.add(hint.re_check(self, team))
+                    changed.add(slot)
+        return changed
 
     def get_rechecked_hints(self, team: int, slot: int):
         self.recheck_hints(team, slot)
@@ -710,9 +989,11 @@ class Context:
                 # we can check once if hint already exists
                 if hint not in self.hints[team, hint.finding_player]:
                     self.hints[team, hint.finding_player].add(hint)
+                    self.index_hints(team, hint.finding_player, (hint,))
                     new_hint_events.add(hint.finding_player)
                     for player in self.slot_set(hint.receiving_player):
                         self.hints[team, player].add(hint)
+                        self.index_hints(team, player, (hint,))
                         new_hint_events.add(player)
 
             self.logger.info("Notice (Team #%d): %s" % (team + 1, format_hint(self, team, hint)))
@@ -747,12 +1028,14 @@ class Context:
         }])
 
     def on_changed_hints(self, team: int, slot: int):
+        self.journal_sections.add("hints")
         key: str = f"_read_hints_{team}_{slot}"
         targets: typing.Set[Client] = set(self.stored_data_notification_clients[key])
         if targets:
             self.broadcast(targets, [{"cmd": "SetReply", "key": key, "value": self.hints[team, slot]}])
 
     def on_client_status_change(self, team: int, slot: int):
+        self.journal_sections.add("client_game_state")
         key: str = f"_read_client_status_{team}_{slot}"
         targets: typing.Set[Client] = set(self.stored_data_notification_clients[key])
         if targets:
@@ -760,6 +1043,7 @@ class Context:
 
 
 def update_aliases(ctx: Context, team: int):
+    ctx.journal_sections.add("name_aliases")
     cmd = ctx.dumper([{"cmd": "RoomUpdate",
                        "players": ctx.get_players_package()}])
 
@@ -782,7 +1066,14 @@ async def server(websocket, path: str = "/", ctx: Context = None):
             if ctx.log_network:
                 ctx.logger.info(f"Incoming message: {data}")
             for msg in decode(data):
-                await process_client_cmd(ctx, client, msg)
+                ctx.received_messages += 1
+                if ctx.metrics:
+                    start = time.perf_counter()
+                    await process_client_cmd(ctx, client, msg)
+                    ctx.metrics.observe_command(msg.get("cmd") if isinstance(msg, dict) else None,
+                                                time.perf_counter() - start)
+                else:
+                    await process_client_cmd(ctx, client, msg)
     except Exception as e:
         if not isinstance(e, websockets.WebSocketException):
             ctx.logger.exception(e)
@@ -860,12 +1151,14 @@ async def on_client_joined(ctx: Context, client: Client):
                               "you may have additional local commands you can list with /help.",
                       {"type": "Tutorial"})
     ctx.client_connection_timers[client.team, client.slot] = datetime.datetime.now(datetime.timezone.utc)
+    ctx.journal_sections.add("client_connection_timers")
 
 
 async def on_client_left(ctx: Context, client: Client):
     if len(ctx.clients[client.team][client.slot]) < 1:
         update_client_status(ctx, client, ClientStatus.CLIENT_UNKNOWN)
         ctx.client_connection_timers[client.team, client.slot] = datetime.datetime.now(datetime.timezone.utc)
+        ctx.journal_sections.add("client_connection_timers")
 
     version_str = '.'.join(str(x) for x in client.version)
 
@@ -940,19 +1233,25 @@ def get_start_inventory(ctx: Context, player: int, remote_start_inventory: bool)
 
 
 def send_new_items(ctx: Context):
-    for team, clients in ctx.clients.items():
-        for slot, clients in clients.items():
-            for client in clients:
-                if client.no_items:
-                    continue
-                start_inventory = get_start_inventory(ctx, slot, client.remote_start_inventory)
-                items = get_received_items(ctx, team, slot, client.remote_items)
-                if len(start_inventory) + len(items) > client.send_index:
-                    first_new_item = max(0, client.send_index - len(start_inventory))
-                    async_start(ctx.send_msgs(client, [{
-                        "cmd": "ReceivedItems",
-                        "index": client.send_index,
-                        "items": start_inventory[client.send_index:] + items[first_new_item:]}]))
+    """Sends ReceivedItems to clients of slots marked in ctx.dirty_received_items, encoding each payload only once."""
+    dirty_received_items, ctx.dirty_received_items = ctx.dirty_received_items, set()
+    for team, slot in sorted(dirty_received_items):
+        # clients with the same items handling and index get the same message
+        client_groups: typing.Dict[typing.Tuple[bool, bool, int], typing.List[Client]] = {}
+        for client in ctx.clients.get(team, {}).get(slot, ()):
+            if not client.no_items:
+                client_groups.setdefault((client.remote_start_inventory, client.remote_items, client.send_index),
+                                         []).append(client)
+        for (remote_start_inventory, remote_items, send_index), clients in client_groups.items():
+            start_inventory = get_start_inventory(ctx, slot, remote_start_inventory)
+            items = get_received_items(ctx, team, slot, remote_items)
+            if len(start_inventory) + len(items) > send_index:
+                first_new_item = max(0, send_index - len(start_inventory))
+                ctx.broadcast(clients, [{
+                    "cmd": "ReceivedItems",
+                    "index": send_index,
+                    "items": start_inventory[send_index:] + items[first_new_item:]}])
+                for client in clients:
                     client.send_index = len(start_inventory) + len(items)
 
 
@@ -963,23 +1262,21 @@ def update_checked_locations(ctx: Context, team: int, slot: int):
 
 def release_player(ctx: Context, team: int, slot: int):
     """register any locations that are in the multidata"""
-    all_locations = set(ctx.locations[slot])
     ctx.broadcast_text_all("%s (Team #%d) has released all remaining items from their world."
                            % (ctx.player_names[(team, slot)], team + 1),
                            {"type": "Release", "team": team, "slot": slot})
-    register_location_checks(ctx, team, slot, all_locations)
+    register_new_checks(ctx, team, slot, ctx.locations.get_new_checks(ctx.location_checks, team, slot))
     update_checked_locations(ctx, team, slot)
 
 
 def collect_player(ctx: Context, team: int, slot: int, is_group: bool = False):
     """register any locations that are in the multidata, pointing towards this player"""
-    all_locations = ctx.locations.get_for_player(slot)
-
     ctx.broadcast_text_all("%s (Team #%d) has collected their items from other worlds."
                            % (ctx.player_names[(team, slot)], team + 1),
                            {"type": "Collect", "team": team, "slot": slot})
-    for source_player, location_ids in all_locations.items():
-        register_location_checks(ctx, team, source_player, location_ids, count_activity=False)
+    for source_player, new_checks in ctx.locations.get_new_checks_for_receiver(ctx.location_checks, team,
+                                                                               slot).items():
+        register_new_checks(ctx, team, source_player, new_checks, count_activity=False)
         update_checked_locations(ctx, team, source_player)
 
     if not is_group:
@@ -987,6 +1284,7 @@ def collect_player(ctx: Context, team: int, slot: int, is_group: bool = False):
             if slot in group_players:
                 group_collected_players = ctx.group_collected.setdefault(group, set())
                 group_collected_players.add(slot)
+                ctx.journal_sections.add("group_collected")
                 if set(group_players) == group_collected_players:
                     collect_player(ctx, team, group, True)
 
@@ -1001,17 +1299,26 @@ def send_items_to(ctx: Context, team: int, target_slot: int, *items: NetworkItem
             if item.player != target_slot:
                 get_received_items(ctx, team, target, False).append(item)
             get_received_items(ctx, team, target, True).append(item)
+        ctx.dirty_received_items.add((team, target))
 
 
 def register_location_checks(ctx: Context, team: int, slot: int, locations: typing.Iterable[int],
                              count_activity: bool = True):
-    new_locations = set(locations) - ctx.location_checks[team, slot]
-    new_locations.intersection_update(ctx.locations[slot])  # ignore location IDs unknown to this multidata
-    if new_locations:
+    # ignores location IDs unknown to this multidata
+    register_new_checks(ctx, team, slot, ctx.locations.get_new_checks(ctx.location_checks, team, slot, locations),
+                        count_activity)
+
+
+def register_new_checks(ctx: Context, team: int, slot: int, new_checks: typing.List[typing.Tuple[int, int, int, int]],
+                        count_activity: bool = True):
+    """register (location, item, receiver, flags) of locations not checked yet, as from LocationStore.get_new_checks"""
+    if new_checks:
         if count_activity:
             ctx.client_activity_timers[team, slot] = datetime.datetime.now(datetime.timezone.utc)
-        for location in new_locations:
-            item_id, target_player, flags = ctx.locations[slot][location]
+            ctx.journal_sections.add("client_activity_timers")
+        new_locations: typing.Set[int] = set()
+        for location, item_id, target_player, flags in new_checks:
+            new_locations.add(location)
             new_item = NetworkItem(item_id, location, slot, flags)
             send_items_to(ctx, team, target_player, new_item)
 
@@ -1028,10 +1335,8 @@ def register_location_checks(ctx: Context, team: int, slot: int, locations: typi
             "hint_points": get_slot_points(ctx, team, slot),
             "checked_locations": new_locations,  # send back new checks only
         }])
-        old_hints = ctx.hints[team, slot].copy()
-        ctx.recheck_hints(team, slot)
-        if old_hints != ctx.hints[team, slot]:
-            ctx.on_changed_hints(team, slot)
+        for hint_slot in sorted(ctx.update_found_hints(team, slot, new_locations)):
+            ctx.on_changed_hints(team, hint_slot)
         ctx.save()
 
 
@@ -1458,6 +1763,7 @@ class ClientMessageProcessor(CommonCommandProcessor):
                 new_item = NetworkItem(names[item_name], -1, self.client.slot)
                 get_received_items(self.ctx, self.client.team, self.client.slot, False).append(new_item)
                 get_received_items(self.ctx, self.client.team, self.client.slot, True).append(new_item)
+                self.ctx.dirty_received_items.add((self.client.team, self.client.slot))
                 self.ctx.broadcast_text_all(
                     'Cheat console: sending "' + item_name + '" to ' + self.ctx.get_aliased_name(self.client.team,
                                                                                                  self.client.slot),
@@ -1476,9 +1782,8 @@ class ClientMessageProcessor(CommonCommandProcessor):
         cost = self.ctx.get_hint_cost(self.client.slot)
 
         if not input_text:
-            hints = {hint.re_check(self.ctx, self.client.team) for hint in
-                     self.ctx.hints[self.client.team, self.client.slot]}
-            self.ctx.hints[self.client.team, self.client.slot] = hints
+            self.ctx.recheck_hints(self.client.team, self.client.slot)
+            hints = self.ctx.hints[self.client.team, self.client.slot]
             self.ctx.notify_hints(self.client.team, list(hints), recipients=(self.client.slot,))
             self.output(f"A hint costs {self.ctx.get_hint_cost(self.client.slot)} points. "
                         f"You have {points_available} points.")
@@ -1554,6 +1859,7 @@ class ClientMessageProcessor(CommonCommandProcessor):
                     can_pay = 1000
 
                 self.ctx.random.shuffle(not_found_hints)
+                self.ctx.journal_sections.add("random_state")
                 # By popular vote, make hints prefer non-local placements
                 not_found_hints.sort(key=lambda hint: int(hint.receiving_player != hint.finding_player))
                 # By another popular vote, prefer early sphere
@@ -1568,6 +1874,7 @@ class ClientMessageProcessor(CommonCommandProcessor):
                     hints.append(hint)
                     can_pay -= 1
                     self.ctx.hints_used[self.client.team, self.client.slot] += 1
+                    self.ctx.journal_sections.add("hints_used")
 
                 self.ctx.notify_hints(self.client.team, hints)
                 if not_found_hints:
@@ -1861,6 +2168,7 @@ async def process_client_cmd(ctx: Context, client: Client, args: dict):
                 func = modify_functions[operation["operation"]]
                 value = func(value, operation["value"])
             ctx.stored_data[args["key"]] = args["value"] = value
+            ctx.journal_stored_data.add(args["key"])
             targets = set(ctx.stored_data_notification_clients[args["key"]])
             if args.get("want_reply", True):
                 targets.add(client)
@@ -2189,6 +2497,7 @@ class ServerCommandProcessor(CommonCommandProcessor):
                 return False
 
         setattr(self.ctx, option_name, value_type(option_value))
+        self.ctx.journal_sections.add("game_options")
         self.output(f"Set option {option_name} to {getattr(self.ctx, option_name)}")
         if option_name in {"release_mode", "remaining_mode", "collect_mode"}:
             self.ctx.broadcast_all([{"cmd": "RoomUpdate", 'permissions': get_permissions(self.ctx)}])
@@ -2196,6 +2505,14 @@ class ServerCommandProcessor(CommonCommandProcessor):
             self.ctx.broadcast_all([{"cmd": "RoomUpdate", option_name: getattr(self.ctx, option_name)}])
         return True
 
+    def _cmd_metrics(self) -> bool:
+        """Show time spent per client command, broadcast sizes, event loop lag and save durations."""
+        if not self.ctx.metrics:
+            self.output("Metrics are not collected, start the server with --metrics to enable them.")
+            return False
+        self.output(self.ctx.metrics.summary())
+        return True
+
     def _cmd_datastore(self):
         """Debug Tool: list writable datastorage keys and approximate the size of their values with pickle."""
         total: int = 0
@@ -2284,13 +2601,21 @@ def parse_args() -> argparse.Namespace:
     #0 -> recommended for tournaments to force a level playing field, only allow an exact version match
     """)
     parser.add_argument('--log_network', default=defaults["log_network"], action="store_true")
+    parser.add_argument('--save_journal', default=defaults["save_journal"], action="store_true",
+                        help="append changes to a journal file, instead of rewriting the whole save file each time")
+    parser.add_argument('--metrics', default=defaults["metrics"], action="store_true",
+                        help="measure time spent per client command, broadcast sizes, event loop lag and saving")
+    parser.add_argument('--metrics_port', default=defaults["metrics_port"], type=int,
+                        help="serve metrics as Prometheus text on this port of localhost, enables --metrics")
     args = parser.parse_args()
     return args
 
 
-async def auto_shutdown(ctx, to_cancel=None):
+async def auto_shutdown(ctx, to_cancel=None, first_timeout: typing.Optional[float] = None):
+    """Shuts the server down once no client was active for ctx.auto_shutdown seconds, waiting at least first_timeout
+    seconds, or ctx.auto_shutdown if not given, after starting."""
     with contextlib.suppress(asyncio.TimeoutError):
-        await asyncio.wait_for(ctx.exit_event.wait(), ctx.auto_shutdown)
+        await asyncio.wait_for(ctx.exit_event.wait(), ctx.auto_shutdown if first_timeout is None else first_timeout)
 
     def inactivity_shutdown():
         ctx.server.ws_server.close()
@@ -2314,6 +2639,23 @@ async def auto_shutdown(ctx, to_cancel=None):
                     await asyncio.wait_for(ctx.exit_event.wait(), seconds)
 
 
+async def serve_metrics(ctx: Context, port: int) -> asyncio.AbstractServer:
+    """Answers any HTTP request on localhost:port with the metrics in Prometheus text format."""
+    async def respond(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            await reader.readuntil(b"\r\n\r\n")  # the request itself doesn't matter
+            body = ctx.metrics.prometheus_text().encode()
+            writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/plain; version=0.0.4\r\n"
+                         b"Content-Length: %d\r\nConnection: close\r\n\r\n%s" % (len(body), body))
+            await writer.drain()
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    return await asyncio.start_server(respond, "127.0.0.1", port)
+
+
 def load_server_cert(path: str, cert_key: typing.Optional[str]) -> "ssl.SSLContext":
     import ssl
     ssl_context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
@@ -2328,7 +2670,8 @@ async def main(args: argparse.Namespace):
     ctx = Context(args.host, args.port, args.server_password, args.password, args.location_check_points,
                   args.hint_cost, not args.disable_item_cheat, args.release_mode, args.collect_mode,
                   args.remaining_mode,
-                  args.auto_shutdown, args.compatibility, args.log_network)
+                  args.auto_shutdown, args.compatibility, args.log_network, args.save_journal,
+                  args.metrics or bool(args.metrics_port))
     data_filename = args.multidata
 
     if not data_filename:
@@ -2369,10 +2712,18 @@ async def main(args: argparse.Namespace):
 
     await ctx.server
     console_task = asyncio.create_task(console(ctx))
+    background_tasks = [console_task]
+    if ctx.metrics:
+        background_tasks.append(asyncio.create_task(ctx.metrics.sample_loop_lag()))
+        if args.metrics_port:
+            metrics_server = await serve_metrics(ctx, args.metrics_port)
+            background_tasks.append(asyncio.create_task(metrics_server.serve_forever()))
+            logging.info(f"Serving metrics at http://127.0.0.1:{args.metrics_port}/metrics")
     if ctx.auto_shutdown:
-        ctx.shutdown_task = asyncio.create_task(auto_shutdown(ctx, [console_task]))
+        ctx.shutdown_task = asyncio.create_task(auto_shutdown(ctx, background_tasks))
     await ctx.exit_event.wait()
-    console_task.cancel()
+    for task in background_tasks:
+        task.cancel()
     if ctx.shutdown_task:
         await ctx.shutdown_task
 
@@ -404,6 +404,30 @@ class _LocationStore(dict, typing.MutableMapping[int, typing.Dict[int, typing.Tu
                        location_id in player_locations if
                        location_id not in checked])
 
+    def get_new_checks(self, state: typing.Dict[typing.Tuple[int, int], typing.Set[int]], team: int, slot: int,
+                       locations: typing.Optional[typing.Iterable[int]] = None
+                       ) -> typing.List[typing.Tuple[int, int, int, int]]:
+        checked = state[team, slot]
+        player_locations = self[slot]
+        if locations is None:
+            new_locations = [location_id for location_id in player_locations if location_id not in checked]
+        else:
+            new_locations = {location_id for location_id in locations
+                             if type(location_id) is int and location_id in player_locations
+                             and location_id not in checked}
+        return [(location_id, *player_locations[location_id]) for location_id in sorted(new_locations)]
+
+    def get_new_checks_for_receiver(self, state: typing.Dict[typing.Tuple[int, int], typing.Set[int]], team: int,
+                                    receiver: int) -> typing.Dict[int, typing.List[typing.Tuple[int, int, int, int]]]:
+        new_checks: typing.Dict[int, typing.List[typing.Tuple[int, int, int, int]]] = {}
+        for sender, location_data in sorted(self.items()):
+            for location_id, values in sorted(location_data.items()):
+                if values[1] == receiver:
+                    sender_checks = new_checks.setdefault(sender, [])
+                    if location_id not in state[team, sender]:
+                        sender_checks.append((location_id, *values))
+        return new_checks
+
 
 if typing.TYPE_CHECKING:  # type-check with pure python implementation until we have a typing stub
     LocationStore = _LocationStore
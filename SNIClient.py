@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import bisect
 import sys
 import threading
 import time
@@ -511,7 +512,36 @@ async def snes_recv_loop(ctx: SNIContext) -> None:
             ctx.snes_autoreconnect_task = asyncio.create_task(snes_autoreconnect(ctx), name="snes auto-reconnect")
 
 
+def merge_read_ranges(ranges: typing.Iterable[typing.Tuple[int, int]]) -> typing.List[typing.Tuple[int, int]]:
+    """Merges adjacent and overlapping (address, size) ranges, returning the merged ranges sorted by address."""
+    merged: typing.List[typing.Tuple[int, int]] = []
+    for address, size in sorted(ranges):
+        if merged and address <= merged[-1][0] + merged[-1][1]:
+            # extend the previous range, bundling them
+            merged_address, merged_size = merged[-1]
+            merged[-1] = (merged_address, max(merged_size, address + size - merged_address))
+        else:
+            merged.append((address, size))
+    return merged
+
+
 async def snes_read(ctx: SNIContext, address: int, size: int) -> typing.Optional[bytes]:
+    data = await snes_read_ranges(ctx, [(address, size)])
+    if data is None:
+        return None
+    return data[0]
+
+
+async def snes_read_ranges(ctx: SNIContext, ranges: typing.Sequence[typing.Tuple[int, int]]
+                           ) -> typing.Optional[typing.List[bytes]]:
+    """
+    Reads all (address, size) ranges in a single request, merging adjacent and overlapping ones.
+    Returns the data of each range in the order they were given, or None if the read failed.
+    """
+    if not ranges:
+        return []
+    merged = merge_read_ranges(ranges)
+    size = sum(merged_size for _, merged_size in merged)
     try:
         await ctx.snes_request_lock.acquire()
 
@@ -523,10 +553,13 @@ async def snes_read(ctx: SNIContext, address: int, size: int) -> typing.Optional
         ):
             return None
 
+        operands: typing.List[str] = []
+        for merged_address, merged_size in merged:
+            operands += [hex(merged_address)[2:], hex(merged_size)[2:]]
         GetAddress_Request: SNESRequest = {
             "Opcode": "GetAddress",
             "Space": "SNES",
-            "Operands": [hex(address)[2:], hex(size)[2:]]
+            "Operands": operands
         }
         try:
             await ctx.snes_socket.send(dumps(GetAddress_Request))
@@ -541,18 +574,30 @@ async def snes_read(ctx: SNIContext, address: int, size: int) -> typing.Optional
                 break
 
         if len(data) != size:
-            snes_logger.error('Error reading %s, requested %d bytes, received %d' % (hex(address), size, len(data)))
+            snes_logger.error('Error reading %s, requested %d bytes, received %d' %
+                              (", ".join(hex(merged_address) for merged_address, _ in merged), size, len(data)))
             if len(data):
                 snes_logger.error(str(data))
                 snes_logger.warning('Communication Failure with SNI')
             if ctx.snes_socket is not None and not ctx.snes_socket.closed:
                 await ctx.snes_socket.close()
             return None
-
-        return data
     finally:
         ctx.snes_request_lock.release()
 
+    # the response is the data of all merged ranges in order, find where each requested range starts in it
+    offsets: typing.List[int] = []
+    offset = 0
+    for _, merged_size in merged:
+        offsets.append(offset)
+        offset += merged_size
+    result: typing.List[bytes] = []
+    for address, range_size in ranges:
+        index = bisect.bisect_right(merged, (address, float("inf"))) - 1
+        start = offsets[index] + address - merged[index][0]
+        result.append(data[start:start + range_size])
+    return result
+
 
 async def snes_write(ctx: SNIContext, write_list: typing.List[typing.Tuple[int, bytes]]) -> bool:
     try:
@@ -15,8 +15,13 @@ import collections
 import importlib
 import logging
 import warnings
+import zlib
+import bisect
+import mmap
+import struct
 
 from argparse import Namespace
+from array import array
 from settings import Settings, get_settings
 from typing import BinaryIO, Coroutine, Optional, Set, Dict, Any, Union
 from typing_extensions import TypeGuard
@@ -323,6 +328,15 @@ def persistent_load() -> Dict[str, Dict[str, Any]]:
             logging.debug(f"Could not read store: {e}")
     if storage is None:
         storage = {}
+    if "datapackage" in storage:
+        # data packages used to be stored here, move them to the cache so they don't get parsed on every start
+        try:
+            for game, game_data in storage.pop("datapackage").get("games", {}).items():
+                store_data_package_for_checksum(game, game_data)
+            with open(path, "wt") as f:
+                f.write(dump(storage, Dumper=Dumper))
+        except Exception as e:
+            logging.debug(f"Could not move data packages out of store: {e}")
     setattr(persistent_load, "storage", storage)
     return storage
 
@@ -331,22 +345,173 @@ def get_file_safe_name(name: str) -> str:
     return "".join(c for c in name if c not in '<>:"/\\|?*')
 
 
-def load_data_package_for_checksum(game: str, checksum: typing.Optional[str]) -> Dict[str, Any]:
+data_package_cache_format_version = 1
+"""version of the binary data package cache files written by store_data_package_for_checksum"""
+_data_package_cache_header = struct.Struct("<4sBB2xIIIII")
+"""magic, format version, 1 if the arrays are little endian, name count, name data length, item count,
+location count, meta length"""
+
+
+def _align(offset: int) -> int:
+    return (offset + 7) & ~7
+
+
+def dump_data_package_cache(game_data: typing.Mapping[str, Any], file: BinaryIO) -> None:
+    """
+    Write a game's data package in the binary cache format read by DataPackageCache.
+    Names are stored once, in a table shared by items and locations. Ids are stored sorted, so they can be looked up
+    without reading anything else.
+    """
+    meta = json.dumps({key: value for key, value in game_data.items()
+                       if key not in ("item_name_to_id", "location_name_to_id")},
+                      ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    name_indices: Dict[str, int] = {}
+    tables: typing.List[typing.Tuple[array, array]] = []
+    for table_name in ("item_name_to_id", "location_name_to_id"):
+        entries = sorted((code, name) for name, code in game_data.get(table_name, {}).items())
+        tables.append((array("q", (code for code, _ in entries)),
+                       array("I", (name_indices.setdefault(name, len(name_indices)) for _, name in entries))))
+    name_offsets = array("I", [0])
+    name_data = bytearray()
+    for name in name_indices:
+        name_data += name.encode("utf-8")
+        name_offsets.append(len(name_data))
+
+    sections: typing.List[bytes] = [meta, name_offsets.tobytes(), bytes(name_data)]
+    for ids, indices in tables:
+        sections += (ids.tobytes(), indices.tobytes())
+    offset = _data_package_cache_header.size
+    file.write(_data_package_cache_header.pack(b"APDP", data_package_cache_format_version,
+                                               sys.byteorder == "little", len(name_indices), len(name_data),
+                                               len(tables[0][0]), len(tables[1][0]), len(meta)))
+    for section in sections:
+        padding = _align(offset) - offset
+        file.write(bytes(padding))
+        file.write(section)
+        offset += padding + len(section)
+
+
+class DataPackageNames(typing.Mapping[int, str]):
+    """id -> name lookups of a game's items or locations in a DataPackageCache"""
+    __slots__ = ("_cache", "_ids", "_name_indices")
+
+    def __init__(self, cache: DataPackageCache, ids: memoryview, name_indices: memoryview):
+        self._cache = cache
+        self._ids = ids
+        self._name_indices = name_indices
+
+    def __getitem__(self, code: int) -> str:
+        if not isinstance(code, int):
+            raise KeyError(code)
+        ids = self._ids
+        index = bisect.bisect_left(ids, code)
+        if index == len(ids) or ids[index] != code:
+            raise KeyError(code)
+        return self._cache.name(self._name_indices[index])
+
+    def __iter__(self) -> typing.Iterator[int]:
+        return iter(self._ids.tolist())
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+
+class DataPackageCache:
+    """
+    A game's data package in the format written by dump_data_package_cache, usually memory mapped.
+    Nothing but the metadata gets decoded up front, names are decoded when they are first looked up.
+    """
+    meta: Dict[str, Any]
+    """all fields of the data package besides the name to id tables, like checksum"""
+    item_names: DataPackageNames
+    location_names: DataPackageNames
+    _name_offsets: memoryview
+    _name_data: memoryview
+    _names: typing.List[Optional[str]]
+
+    def __init__(self, buffer: typing.Union[bytes, bytearray, memoryview, mmap.mmap]):
+        view = memoryview(buffer)
+        magic, version, little_endian, name_count, name_data_length, item_count, location_count, meta_length = \
+            _data_package_cache_header.unpack_from(view)
+        if magic != b"APDP" or version != data_package_cache_format_version:
+            raise ValueError("Not a data package cache of a supported version.")
+        if little_endian != (sys.byteorder == "little"):
+            raise ValueError("Data package cache was written on a system with different byte order.")
+        offset = _data_package_cache_header.size
+
+        def section(length: int) -> memoryview:
+            nonlocal offset
+            start = _align(offset)
+            offset = start + length
+            if offset > len(view):
+                raise ValueError("Data package cache is truncated.")
+            return view[start:offset]
+
+        self.meta = json.loads(bytes(section(meta_length)).decode("utf-8"))
+        self._name_offsets = section(4 * (name_count + 1)).cast("I")
+        self._name_data = section(name_data_length)
+        self._names = [None] * name_count
+        self.item_names = DataPackageNames(self, section(8 * item_count).cast("q"), section(4 * item_count).cast("I"))
+        self.location_names = DataPackageNames(self, section(8 * location_count).cast("q"),
+                                               section(4 * location_count).cast("I"))
+
+    @classmethod
+    def open(cls, path: str) -> DataPackageCache:
+        with open(path, "rb") as f:
+            return cls(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+    def name(self, index: int) -> str:
+        name = self._names[index]
+        if name is None:
+            name = self._names[index] = str(self._name_data[self._name_offsets[index]:self._name_offsets[index + 1]],
+                                            "utf-8")
+        return name
+
+    def to_game_data(self) -> Dict[str, Any]:
+        """Returns the whole data package, as it was passed to dump_data_package_cache."""
+        return {**self.meta,
+                "item_name_to_id": {name: code for code, name in self.item_names.items()},
+                "location_name_to_id": {name: code for code, name in self.location_names.items()}}
+
+
+def _data_package_path(game: str, checksum: str, extension: str) -> str:
+    if checksum != get_file_safe_name(checksum):
+        raise ValueError(f"Bad symbols in checksum: {checksum}")
+    return cache_path("datapackage", get_file_safe_name(game), f"{checksum}.{extension}")
+
+
+def _convert_json_data_package(game: str, checksum: str) -> None:
+    """Stores the json file of game with checksum written by older versions in the binary format, if there is one."""
+    path = _data_package_path(game, checksum, "json")
+    if os.path.exists(path):
+        try:
+            with open(path, "r", encoding="utf-8-sig") as f:
+                data = json.load(f)
+        except Exception as e:
+            logging.debug(f"Could not load data package: {e}")
+        else:
+            if data.get("checksum") == checksum:
+                store_data_package_for_checksum(game, data)
+
+
+def open_data_package_cache(game: str, checksum: typing.Optional[str]) -> Optional[DataPackageCache]:
+    """Returns the cached data package of game with checksum, if there is one, without decoding its names."""
     if checksum and game:
-        if checksum != get_file_safe_name(checksum):
-            raise ValueError(f"Bad symbols in checksum: {checksum}")
-        path = cache_path("datapackage", get_file_safe_name(game), f"{checksum}.json")
+        path = _data_package_path(game, checksum, "bin")
+        if not os.path.exists(path):
+            _convert_json_data_package(game, checksum)
         if os.path.exists(path):
             try:
-                with open(path, "r", encoding="utf-8-sig") as f:
-                    return json.load(f)
+                return DataPackageCache.open(path)
             except Exception as e:
                 logging.debug(f"Could not load data package: {e}")
+    return None
+
 
-    # fall back to old cache
-    cache = persistent_load().get("datapackage", {}).get("games", {}).get(game, {})
-    if cache.get("checksum") == checksum:
-        return cache
+def load_data_package_for_checksum(game: str, checksum: typing.Optional[str]) -> Dict[str, Any]:
+    cache = open_data_package_cache(game, checksum)
+    if cache:
+        return cache.to_game_data()
 
     # cache does not match
     return {}
@@ -355,13 +520,13 @@ def load_data_package_for_checksum(game: str, checksum: typing.Optional[str]) ->
 def store_data_package_for_checksum(game: str, data: typing.Dict[str, Any]) -> None:
     checksum = data.get("checksum")
     if checksum and game:
-        if checksum != get_file_safe_name(checksum):
-            raise ValueError(f"Bad symbols in checksum: {checksum}")
-        game_folder = cache_path("datapackage", get_file_safe_name(game))
-        os.makedirs(game_folder, exist_ok=True)
+        path = _data_package_path(game, checksum, "bin")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
         try:
-            with open(os.path.join(game_folder, f"{checksum}.json"), "w", encoding="utf-8-sig") as f:
-                json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+            # write to a temporary file first, so a cache that is open elsewhere never reads a partial file
+            with open(f"{path}.tmp", "wb") as f:
+                dump_data_package_cache(data, f)
+            os.replace(f"{path}.tmp", path)
         except Exception as e:
             logging.debug(f"Could not store data package: {e}")
 
@@ -445,6 +610,154 @@ def restricted_loads(s: bytes) -> Any:
     return RestrictedUnpickler(io.BytesIO(s)).load()
 
 
+multidata_format_version = 4
+"""first byte of .archipelago files written by dump_multidata. 3 and below are a single zlib compressed pickle."""
+# top level multidata entries that are stored as one section per key, so they can be decompressed one at a time
+_split_multidata_sections = frozenset({"locations", "slot_data", "datapackage", "precollected_hints"})
+
+
+def dump_multidata(multidata: typing.Mapping[str, Any], file: BinaryIO,
+                   split_sections: typing.AbstractSet[str] = _split_multidata_sections) -> None:
+    """
+    Write multidata as independently compressed sections, followed by the index of those sections,
+    so that no pickle of the whole multidata has to be held in memory.
+    The index holds the start, compressed length and decompressed length of each section.
+
+    :param split_sections: top level keys of which each value is stored as its own section
+    """
+    file.write(bytes([multidata_format_version]))
+    offset = 1
+
+    def write_section(value: Any) -> typing.Tuple[int, int, int]:
+        nonlocal offset
+        pickled = pickle.dumps(value)
+        data = zlib.compress(pickled, 9)
+        file.write(data)
+        start, offset = offset, offset + len(data)
+        return start, len(data), len(pickled)
+
+    index: Dict[str, Union[typing.Tuple[int, int, int], Dict[Any, typing.Tuple[int, int, int]]]] = {}
+    for key, value in multidata.items():
+        if key in split_sections and isinstance(value, typing.Mapping):
+            index[key] = {sub_key: write_section(sub_value) for sub_key, sub_value in value.items()}
+        else:
+            index[key] = write_section(value)
+    index_data = zlib.compress(pickle.dumps(index), 9)
+    file.write(index_data)
+    file.write(len(index_data).to_bytes(8, "little"))
+
+
+def dumps_multidata(multidata: typing.Mapping[str, Any]) -> bytes:
+    with io.BytesIO() as file:
+        dump_multidata(multidata, file)
+        return file.getvalue()
+
+
+class MultidataSections(typing.MutableMapping[Any, Any]):
+    """
+    Multidata read from the format written by dump_multidata. Each section gets decompressed when it is first used.
+    Sections stored per key (see _split_multidata_sections) are MultidataSections themselves.
+    """
+    _data: bytes
+    _index: Dict[Any, Union[typing.Tuple[int, int, int], Dict[Any, typing.Tuple[int, int, int]]]]
+    _loaded: Dict[Any, Any]
+
+    def __init__(self, data: bytes,
+                 index: Dict[Any, Union[typing.Tuple[int, int, int], Dict[Any, typing.Tuple[int, int, int]]]]):
+        self._data = data
+        self._index = index
+        self._loaded = {}
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> MultidataSections:
+        return cls.from_buffer(bytes(data))
+
+    @classmethod
+    def from_buffer(cls, data: typing.Union[bytes, mmap.mmap]) -> MultidataSections:
+        """Like from_bytes, but sections are read from data itself instead of a copy, for example a memory map."""
+        index_length = int.from_bytes(data[-8:], "little")
+        index = restricted_loads(zlib.decompress(data[-8 - index_length:-8]))
+        return cls(data, index)
+
+    def _load_section(self, entry: typing.Tuple[int, int, int]) -> Any:
+        start, length, _ = entry
+        return restricted_loads(zlib.decompress(self._data[start:start + length]))
+
+    def lazy(self, key: Any, default: Any = None) -> typing.Callable[[], Any]:
+        """Returns a function that loads a section, without keeping this object and its data alive."""
+        loaded = self._loaded.get(key, None)
+        if key in self._loaded and not isinstance(loaded, MultidataSections):
+            return lambda: loaded
+        entry = self._index.get(key, None)
+        if entry is None:
+            return lambda: default
+        if isinstance(entry, dict):
+            # sub-sections are written one after another, only that span is kept with an index relative to it
+            sub_loaded = dict(loaded._loaded) if loaded is not None else {}
+            entries = [sub_entry for sub_key, sub_entry in entry.items() if sub_key not in sub_loaded]
+            start = min((sub_start for sub_start, _, _ in entries), default=0)
+            end = max((sub_start + sub_length for sub_start, sub_length, _ in entries), default=0)
+            section = self._data[start:end]
+            sub_index = {sub_key: (sub_start - start, sub_length, sub_size)
+                         for sub_key, (sub_start, sub_length, sub_size) in entry.items()}
+
+            def load_split() -> MultidataSections:
+                sections = MultidataSections(section, dict(sub_index))
+                sections._loaded.update(sub_loaded)
+                return sections
+            return load_split
+        start, length, _ = entry
+        section = self._data[start:start + length]
+        return lambda: restricted_loads(zlib.decompress(section))
+
+    def decompressed_size(self) -> int:
+        """Returns the size of all stored sections once decompressed, as recorded in the index."""
+        return sum(size for entry in self._index.values()
+                   for _, _, size in (entry.values() if isinstance(entry, dict) else (entry,)))
+
+    def __getitem__(self, key: Any) -> Any:
+        if key in self._loaded:
+            return self._loaded[key]
+        entry = self._index[key]
+        if isinstance(entry, dict):
+            value = MultidataSections(self._data, entry)
+        else:
+            value = self._load_section(entry)
+        self._loaded[key] = value
+        return value
+
+    def __setitem__(self, key: Any, value: Any) -> None:
+        if key not in self._index:
+            self._index[key] = (0, 0, 0)  # keep insertion order, the value itself is only in _loaded
+        self._loaded[key] = value
+
+    def __delitem__(self, key: Any) -> None:
+        del self._index[key]
+        self._loaded.pop(key, None)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._index
+
+    def __iter__(self) -> typing.Iterator[Any]:
+        return iter(self._index)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({list(self._index)})"
+
+
+def loads_multidata(data: bytes) -> typing.MutableMapping[str, Any]:
+    """Reads .archipelago data of any supported format version."""
+    format_version = data[0]
+    if format_version > multidata_format_version:
+        raise VersionException("Incompatible multidata.")
+    if format_version >= 4:
+        return MultidataSections.from_bytes(data)
+    return restricted_loads(zlib.decompress(data[1:]))
+
+
 class ByValue:
     """
     Mixin for enums to pickle value instead of name (restores pre-3.11 behavior). Use as left-most parent.
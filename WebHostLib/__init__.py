@@ -24,10 +24,17 @@ app.jinja_env.filters['all'] = all
 app.config["SELFHOST"] = True  # application process is in charge of running the websites
 app.config["GENERATORS"] = 8  # maximum concurrent world gens
 app.config["HOSTERS"] = 8  # maximum concurrent room hosters
+app.config["MAP_STATIC_SERVER_DATA"] = False  # room hosters share one memory mapped copy of the static game data
+# idle rooms move away from hosters whose event loop lags more than this many seconds. 0 disables moving rooms.
+app.config["HOSTER_MIGRATION_LAG"] = 0.5
 app.config["SELFLAUNCH"] = True  # application process is in charge of launching Rooms.
 app.config["SELFLAUNCHCERT"] = None  # can point to a SSL Certificate to encrypt Room websocket connections
 app.config["SELFLAUNCHKEY"] = None  # can point to a SSL Certificate Key to encrypt Room websocket connections
 app.config["SELFGEN"] = True  # application process is in charge of scheduling Generations.
+# local UDP port the website uses to notify the launcher of room activity, commands and generations. 0 disables it.
+app.config["LAUNCHER_NOTIFY_PORT"] = 38280
+# seconds between database polls of the launcher and rooms when notifications are enabled, in case any got lost
+app.config["LAUNCHER_POLL_INTERVAL"] = 10
 app.config["DEBUG"] = False
 app.config["PORT"] = 80
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
@@ -51,6 +58,9 @@ app.config["PONY"] = {
 }
 app.config["MAX_ROLL"] = 20
 app.config["CACHE_TYPE"] = "SimpleCache"
+# estimated memory use in bytes of seed data, like multidata and data packages, that trackers keep loaded between
+# requests, see tracker.PICKLE_MEMORY_FACTOR
+app.config["TRACKER_DATA_CACHE_SIZE"] = 256 * 1024 * 1024
 app.config["HOST_ADDRESS"] = ""
 app.config["ASSET_RIGHTS"] = False
 
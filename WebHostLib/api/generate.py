@@ -6,7 +6,7 @@ from flask import request, session, url_for
 from markupsafe import Markup
 from pony.orm import commit
 
-from WebHostLib import app
+from WebHostLib import app, notify
 from WebHostLib.check import get_yaml_data, roll_options
 from WebHostLib.generate import get_meta
 from WebHostLib.models import Generation, STATE_QUEUED, Seed, STATE_ERROR
@@ -61,6 +61,7 @@ def generate_api():
                 meta=json.dumps(meta), state=STATE_QUEUED,
                 owner=session["_id"])
             commit()
+            notify.send(app.config["LAUNCHER_NOTIFY_PORT"], notify.GENERATION)
             return {"text": f"Generation of seed {gen.id} started successfully.",
                     "detail": gen.id,
                     "encoded": app.url_map.converters["suuid"].to_url(None, gen.id),
@@ -1,8 +1,12 @@
 from __future__ import annotations
 
+import atexit
 import json
 import logging
 import multiprocessing
+import os
+import queue
+import time
 import typing
 from datetime import timedelta, datetime
 from threading import Event, Thread
@@ -11,6 +15,7 @@ from uuid import UUID
 from pony.orm import db_session, select, commit
 
 from Utils import restricted_loads
+from . import notify
 from .locker import Locker, AlreadyRunningException
 
 _stop_event = Event()
@@ -53,6 +58,46 @@ def launch_generator(pool: multiprocessing.pool.Pool, generation: Generation):
         generation.state = STATE_STARTED
 
 
+def wait_for_poll(stop_event: Event, notifications: typing.Optional[queue.SimpleQueue], poll_interval: float,
+                  handle: typing.Callable[[bytes, typing.Optional[UUID]], bool]) -> bool:
+    """
+    Waits until the database should be polled again, handling notifications in the meantime.
+    Without notifications, the database gets polled every 0.1 seconds.
+
+    :param handle: called for each notification, returns whether to poll the database right away
+    :return: False if the thread should stop instead
+    """
+    if notifications is None:
+        return not stop_event.wait(0.1)
+    next_poll = time.monotonic() + poll_interval
+    while not stop_event.is_set():
+        timeout = next_poll - time.monotonic()
+        if timeout <= 0:
+            return True
+        poll_now = False
+        for kind, uuid in notify.wait(notifications, min(1., timeout)):
+            poll_now |= handle(kind, uuid)
+        if poll_now:
+            return True
+    return False
+
+
+def place_room(hosters: typing.Sequence[MultiworldInstance], room_id: UUID) -> None:
+    """Starts the room on the least loaded hoster, unless one already runs it."""
+    if not any(room_id in hoster.room_ids for hoster in hosters):
+        min(hosters, key=MultiworldInstance.load_score).start_room(room_id)
+
+
+def migrate_idle_rooms(hosters: typing.Sequence[MultiworldInstance], max_loop_lag: float) -> None:
+    """Moves an idle room away from each hoster whose event loop lags more than max_loop_lag seconds,
+    if a hoster with less lag and load is available. The room saves and restarts from its save on that hoster."""
+    for hoster in hosters:
+        if hoster.load and hoster.load.loop_lag > max_loop_lag:
+            target = min(hosters, key=MultiworldInstance.load_score)
+            if target.load_score() < hoster.load_score() and (not target.load or target.load.loop_lag < max_loop_lag):
+                hoster.release_idle_room()
+
+
 def init_db(pony_config: dict):
     db.bind(**pony_config)
     db.generate_mapping()
@@ -78,12 +123,34 @@ def autohost(config: dict):
             with Locker("autohost"):
                 cleanup()
                 hosters = []
+                static_server_data = None
+                if config["MAP_STATIC_SERVER_DATA"]:
+                    static_server_data = dump_static_server_data()
+                    atexit.register(os.remove, static_server_data)
+                listener = notify.get_listener(config["LAUNCHER_NOTIFY_PORT"])
                 for x in range(config["HOSTERS"]):
-                    hoster = MultiworldInstance(config, x)
+                    hoster = MultiworldInstance(config, x, static_server_data, listener is not None)
                     hosters.append(hoster)
                     hoster.start()
 
-                while not stop_event.wait(0.1):
+                def update_hosters() -> None:
+                    for hoster in hosters:
+                        for room_id in hoster.update():
+                            # released to be moved, restart it from its save on the least loaded hoster
+                            place_room(hosters, room_id)
+
+                def handle(kind: bytes, room_id: UUID) -> bool:
+                    update_hosters()
+                    if kind == notify.COMMAND:
+                        for hoster in hosters:
+                            hoster.notify_command(room_id)
+                    else:
+                        place_room(hosters, room_id)
+                    return False
+
+                notifications = listener.room_notifications if listener else None
+                while wait_for_poll(stop_event, notifications, config["LAUNCHER_POLL_INTERVAL"], handle):
+                    update_hosters()
                     with db_session:
                         rooms = select(
                             room for room in Room if
@@ -91,7 +158,9 @@ def autohost(config: dict):
                         for room in rooms:
                             # we have to filter twice, as the per-room timeout can't currently be PonyORM transpiled.
                             if room.last_activity >= datetime.utcnow() - timedelta(seconds=room.timeout + 5):
-                                hosters[room.id.int % len(hosters)].start_room(room.id)
+                                place_room(hosters, room.id)
+                    if config["HOSTER_MIGRATION_LAG"]:
+                        migrate_idle_rooms(hosters, config["HOSTER_MIGRATION_LAG"])
 
         except AlreadyRunningException:
             logging.info("Autohost reports as already running, not starting another.")
@@ -122,7 +191,10 @@ def autogen(config: dict):
                             commit()
                         select(generation for generation in Generation if generation.state == STATE_ERROR).delete()
 
-                    while not stop_event.wait(0.1):
+                    listener = notify.get_listener(config["LAUNCHER_NOTIFY_PORT"])
+                    notifications = listener.generation_notifications if listener else None
+                    while wait_for_poll(stop_event, notifications, config["LAUNCHER_POLL_INTERVAL"],
+                                        lambda kind, uuid: True):
                         with db_session:
                             # for update locks the database row(s) during transaction, preventing writes from elsewhere
                             to_start = select(
@@ -140,7 +212,8 @@ multiworlds: typing.Dict[type(Room.id), MultiworldInstance] = {}
 
 
 class MultiworldInstance():
-    def __init__(self, config: dict, id: int):
+    def __init__(self, config: dict, id: int, static_server_data: typing.Optional[str] = None,
+                 notified: bool = False):
         self.room_ids = set()
         self.process: typing.Optional[multiprocessing.Process] = None
         self.ponyconfig = config["PONY"]
@@ -149,29 +222,74 @@ class MultiworldInstance():
         self.host = config["HOST_ADDRESS"]
         self.rooms_to_start = multiprocessing.Queue()
         self.rooms_shutting_down = multiprocessing.Queue()
+        # ids of rooms that got commands queued, if the launcher gets notified of those
+        self.room_commands: typing.Optional[multiprocessing.Queue] = multiprocessing.Queue() if notified else None
+        self.command_poll_interval = config["LAUNCHER_POLL_INTERVAL"] if notified else 5
+        self.load_reports = multiprocessing.Queue()
+        self.rooms_to_release = multiprocessing.Queue()
+        # latest load reported by the process, None until it first reports
+        self.load: typing.Optional[HosterLoad] = None
+        # rooms asked to move away, not to ask again until the next report
+        self.releasing: typing.Set[UUID] = set()
         self.name = f"MultiHoster{id}"
+        # path of the file written by dump_static_server_data, if hosters should map it instead of getting a copy
+        self.static_server_data = static_server_data
 
     def start(self):
         if self.process and self.process.is_alive():
             return False
 
         process = multiprocessing.Process(group=None, target=run_server_process,
-                                          args=(self.name, self.ponyconfig, get_static_server_data(),
+                                          args=(self.name, self.ponyconfig,
+                                                self.static_server_data or get_static_server_data(),
                                                 self.cert, self.key, self.host,
-                                                self.rooms_to_start, self.rooms_shutting_down),
+                                                self.rooms_to_start, self.rooms_shutting_down,
+                                                self.room_commands, self.command_poll_interval,
+                                                self.load_reports, self.rooms_to_release),
                                           name=self.name)
         process.start()
         self.process = process
 
-    def start_room(self, room_id):
+    def update(self) -> typing.List[UUID]:
+        """Takes in what the process reported since the last update. Returns the rooms it released to be moved."""
+        released = []
         while not self.rooms_shutting_down.empty():
-            self.room_ids.remove(self.rooms_shutting_down.get(block=True, timeout=None))
+            room_id, was_released = self.rooms_shutting_down.get(block=True, timeout=None)
+            self.room_ids.remove(room_id)
+            if was_released:
+                released.append(room_id)
+        while not self.load_reports.empty():
+            self.load = self.load_reports.get(block=True, timeout=None)
+            self.releasing.clear()
+        return released
+
+    def load_score(self) -> float:
+        """Rough measure of how busy the hoster is, each room counting 1 and the reported load adding to that."""
+        score = len(self.room_ids)
+        if self.load:
+            score += self.load.clients + self.load.messages_per_second / 10 + self.load.loop_lag * 100 + \
+                     self.load.memory / (256 * 1024 * 1024)
+        return score
+
+    def release_idle_room(self) -> None:
+        """Asks the process to shut down one of its idle rooms, so that it can be restarted on another hoster."""
+        for room_id in self.load.idle_rooms if self.load else ():
+            if room_id in self.room_ids and room_id not in self.releasing:
+                self.releasing.add(room_id)
+                self.rooms_to_release.put(room_id)
+                return
+
+    def start_room(self, room_id):
         if room_id in self.room_ids:
             pass  # should already be hosted currently.
         else:
             self.room_ids.add(room_id)
             self.rooms_to_start.put(room_id)
 
+    def notify_command(self, room_id):
+        if self.room_commands and room_id in self.room_ids:
+            self.room_commands.put(room_id)
+
     def stop(self):
         if self.process:
             self.process.terminate()
@@ -186,5 +304,5 @@ class MultiworldInstance():
 
 
 from .models import Room, Generation, STATE_QUEUED, STATE_STARTED, STATE_ERROR, db, Seed, Slot
-from .customserver import run_server_process, get_static_server_data
+from .customserver import HosterLoad, run_server_process, get_static_server_data, dump_static_server_data
 from .generate import gen_game
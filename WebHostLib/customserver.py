@@ -5,7 +5,9 @@ import collections
 import datetime
 import functools
 import logging
+import mmap
 import multiprocessing
+import os
 import pickle
 import random
 import socket
@@ -59,8 +61,12 @@ class DBCommandProcessor(ServerCommandProcessor):
 
 class WebHostContext(Context):
     room_id: int
+    command_poll_interval: float = 5
+    """seconds between checks for queued commands, if none were announced through commands_ready"""
+    idle_since: datetime.datetime
+    """UTC time the inactivity timeout counted from when the room started, which may be before it started"""
 
-    def __init__(self, static_server_data: dict, logger: logging.Logger):
+    def __init__(self, static_server_data: typing.Mapping[str, typing.Any], logger: logging.Logger):
         # static server data is used during _load_game_data to load required data,
         # without needing to import worlds system, which takes quite a bit of memory
         self.static_server_data = static_server_data
@@ -71,17 +77,29 @@ class WebHostContext(Context):
         self.main_loop = asyncio.get_running_loop()
         self.video = {}
         self.tags = ["AP", "WebHost"]
+        self.commands_ready = threading.Event()
 
     def _load_game_data(self):
         for key, value in self.static_server_data.items():
             # NOTE: attributes are mutable and shared, so they will have to be copied before being modified
             setattr(self, key, value)
-        self.non_hintable_names = collections.defaultdict(frozenset, self.non_hintable_names)
+        if isinstance(self.non_hintable_names, Utils.MultidataSections):
+            # mapped static server data, only load the games that get used
+            self.non_hintable_names = collections.ChainMap(self.non_hintable_names, collections.defaultdict(frozenset))
+        else:
+            self.non_hintable_names = collections.defaultdict(frozenset, self.non_hintable_names)
+
+    def get_idle_since(self) -> datetime.datetime:
+        """Returns the UTC time the inactivity timeout of the room currently counts from, see auto_shutdown."""
+        activity = (timer.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+                    for timer in self.client_activity_timers.values())
+        return max(self.idle_since, *activity)
 
     def listen_to_db_commands(self):
         cmdprocessor = DBCommandProcessor(self)
 
         while not self.exit_event.is_set():
+            self.commands_ready.clear()
             with db_session:
                 commands = select(command for command in Command if command.room.id == self.room_id)
                 if commands:
@@ -89,7 +107,7 @@ class WebHostContext(Context):
                         self.main_loop.call_soon_threadsafe(cmdprocessor, command.commandtext)
                         command.delete()
                     commit()
-            time.sleep(5)
+            self.commands_ready.wait(self.command_poll_interval)
 
     @db_session
     def load(self, room_id: int):
@@ -128,8 +146,8 @@ class WebHostContext(Context):
             self.item_name_groups[game] = static_item_name_groups.get(game, {})
             self.location_name_groups[game] = static_location_name_groups.get(game, {})
 
-        if not game_data_packages:
-            # all static -> use the static dicts directly
+        if not game_data_packages and not isinstance(static_gamespackage, Utils.MultidataSections):
+            # all static -> use the static dicts directly, unless they are mapped and each game gets loaded on use
             self.gamespackage = static_gamespackage
             self.item_name_groups = static_item_name_groups
             self.location_name_groups = static_location_name_groups
@@ -193,6 +211,28 @@ def get_static_server_data() -> dict:
     return data
 
 
+_static_server_data_sections = frozenset({"non_hintable_names", "gamespackage", "item_name_groups",
+                                          "location_name_groups"})
+
+
+def dump_static_server_data() -> str:
+    """
+    Writes get_static_server_data to a temporary file, split into one section per game, and returns its path.
+    Hosters memory map it through load_static_server_data instead of each getting a copy of the whole data.
+    """
+    import tempfile
+    fd, path = tempfile.mkstemp(prefix="ap_static_server_data_", suffix=".bin")
+    with os.fdopen(fd, "wb") as f:
+        Utils.dump_multidata(get_static_server_data(), f, _static_server_data_sections)
+    return path
+
+
+def load_static_server_data(path: str) -> Utils.MultidataSections:
+    """Maps static server data written by dump_static_server_data. Each game's data is loaded when it is first used."""
+    with open(path, "rb") as f:
+        return Utils.MultidataSections.from_buffer(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+
 def set_up_logging(room_id) -> logging.Logger:
     import os
     # logger setup
@@ -213,9 +253,35 @@ def set_up_logging(room_id) -> logging.Logger:
     return logger
 
 
-def run_server_process(name: str, ponyconfig: dict, static_server_data: dict,
+class HosterLoad(typing.NamedTuple):
+    """Load of a room hoster process, reported to the launcher to place rooms on the least loaded hoster."""
+    clients: int
+    messages_per_second: float
+    loop_lag: float
+    """highest delay in seconds of the event loop running a scheduled callback, since the last report"""
+    memory: int
+    """resident memory in bytes, 0 if unknown"""
+    idle_rooms: typing.Tuple[typing.Any, ...]
+    """ids of running rooms without connections, which can be moved to another hoster"""
+
+
+def get_memory_usage() -> int:
+    """Resident memory of this process in bytes, or 0 if it can't be determined."""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return 0
+
+
+def run_server_process(name: str, ponyconfig: dict, static_server_data: typing.Union[dict, str],
                        cert_file: typing.Optional[str], cert_key_file: typing.Optional[str],
-                       host: str, rooms_to_run: multiprocessing.Queue, rooms_shutting_down: multiprocessing.Queue):
+                       host: str, rooms_to_run: multiprocessing.Queue, rooms_shutting_down: multiprocessing.Queue,
+                       room_commands: typing.Optional[multiprocessing.Queue] = None,
+                       command_poll_interval: float = 5,
+                       load_reports: typing.Optional[multiprocessing.Queue] = None,
+                       rooms_to_release: typing.Optional[multiprocessing.Queue] = None,
+                       load_report_interval: int = 5):
     Utils.init_logging(name)
     try:
         import resource
@@ -235,18 +301,33 @@ def run_server_process(name: str, ponyconfig: dict, static_server_data: dict,
     if "worlds" in sys.modules:
         raise Exception("Worlds system should not be loaded in the custom server.")
 
+    if isinstance(static_server_data, str):
+        static_server_data = load_static_server_data(static_server_data)
+
     import gc
     ssl_context = load_server_cert(cert_file, cert_key_file) if cert_file else None
     del cert_file, cert_key_file, ponyconfig
     gc.collect()  # free intermediate objects used during setup
 
     loop = asyncio.get_event_loop()
+    room_contexts: typing.Dict[typing.Any, WebHostContext] = {}
+    released_rooms: typing.Set[typing.Any] = set()
 
     async def start_room(room_id):
+        try:
+            await host_room(room_id)
+        finally:
+            # only once the room lock is released, so that another hoster can take over a released room right away
+            rooms_shutting_down.put((room_id, room_id in released_rooms))
+            released_rooms.discard(room_id)
+
+    async def host_room(room_id):
         with Locker(f"RoomLocker {room_id}"):
             try:
                 logger = set_up_logging(room_id)
                 ctx = WebHostContext(static_server_data, logger)
+                ctx.command_poll_interval = command_poll_interval
+                room_contexts[room_id] = ctx
                 ctx.load(room_id)
                 ctx.init_save()
                 try:
@@ -276,10 +357,15 @@ def run_server_process(name: str, ponyconfig: dict, static_server_data: dict,
                 else:
                     ctx.logger.exception("Could not determine port. Likely hosting failure.")
                 with db_session:
-                    ctx.auto_shutdown = Room.get(id=room_id).timeout
+                    room = Room.get(id=room_id)
+                    ctx.auto_shutdown = room.timeout
+                    # a room moved here from another hoster only gets what was left of its inactivity timeout there
+                    now = datetime.datetime.utcnow()
+                    ctx.idle_since = min(now, max(room.last_activity, now - datetime.timedelta(seconds=room.timeout)))
+                first_timeout = ctx.auto_shutdown - (now - ctx.idle_since).total_seconds()
                 if ctx.saving:
                     setattr(asyncio.current_task(), "save", lambda: ctx._save(True))
-                ctx.shutdown_task = asyncio.create_task(auto_shutdown(ctx, []))
+                ctx.shutdown_task = asyncio.create_task(auto_shutdown(ctx, [], first_timeout))
                 await ctx.shutdown_task
 
             except (KeyboardInterrupt, SystemExit):
@@ -300,16 +386,60 @@ def run_server_process(name: str, ponyconfig: dict, static_server_data: dict,
                 try:
                     ctx.save_dirty = False  # make sure the saving thread does not write to DB after final wakeup
                     ctx.exit_event.set()  # make sure the saving thread stops at some point
+                    ctx.commands_ready.set()  # and the command thread right away
+                    if room_contexts.get(room_id) is ctx:
+                        del room_contexts[room_id]
                     # NOTE: async saving should probably be an async task and could be merged with shutdown_task
-                    with (db_session):
-                        # ensure the Room does not spin up again on its own, minute of safety buffer
-                        room = Room.get(id=room_id)
-                        room.last_activity = datetime.datetime.utcnow() - \
-                                             datetime.timedelta(minutes=1, seconds=room.timeout)
+                    if room_id in released_rooms:
+                        with db_session:
+                            # instead of the time of the last save, so that the room restarts on another hoster
+                            # with the rest of its inactivity timeout
+                            Room.get(id=room_id).last_activity = ctx.get_idle_since()
+                    else:
+                        with (db_session):
+                            # ensure the Room does not spin up again on its own, minute of safety buffer
+                            room = Room.get(id=room_id)
+                            room.last_activity = datetime.datetime.utcnow() - \
+                                                 datetime.timedelta(minutes=1, seconds=room.timeout)
                     logging.info(f"Shutting down room {room_id} on {name}.")
                 finally:
                     await asyncio.sleep(5)
-                    rooms_shutting_down.put(room_id)
+
+    def release_room(room_id):
+        # shut down a room that is still idle, the launcher restarts it from its save on another hoster
+        ctx = room_contexts.get(room_id)
+        if ctx and ctx.shutdown_task and not ctx.endpoints and not ctx.exit_event.is_set():
+            released_rooms.add(room_id)
+            ctx.logger.info("Moving room to another hoster.")
+            ctx.server.ws_server.close()
+            ctx.exit_event.set()
+
+    async def report_load():
+        received_messages: typing.Dict[typing.Any, int] = {}
+        last_report = time.monotonic()
+        while 1:
+            loop_lag = 0.
+            for _ in range(load_report_interval):
+                scheduled = loop.time() + 1
+                await asyncio.sleep(1)
+                loop_lag = max(loop_lag, loop.time() - scheduled)
+            now = time.monotonic()
+            messages = sum(ctx.received_messages - received_messages.get(room_id, 0)
+                           for room_id, ctx in room_contexts.items())
+            received_messages = {room_id: ctx.received_messages for room_id, ctx in room_contexts.items()}
+            load_reports.put(HosterLoad(
+                clients=sum(len(ctx.endpoints) for ctx in room_contexts.values()),
+                messages_per_second=messages / (now - last_report),
+                loop_lag=loop_lag,
+                memory=get_memory_usage(),
+                idle_rooms=tuple(room_id for room_id, ctx in room_contexts.items()
+                                 if ctx.shutdown_task and not ctx.endpoints)))
+            last_report = now
+
+    def receive_releases():
+        while 1:
+            room_id = rooms_to_release.get(block=True, timeout=None)
+            loop.call_soon_threadsafe(release_room, room_id)
 
     class Starter(threading.Thread):
         _tasks: typing.List[asyncio.Future]
@@ -330,9 +460,23 @@ def run_server_process(name: str, ponyconfig: dict, static_server_data: dict,
                 task.add_done_callback(self._done)
                 logging.info(f"Starting room {next_room} on {name}.")
 
+    def deliver_commands():
+        # wake up the command thread of rooms that got commands queued, instead of waiting for them to poll
+        while 1:
+            room_id = room_commands.get(block=True, timeout=None)
+            ctx = room_contexts.get(room_id)
+            if ctx:
+                ctx.commands_ready.set()
+
     starter = Starter()
     starter.daemon = True
     starter.start()
+    if room_commands:
+        threading.Thread(target=deliver_commands, name="CommandDelivery", daemon=True).start()
+    if rooms_to_release:
+        threading.Thread(target=receive_releases, name="RoomReleases", daemon=True).start()
+    if load_reports:
+        loop.create_task(report_load())
     try:
         loop.run_forever()
     finally:
@@ -15,7 +15,7 @@ from BaseClasses import get_seed, seeddigits
 from Generate import PlandoOptions, handle_name
 from Main import main as ERmain
 from Utils import __version__
-from WebHostLib import app
+from WebHostLib import app, notify
 from settings import ServerOptions, GeneratorOptions
 from worlds.alttp.EntranceRandomizer import parse_arguments
 from .check import get_yaml_data, roll_options
@@ -89,6 +89,7 @@ def start_generation(options: Dict[str, Union[dict, str]], meta: Dict[str, Any])
             state=STATE_QUEUED,
             owner=session["_id"])
         commit()
+        notify.send(app.config["LAUNCHER_NOTIFY_PORT"], notify.GENERATION)
 
         return redirect(url_for("wait_seed", seed=gen.id))
     else:
@@ -7,7 +7,7 @@ from flask import request, redirect, url_for, render_template, Response, session
 from pony.orm import count, commit, db_session
 
 from worlds.AutoWorld import AutoWorldRegister
-from . import app, cache
+from . import app, cache, notify
 from .models import Seed, Room, Command, UUID, uuid4
 
 
@@ -143,6 +143,7 @@ def host_room(room: UUID):
             if cmd:
                 Command(room=room, commandtext=cmd)
                 commit()
+                notify.send(app.config["LAUNCHER_NOTIFY_PORT"], notify.COMMAND, room.id)
         return redirect(url_for("host_room", room=room.id))
 
     now = datetime.datetime.utcnow()
@@ -150,6 +151,7 @@ def host_room(room: UUID):
     should_refresh = not room.last_port and now - room.creation_time < datetime.timedelta(seconds=3)
     with db_session:
         room.last_activity = now  # will trigger a spinup, if it's not already running
+    notify.send(app.config["LAUNCHER_NOTIFY_PORT"], notify.ROOM_ACTIVITY, room.id)
 
     def get_log(max_size: int = 1024000) -> str:
         try:
@@ -0,0 +1,92 @@
+"""
+Notifications from the website to the process running autohost and autogen, over a local UDP port, so that they
+don't have to poll the database to notice new rooms, generations and commands right away.
+Notifications are best effort, the database is still polled as a fallback.
+"""
+from __future__ import annotations
+
+import logging
+import queue
+import socket
+import threading
+import typing
+from uuid import UUID
+
+ROOM_ACTIVITY = b"r"
+"""a room had activity and should be running, followed by the room id"""
+GENERATION = b"g"
+"""a generation was queued"""
+COMMAND = b"c"
+"""a command was queued for a running room, followed by the room id"""
+
+
+def send(port: int, kind: bytes, uuid: typing.Optional[UUID] = None) -> None:
+    """Sends a notification to the launcher listening on port, if notifications are enabled."""
+    if not port:
+        return
+    try:
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+            sock.sendto(kind + (uuid.bytes if uuid else b""), ("127.0.0.1", port))
+    except OSError as e:
+        logging.debug(f"Could not notify launcher: {e}")
+
+
+class Listener(threading.Thread):
+    """Receives notifications and puts them into the queue of the thread handling them, as (kind, id or None)."""
+    room_notifications: queue.SimpleQueue[typing.Tuple[bytes, typing.Optional[UUID]]]
+    """ROOM_ACTIVITY and COMMAND, handled by autohost"""
+    generation_notifications: queue.SimpleQueue[typing.Tuple[bytes, typing.Optional[UUID]]]
+    """GENERATION, handled by autogen"""
+
+    def __init__(self, sock: socket.socket):
+        super().__init__(name="AP_Notifications", daemon=True)
+        self.sock = sock
+        self.room_notifications = queue.SimpleQueue()
+        self.generation_notifications = queue.SimpleQueue()
+
+    def run(self) -> None:
+        while True:
+            data = self.sock.recv(64)
+            kind, uuid = data[:1], data[1:]
+            if kind in (ROOM_ACTIVITY, COMMAND) and len(uuid) == 16:
+                self.room_notifications.put((kind, UUID(bytes=uuid)))
+            elif kind == GENERATION:
+                self.generation_notifications.put((kind, None))
+
+
+_listener: typing.Optional[Listener] = None
+_listener_lock = threading.Lock()
+
+
+def get_listener(port: int) -> typing.Optional[Listener]:
+    """Returns the listener of this process, starting it on first use. None if notifications are disabled or the port
+    could not be bound, in which case the database has to be polled like before."""
+    global _listener
+    if not port:
+        return None
+    with _listener_lock:
+        if _listener is None:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            try:
+                sock.bind(("127.0.0.1", port))
+            except OSError as e:
+                sock.close()
+                logging.warning(f"Could not listen for notifications on port {port}, polling the database instead: {e}")
+                return None
+            _listener = Listener(sock)
+            _listener.start()
+        return _listener
+
+
+def wait(notifications: queue.SimpleQueue[typing.Tuple[bytes, typing.Optional[UUID]]],
+         timeout: float) -> typing.List[typing.Tuple[bytes, typing.Optional[UUID]]]:
+    """Waits up to timeout seconds for notifications, and returns all that arrived."""
+    try:
+        received = [notifications.get(timeout=timeout)]
+    except queue.Empty:
+        return []
+    while True:
+        try:
+            received.append(notifications.get_nowait())
+        except queue.Empty:
+            return received
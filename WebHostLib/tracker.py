@@ -1,5 +1,8 @@
 import datetime
 import collections
+import threading
+import weakref
+import zlib
 from dataclasses import dataclass
 from typing import Any, Callable, Dict, List, Optional, Set, Tuple, NamedTuple, Counter
 from uuid import UUID
@@ -24,6 +27,10 @@ _player_trackers: Dict[str, Callable] = {}
 TeamPlayer = Tuple[int, int]
 ItemMetadata = Tuple[int, int, int]
 
+# Objects loaded from a pickle take about 3 to 6 times the size of the pickle in memory, as measured on data packages
+# and multidata. Memory use of cached tracker data is estimated as the size of its pickles times this.
+PICKLE_MEMORY_FACTOR = 4
+
 
 def _cache_results(func: Callable) -> Callable:
     """Stores the results of any computationally expensive methods after the initial call in TrackerData.
@@ -41,12 +48,128 @@ def _cache_results(func: Callable) -> Callable:
     return method_wrapper
 
 
+class _GamePackageLookups:
+    """Lookup tables of a game data package, shared by all cached seeds that use it."""
+    __slots__ = ("item_name_to_id", "location_name_to_id", "item_id_to_name", "location_id_to_name", "size",
+                 "__weakref__")
+
+    def __init__(self, data: bytes):
+        game_package = restricted_loads(data)
+        self.item_name_to_id: Dict[str, int] = game_package["item_name_to_id"]
+        self.location_name_to_id: Dict[str, int] = game_package["location_name_to_id"]
+        self.item_id_to_name: Dict[int, str] = KeyedDefaultDict(lambda code: f"Unknown Item (ID: {code})", {
+            id: name for name, id in self.item_name_to_id.items()})
+        self.location_id_to_name: Dict[int, str] = KeyedDefaultDict(lambda code: f"Unknown Location (ID: {code})", {
+            id: name for name, id in self.location_name_to_id.items()})
+        self.size = len(data) * PICKLE_MEMORY_FACTOR
+
+
+class _SeedTrackerData:
+    """Data of a seed used by TrackerData, which doesn't change while its rooms are played, and the latest multisave of
+    each of its rooms."""
+    seed_id: UUID
+    multidata: Dict[str, Any]
+    multisaves: Dict[UUID, Tuple[datetime.datetime, Dict[str, Any], int]]
+    """room id -> last activity of the room when its multisave was loaded, multisave, its estimated memory use"""
+    size: int
+    """estimated memory use, from the size of the pickles everything was loaded from, see PICKLE_MEMORY_FACTOR"""
+
+    def __init__(self, room: Room):
+        self.seed_id = room.seed.id
+        multidata = room.seed.multidata
+        self.multisaves = {}
+        if multidata[0] >= 4:
+            self.multidata = Context.decompress(multidata)
+            # sections get decompressed on use, from the stored data that is kept loaded as well
+            self.size = len(multidata) + self.multidata.decompressed_size() * PICKLE_MEMORY_FACTOR
+        else:
+            # format 3 and below is a single pickle, decompressed here to get its size from the same decompression
+            pickled = zlib.decompress(multidata[1:])
+            self.multidata = restricted_loads(pickled)
+            self.size = len(pickled) * PICKLE_MEMORY_FACTOR
+
+        self.item_name_to_id: Dict[str, Dict[str, int]] = {}
+        self.location_name_to_id: Dict[str, Dict[str, int]] = {}
+        self.item_id_to_name: Dict[str, Dict[int, str]] = KeyedDefaultDict(lambda game_name: {
+            game_name: KeyedDefaultDict(lambda code: f"Unknown Game {game_name} - Item (ID: {code})")
+        })
+        self.location_id_to_name: Dict[str, Dict[int, str]] = KeyedDefaultDict(lambda game_name: {
+            game_name: KeyedDefaultDict(lambda code: f"Unknown Game {game_name} - Location (ID: {code})")
+        })
+        self._game_packages: List[_GamePackageLookups] = []  # keeps them in _game_package_cache
+        for game, game_package in self.multidata["datapackage"].items():
+            checksum = game_package["checksum"]
+            lookups = _game_package_cache.get(checksum, None)
+            if lookups is None:
+                lookups = _GamePackageLookups(GameDataPackage.get(checksum=checksum).data)
+                _game_package_cache[checksum] = lookups
+            self._game_packages.append(lookups)
+            self.size += lookups.size
+            self.item_id_to_name[game] = lookups.item_id_to_name
+            self.location_id_to_name[game] = lookups.location_id_to_name
+            self.item_name_to_id[game] = lookups.item_name_to_id
+            self.location_name_to_id[game] = lookups.location_name_to_id
+
+    def get_multisave(self, room: Room) -> Dict[str, Any]:
+        """Returns the multisave of room, which only gets loaded again if the room had activity since the last time."""
+        global _seed_tracker_data_size
+        last_activity, multisave, _ = self.multisaves.get(room.id, (None, {}, 0))
+        if last_activity != room.last_activity:
+            data = room.multisave
+            multisave = restricted_loads(data) if data else {}
+            size = len(data) * PICKLE_MEMORY_FACTOR if data else 0
+            with _seed_tracker_data_lock:
+                _, _, old_size = self.multisaves.get(room.id, (None, {}, 0))
+                self.multisaves[room.id] = room.last_activity, multisave, size
+                self.size += size - old_size
+                if _seed_tracker_data.get(self.seed_id, None) is self:
+                    _seed_tracker_data_size += size - old_size
+                    _evict_seed_tracker_data()
+        return multisave
+
+
+_seed_tracker_data: "collections.OrderedDict[UUID, _SeedTrackerData]" = collections.OrderedDict()
+"""seed id -> data for TrackerData, least recently used first"""
+_seed_tracker_data_size = 0
+_seed_tracker_data_lock = threading.Lock()
+_game_package_cache: "weakref.WeakValueDictionary[str, _GamePackageLookups]" = weakref.WeakValueDictionary()
+"""checksum -> lookup tables, for as long as any cached seed uses them"""
+
+
+def _evict_seed_tracker_data() -> None:
+    """Drops the least recently used seeds until their estimated memory use fits into TRACKER_DATA_CACHE_SIZE.
+    Needs the lock."""
+    global _seed_tracker_data_size
+    while _seed_tracker_data and _seed_tracker_data_size > app.config["TRACKER_DATA_CACHE_SIZE"]:
+        _, seed_data = _seed_tracker_data.popitem(last=False)
+        _seed_tracker_data_size -= seed_data.size
+
+
+def _get_seed_tracker_data(room: Room) -> _SeedTrackerData:
+    """Returns the data of the seed of room, loading it if it isn't cached."""
+    global _seed_tracker_data_size
+    seed_id = room.seed.id
+    with _seed_tracker_data_lock:
+        seed_data = _seed_tracker_data.get(seed_id, None)
+        if seed_data is not None:
+            _seed_tracker_data.move_to_end(seed_id)
+            return seed_data
+    seed_data = _SeedTrackerData(room)
+    with _seed_tracker_data_lock:
+        if seed_id not in _seed_tracker_data:  # could have been loaded by another request in the meantime
+            _seed_tracker_data[seed_id] = seed_data
+            _seed_tracker_data_size += seed_data.size
+            _evict_seed_tracker_data()
+    return seed_data
+
+
 @dataclass
 class TrackerData:
     """A helper dataclass that is instantiated each time an HTTP request comes in for tracker data.
 
     Provides helper methods to lazily load necessary data that each tracker require and caches any results so any
     subsequent helper method calls do not need to recompute results during the lifetime of this instance.
+    Data loaded from the seed and multisave is kept between instances, see _get_seed_tracker_data.
     """
     room: Room
     _multidata: Dict[str, Any]
@@ -56,30 +179,16 @@ class TrackerData:
     def __init__(self, room: Room):
         """Initialize a new RoomMultidata object for the current room."""
         self.room = room
-        self._multidata = Context.decompress(room.seed.multidata)
-        self._multisave = restricted_loads(room.multisave) if room.multisave else {}
+        seed_data = _get_seed_tracker_data(room)
+        self._multidata = seed_data.multidata
+        self._multisave = seed_data.get_multisave(room)
         self._tracker_cache = {}
 
-        self.item_name_to_id: Dict[str, Dict[str, int]] = {}
-        self.location_name_to_id: Dict[str, Dict[str, int]] = {}
-
-        # Generate inverse lookup tables from data package, useful for trackers.
-        self.item_id_to_name: Dict[str, Dict[int, str]] = KeyedDefaultDict(lambda game_name: {
-            game_name: KeyedDefaultDict(lambda code: f"Unknown Game {game_name} - Item (ID: {code})")
-        })
-        self.location_id_to_name: Dict[str, Dict[int, str]] = KeyedDefaultDict(lambda game_name: {
-            game_name: KeyedDefaultDict(lambda code: f"Unknown Game {game_name} - Location (ID: {code})")
-        })
-        for game, game_package in self._multidata["datapackage"].items():
-            game_package = restricted_loads(GameDataPackage.get(checksum=game_package["checksum"]).data)
-            self.item_id_to_name[game] = KeyedDefaultDict(lambda code: f"Unknown Item (ID: {code})", {
-                id: name for name, id in game_package["item_name_to_id"].items()})
-            self.location_id_to_name[game] = KeyedDefaultDict(lambda code: f"Unknown Location (ID: {code})", {
-                id: name for name, id in game_package["location_name_to_id"].items()})
-
-            # Normal lookup tables as well.
-            self.item_name_to_id[game] = game_package["item_name_to_id"]
-            self.location_name_to_id[game] = game_package["item_name_to_id"]
+        self.item_name_to_id: Dict[str, Dict[str, int]] = seed_data.item_name_to_id
+        self.location_name_to_id: Dict[str, Dict[str, int]] = seed_data.location_name_to_id
+        # Inverse lookup tables from data package, useful for trackers.
+        self.item_id_to_name: Dict[str, Dict[int, str]] = seed_data.item_id_to_name
+        self.location_id_to_name: Dict[str, Dict[int, str]] = seed_data.location_id_to_name
 
     def get_seed_name(self) -> str:
         """Retrieves the seed name."""
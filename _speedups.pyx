@@ -11,7 +11,8 @@ This is deliberately .pyx because using a non-compiled "pure python" may be slow
 import cython
 import warnings
 from cpython cimport PyObject
-from typing import Any, Dict, Iterable, Iterator, Generator, Sequence, Tuple, TypeVar, Union, Set, List, TYPE_CHECKING
+from typing import (Any, Dict, Iterable, Iterator, Generator, Optional, Sequence, Tuple, TypeVar, Union, Set, List,
+                    TYPE_CHECKING)
 from cymem.cymem cimport Pool
 from libc.stdint cimport int64_t, uint32_t
 from collections import defaultdict
@@ -297,6 +298,77 @@ cdef class LocationStore:
                        entry in self.entries[start:start+count] if
                        entry.location not in checked])
 
+    cdef LocationEntry* _find(self, size_t start, size_t count, ap_id_t loc):
+        # binary search in the sorted locations of one sender
+        cdef size_t l = start
+        cdef size_t r = start + count
+        cdef size_t m
+        while l < r:
+            m = (l + r) // 2
+            if self.entries[m].location < loc:
+                l = m + 1
+            else:
+                r = m
+        if l < start + count and self.entries[l].location == loc:
+            return self.entries + l
+        return NULL
+
+    def get_new_checks(self, state: State, team: int, slot: int,
+                       locations: Optional[Iterable[int]] = None) -> List[Tuple[int, int, int, int]]:
+        """
+        Returns (location, item, receiver, flags) in location order for locations of slot that are not in state yet.
+        Only looks at the given locations, ignoring unknown ones, or at all locations of slot if None.
+        """
+        cdef size_t sender = slot  # NOTE: this may raise TypeError or OverflowError
+        if sender < 1 or sender >= self.sender_index_size:
+            raise KeyError(slot)
+        cdef size_t start = self.sender_index[sender].start
+        cdef size_t count = self.sender_index[sender].count
+        cdef set checked = state[team, slot]
+        cdef LocationEntry* entry
+        cdef size_t i
+        new_checks: List[Tuple[int, int, int, int]] = []
+        if locations is None:
+            for i in range(start, start + count):
+                entry = self.entries + i
+                if entry.location not in checked:
+                    new_checks.append((entry.location, entry.item, entry.receiver, entry.flags))
+            return new_checks
+
+        for location in sorted({location for location in locations
+                                if type(location) is int and -0x8000000000000000 <= location < 0x8000000000000000}):
+            if location not in checked:
+                entry = self._find(start, count, location)
+                if entry:
+                    new_checks.append((entry.location, entry.item, entry.receiver, entry.flags))
+        return new_checks
+
+    def get_new_checks_for_receiver(self, state: State, team: int,
+                                    receiver: int) -> Dict[int, List[Tuple[int, int, int, int]]]:
+        """
+        Returns sender -> get_new_checks of that sender, limited to items for receiver,
+        for every sender that has items for receiver.
+        """
+        cdef ap_player_t receiver_id = receiver
+        cdef ap_player_t sender = 0
+        cdef LocationEntry* entry
+        cdef size_t i
+        cdef set checked = None
+        cdef list sender_checks = None
+        new_checks: Dict[int, List[Tuple[int, int, int, int]]] = {}
+        for i in range(self.entry_count):
+            entry = self.entries + i
+            if entry.receiver != receiver_id:
+                continue
+            if entry.sender != sender:
+                # entries are sorted by sender, so each sender starts a new list
+                sender = entry.sender
+                checked = state[team, sender]
+                sender_checks = new_checks[sender] = []
+            if entry.location not in checked:
+                sender_checks.append((entry.location, entry.item, entry.receiver, entry.flags))
+        return new_checks
+
 
 @cython.auto_pickle(False)
 @cython.internal  # unsafe. disable direct import
@@ -20,7 +20,7 @@ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 SOFTWARE.
 ]]
 
-local SCRIPT_VERSION = 1
+local SCRIPT_VERSION = 2
 
 -- Set to log incoming requests
 -- Will cause lag due to large console output
@@ -97,6 +97,34 @@ Response:
 
 ---
 
+#### Ex. 5
+
+Request:
+
+```json
+[
+    {"type": "GROUP"},
+    {"type": "GUARD", "address": 100, "expected_data": "aGVsbG8=", "domain": "System Bus"},
+    {"type": "READ", "address": 500, "size": 4, "domain": "ROM"},
+    {"type": "GROUP"},
+    {"type": "READ", "address": 600, "size": 4, "domain": "ROM"}
+]
+```
+
+Response:
+
+```json
+[
+    {"type": "GROUP_RESPONSE"},
+    {"type": "GUARD_RESPONSE", "address": 100, "value": false},
+    {"type": "GUARD_RESPONSE", "address": 100, "value": false},
+    {"type": "GROUP_RESPONSE"},
+    {"type": "READ_RESPONSE", "value": "dGVzdA=="}
+]
+```
+
+---
+
 ### Supported Request Types
 
 - `PING`  
@@ -135,6 +163,13 @@ Response:
     - `domain` (`string`): The name of the memory domain the address
     corresponds to
 
+- `GROUP`  
+    Starts a new group of requests. A failed `GUARD` only skips the remaining
+    requests of its own group, so that unrelated lists of requests can be sent
+    in one message.
+
+    Expected Response Type: `GROUP_RESPONSE`
+
 - `LOCK`  
     Halts emulation and blocks on incoming requests until an `UNLOCK` request
     is received or the client times out. All requests processed while locked
@@ -170,6 +205,33 @@ Response:
     - `domain` (`string`): The name of the memory domain the address
     corresponds to
 
+- `WATCH`  
+    Starts watching a range of memory, to be included in `WATCHED_RESPONSE`
+    whenever it changes. Watches are dropped when the client disconnects.
+
+    Expected Response Type: `WATCH_RESPONSE`
+
+    Additional Fields:
+    - `id` (`int`): A number chosen by the client to refer to this watch
+    - `address` (`int`): The address of the memory to watch
+    - `size` (`int`): The number of bytes to watch
+    - `domain` (`string`): The name of the memory domain the address
+    corresponds to
+
+- `UNWATCH`  
+    Stops watching a range of memory.
+
+    Expected Response Type: `UNWATCH_RESPONSE`
+
+    Additional Fields:
+    - `id` (`int`): The id the range was watched with
+
+- `WATCHED`  
+    Returns the watched ranges of memory that changed since the last
+    `WATCHED` request, or were watched since.
+
+    Expected Response Type: `WATCHED_RESPONSE`
+
 - `DISPLAY_MESSAGE`  
     Adds a message to the message queue which will be displayed using
     `gui.addmessage` according to the message interval.
@@ -216,6 +278,9 @@ Response:
     Additional Fields:
     - `value` (`string`): The returned hash
 
+- `GROUP_RESPONSE`  
+    Acknowledges `GROUP`.
+
 - `GUARD_RESPONSE`  
     The result of an attempted `GUARD` request.
 
@@ -240,6 +305,19 @@ Response:
 - `WRITE_RESPONSE`  
     Acknowledges `WRITE`.
 
+- `WATCH_RESPONSE`  
+    Acknowledges `WATCH`.
+
+- `UNWATCH_RESPONSE`  
+    Acknowledges `UNWATCH`.
+
+- `WATCHED_RESPONSE`  
+    Contains the watched ranges of memory that changed.
+
+    Additional Fields:
+    - `value` (`[[int, string]]`): A list of the id of each changed range and
+    a base64 string representing its data
+
 - `DISPLAY_MESSAGE_RESPONSE`  
     Acknowledges `DISPLAY_MESSAGE`.
 
@@ -297,6 +375,9 @@ local locked = false
 
 local rom_hash = nil
 
+-- id -> {address, size, domain, data}, data being the base64 string last sent
+local watches = {}
+
 function queue_push (self, value)
     self[self.right] = value
     self.right = self.right + 1
@@ -396,6 +477,14 @@ request_handlers = {
         return res
     end,
 
+    ["GROUP"] = function (req)
+        local res = {}
+
+        res["type"] = "GROUP_RESPONSE"
+
+        return res
+    end,
+
     ["LOCK"] = function (req)
         local res = {}
 
@@ -432,6 +521,40 @@ request_handlers = {
         return res
     end,
 
+    ["WATCH"] = function (req)
+        local res = {}
+
+        res["type"] = "WATCH_RESPONSE"
+        watches[req["id"]] = {address = req["address"], size = req["size"], domain = req["domain"], data = nil}
+
+        return res
+    end,
+
+    ["UNWATCH"] = function (req)
+        local res = {}
+
+        res["type"] = "UNWATCH_RESPONSE"
+        watches[req["id"]] = nil
+
+        return res
+    end,
+
+    ["WATCHED"] = function (req)
+        local res = {}
+
+        res["type"] = "WATCHED_RESPONSE"
+        res["value"] = {}
+        for id, watch in pairs(watches) do
+            local data = base64.encode(memory.read_bytes_as_array(watch.address, watch.size, watch.domain))
+            if data ~= watch.data then
+                watch.data = data
+                table.insert(res["value"], {id, data})
+            end
+        end
+
+        return res
+    end,
+
     ["DISPLAY_MESSAGE"] = function (req)
         local res = {}
 
@@ -504,6 +627,11 @@ function send_receive ()
         local data = json.decode(message)
         local failed_guard_response = nil
         for i, req in ipairs(data) do
+            -- A failed GUARD only skips the rest of its group
+            if req["type"] == "GROUP" then
+                failed_guard_response = nil
+            end
+
             if failed_guard_response ~= nil then
                 res[i] = failed_guard_response
             else
@@ -584,6 +712,7 @@ function main ()
                     print("Client connected")
                     current_state = STATE_CONNECTED
                     client_socket = client
+                    watches = {}
                     server:close()
                     server = nil
                     client_socket:settimeout(0)
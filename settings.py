@@ -586,6 +586,22 @@ class ServerOptions(Group):
         OFF = 0
         ON = 1
 
+    class SaveJournal(IntEnum):
+        """
+        Append changes to a journal next to the save file, instead of rewriting the whole save file every time.
+        The save file gets rewritten once the journal grows larger than it.
+        """
+        OFF = 0
+        ON = 1
+
+    class Metrics(IntEnum):
+        """Measure time spent per client command, broadcast sizes, event loop lag and saving, shown by /metrics"""
+        OFF = 0
+        ON = 1
+
+    class MetricsPort(int):
+        """Serve the metrics as Prometheus text on this port of localhost, 0 to not serve them"""
+
     host: Optional[str] = None
     port: int = 38281
     password: Optional[str] = None
@@ -603,6 +619,9 @@ class ServerOptions(Group):
     auto_shutdown: AutoShutdown = AutoShutdown(0)
     compatibility: Compatibility = Compatibility(2)
     log_network: LogNetwork = LogNetwork(0)
+    save_journal: SaveJournal = SaveJournal(0)
+    metrics: Metrics = Metrics(0)
+    metrics_port: MetricsPort = MetricsPort(0)
 
 
 class GeneratorOptions(Group):
@@ -662,6 +681,14 @@ class GeneratorOptions(Group):
         start_inventory -> Move remaining items to start_inventory, generate additional filler items to fill locations.
         """
 
+    class StageWorkers(int):
+        """
+        Number of threads to run generate_early, create_regions, create_items, set_rules and generate_basic on
+        for worlds that declare themselves safe for it. 0 or 1 runs every world one after another.
+        Results are the same for any number of workers.
+        No world declares itself safe for this yet, so until one does this setting has no effect.
+        """
+
     enemizer_path: EnemizerPath = EnemizerPath("EnemizerCLI/EnemizerCLI.Core")  # + ".exe" is implied on Windows
     player_files_path: PlayerFilesPath = PlayerFilesPath("Players")
     players: Players = Players(0)
@@ -671,6 +698,7 @@ class GeneratorOptions(Group):
     race: Race = Race(0)
     plando_options: PlandoOptions = PlandoOptions("bosses, connections, texts")
     panic_method: PanicMethod = PanicMethod("swap")
+    stage_workers: StageWorkers = StageWorkers(0)
 
 
 class SNIOptions(Group):
@@ -0,0 +1,104 @@
+def run_collection_state_benchmark():
+    import argparse
+    import gc
+    import logging
+    import typing
+
+    from time_it import TimeIt
+
+    from Utils import init_logging
+    from BaseClasses import MultiWorld, CollectionState
+    from worlds import AutoWorld
+    from worlds.AutoWorld import call_all
+
+    init_logging("Benchmark Runner")
+    logger = logging.getLogger("Benchmark")
+
+    class BenchmarkRunner:
+        gen_steps: typing.Tuple[str, ...] = (
+            "generate_early", "create_regions", "create_items", "set_rules", "generate_basic", "pre_fill")
+        games: typing.Tuple[str, ...] = (
+            "A Link to the Past", "Timespinner", "Hollow Knight", "Risk of Rain 2", "Subnautica")
+        players: int = 30
+        copy_iterations: int = 100
+
+        def create_multiworld(self) -> MultiWorld:
+            multiworld = MultiWorld(self.players)
+            multiworld.game = {player: self.games[(player - 1) % len(self.games)]
+                               for player in multiworld.player_ids}
+            multiworld.player_name = {player: f"Tester{player}" for player in multiworld.player_ids}
+            multiworld.set_seed(0)
+            multiworld.state = CollectionState(multiworld)
+            args = argparse.Namespace()
+            for player in multiworld.player_ids:
+                world_type = AutoWorld.AutoWorldRegister.world_types[multiworld.game[player]]
+                for name, option in world_type.options_dataclass.type_hints.items():
+                    updated_options = getattr(args, name, {})
+                    updated_options[player] = option.from_any(option.default)
+                    setattr(args, name, updated_options)
+            multiworld.set_options(args)
+            with TimeIt(f"{self.players} player multiworld generation steps", logger):
+                for step in self.gen_steps:
+                    call_all(multiworld, step)
+            return multiworld
+
+        @staticmethod
+        def baseline_copy(state: CollectionState) -> CollectionState:
+            """
+            CollectionState.copy as it was before: a new state that collects the precollected items again, with copies
+            of every container and every player marked as stale.
+            """
+            ret = CollectionState(state.multiworld)
+            for name in ("prog_items", "reachable_regions", "blocked_connections", "blocked_requirements",
+                         "blocked_locations"):
+                setattr(ret, name, {player: container.copy() for player, container in getattr(state, name).items()})
+            ret.events = state.events.copy()
+            ret.path = state.path.copy()
+            ret.locations_checked = state.locations_checked.copy()
+            for function in ret.additional_copy_functions:
+                ret = function(state, ret)
+            return ret
+
+        def copy_test(self, state: CollectionState, state_name: str,
+                      copy_function: typing.Callable[[CollectionState], CollectionState], copy_name: str) -> float:
+            with TimeIt(f"{self.copy_iterations} {copy_name} copies of {state_name}", logger) as t:
+                for _ in range(self.copy_iterations):
+                    copy_function(state)
+                gc.collect()
+            return t.dif
+
+        def sweeping_collect_test(self, state: CollectionState, state_name: str,
+                                  copy_function: typing.Callable[[CollectionState], CollectionState],
+                                  copy_name: str) -> float:
+            """Copy, then collect an item and sweep for events, which is what filling mostly does."""
+            items = [item for item in state.multiworld.itempool if item.advancement]
+            with TimeIt(f"{self.copy_iterations} {copy_name} copies of {state_name} with a sweeping collect",
+                        logger) as t:
+                for iteration in range(self.copy_iterations):
+                    new_state = copy_function(state)
+                    new_state.collect(items[iteration % len(items)])
+                gc.collect()
+            return t.dif
+
+        def main(self):
+            multiworld = self.create_multiworld()
+            all_state = multiworld.get_all_state(False)
+            for state, state_name in ((multiworld.state, "empty_state"), (all_state, "all_state")):
+                for player in multiworld.player_ids:
+                    state.update_reachable_regions(player)
+                baseline = self.copy_test(state, state_name, self.baseline_copy, "baseline")
+                current = self.copy_test(state, state_name, CollectionState.copy, "current")
+                logger.info(f"copies of {state_name} took {current / baseline:.2%} of baseline copies.")
+                baseline = self.sweeping_collect_test(state, state_name, self.baseline_copy, "baseline")
+                current = self.sweeping_collect_test(state, state_name, CollectionState.copy, "current")
+                logger.info(f"copies of {state_name} with a sweeping collect took {current / baseline:.2%} "
+                            f"of baseline copies.")
+
+    runner = BenchmarkRunner()
+    runner.main()
+
+
+if __name__ == "__main__":
+    from path_change import change_home
+    change_home()
+    run_collection_state_benchmark()
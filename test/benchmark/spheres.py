@@ -0,0 +1,66 @@
+def run_spheres_benchmark():
+    import argparse
+    import logging
+    import typing
+
+    from time_it import TimeIt
+
+    from Utils import init_logging
+    from BaseClasses import MultiWorld, CollectionState
+    from worlds import AutoWorld
+    from worlds.AutoWorld import call_all
+    from Fill import balance_multiworld_progression, distribute_items_restrictive
+
+    init_logging("Benchmark Runner")
+    logger = logging.getLogger("Benchmark")
+
+    class BenchmarkRunner:
+        gen_steps: typing.Tuple[str, ...] = (
+            "generate_early", "create_regions", "create_items", "set_rules", "generate_basic", "pre_fill")
+        games: typing.Tuple[str, ...] = (
+            "A Link to the Past", "Timespinner", "Hollow Knight", "Risk of Rain 2", "Subnautica")
+        players: int = 15
+
+        def create_multiworld(self) -> MultiWorld:
+            multiworld = MultiWorld(self.players)
+            multiworld.game = {player: self.games[(player - 1) % len(self.games)]
+                               for player in multiworld.player_ids}
+            multiworld.player_name = {player: f"Tester{player}" for player in multiworld.player_ids}
+            multiworld.set_seed(0)
+            multiworld.state = CollectionState(multiworld)
+            args = argparse.Namespace()
+            for player in multiworld.player_ids:
+                world_type = AutoWorld.AutoWorldRegister.world_types[multiworld.game[player]]
+                for name, option in world_type.options_dataclass.type_hints.items():
+                    updated_options = getattr(args, name, {})
+                    updated_options[player] = option.from_any(option.default)
+                    setattr(args, name, updated_options)
+            multiworld.set_options(args)
+            with TimeIt(f"{self.players} player multiworld generation steps", logger):
+                for step in self.gen_steps:
+                    call_all(multiworld, step)
+            with TimeIt(f"{self.players} player multiworld fill", logger):
+                distribute_items_restrictive(multiworld)
+                call_all(multiworld, "post_fill")
+            return multiworld
+
+        def main(self):
+            multiworld = self.create_multiworld()
+            with TimeIt("get_spheres", logger):
+                spheres = sum(1 for _ in multiworld.get_spheres())
+            logger.info(f"{spheres} spheres.")
+            with TimeIt("can_beat_game", logger):
+                multiworld.can_beat_game()
+            with TimeIt("fulfills_accessibility", logger):
+                multiworld.fulfills_accessibility()
+            with TimeIt("balance_multiworld_progression", logger):
+                balance_multiworld_progression(multiworld)
+
+    runner = BenchmarkRunner()
+    runner.main()
+
+
+if __name__ == "__main__":
+    from path_change import change_home
+    change_home()
+    run_spheres_benchmark()
@@ -1,5 +1,7 @@
+import unittest
 from argparse import Namespace
 from typing import List, Optional, Tuple, Type, Union
+from unittest import mock
 
 from BaseClasses import CollectionState, Item, ItemClassification, Location, MultiWorld, Region
 from worlds import network_data_package
@@ -112,3 +114,19 @@ def generate_items(count: int, player_id: int, advancement: bool = False, code:
 
     items = [Item(f"player{player_id}_{item_type}item{i}", classification, code, player_id) for i in range(count)]
     return items
+
+
+def force_incremental_reachability(test: unittest.TestCase, *unsupported: Type[World]) -> None:
+    """
+    Turns on World.incremental_reachability for every world for the duration of a test, and checks every update against
+    a full search through CollectionState.debug_reachability.
+
+    :param test: The test to patch the worlds for
+    :param unsupported: World types to leave on full searches
+    """
+    patches = [mock.patch.object(World, "incremental_reachability", True),
+               mock.patch.object(CollectionState, "debug_reachability", True)]
+    patches += [mock.patch.object(world_type, "incremental_reachability", False) for world_type in unsupported]
+    for patch in patches:
+        patch.start()
+        test.addCleanup(patch.stop)
@@ -0,0 +1,232 @@
+import typing
+import unittest
+
+from BaseClasses import CollectionState, Item, ItemClassification, ItemCounter, Location, Region
+from worlds.AutoWorld import AutoWorldRegister
+from . import generate_test_multiworld, setup_solo_multiworld
+
+
+class TestCollectionStateCopy(unittest.TestCase):
+    def setUp(self) -> None:
+        self.multiworld = generate_test_multiworld(2)
+        for player in self.multiworld.player_ids:
+            menu = self.multiworld.get_region("Menu", player)
+            locked = Region("Locked", player, self.multiworld)
+            self.multiworld.regions.append(locked)
+            menu.connect(locked, rule=lambda state, player=player: state.has("Key", player))
+            event = Location(player, "Event", None, locked)
+            locked.locations.append(event)
+            event.place_locked_item(Item("Victory", ItemClassification.progression, None, player))
+
+    @staticmethod
+    def create_key(player: int) -> Item:
+        return Item("Key", ItemClassification.progression, None, player)
+
+    def test_copies_are_independent(self) -> None:
+        """Changes to a copy don't show up in the state it was copied from, and the other way around"""
+        state = CollectionState(self.multiworld)
+        self.assertFalse(state.can_reach_region("Locked", 1))
+        copied = state.copy()
+
+        copied.collect(self.create_key(1))
+        self.assertTrue(copied.can_reach_region("Locked", 1))
+        self.assertTrue(copied.has("Victory", 1))
+        self.assertFalse(state.has("Key", 1))
+        self.assertFalse(state.can_reach_region("Locked", 1))
+        self.assertFalse(state.events)
+
+        state.collect(self.create_key(2))
+        self.assertTrue(state.can_reach_region("Locked", 2))
+        self.assertFalse(copied.has("Key", 2))
+        self.assertFalse(copied.can_reach_region("Locked", 2))
+
+    def test_copy_of_copy(self) -> None:
+        """Copies keep what was collected before they were made, including through earlier copies"""
+        state = CollectionState(self.multiworld)
+        state.collect(self.create_key(1))
+        first = state.copy()
+        first.collect(self.create_key(2))
+        second = first.copy()
+        state.collect(self.create_key(2))
+        state.collect(self.create_key(2))
+
+        self.assertEqual(1, second.count("Key", 1))
+        self.assertEqual(1, second.count("Key", 2))
+        self.assertEqual(second.events, first.events)
+        self.assertIsNot(second.events, first.events)
+        self.assertTrue(second.can_reach_region("Locked", 2))
+        self.assertIn(self.multiworld.get_region("Locked", 2), second.path)
+        self.assertEqual(2, state.count("Key", 2))
+        self.assertEqual({1, 2}, set(second.prog_items))
+
+    def test_copy_keeps_reachability(self) -> None:
+        """Copies of an up to date state don't search for regions again, and keep the paths found so far"""
+        state = CollectionState(self.multiworld)
+        state.collect(self.create_key(1))
+        state.update_reachable_regions(1)
+        copied = state.copy()
+        self.assertFalse(copied.stale[1])
+        locked = self.multiworld.get_region("Locked", 1)
+        self.assertEqual(state.path[locked], copied.path[locked])
+        self.assertIsNot(state.path, copied.path)
+
+        copied.path[self.multiworld.get_region("Menu", 2)] = ("Menu", None)
+        self.assertNotIn(self.multiworld.get_region("Menu", 2), state.path)
+
+
+class TestItemSlots(unittest.TestCase):
+    def setUp(self) -> None:
+        self.multiworld = setup_solo_multiworld(AutoWorldRegister.world_types["Clique"], ())
+        self.world = self.multiworld.worlds[1]
+
+    def test_slots_follow_names(self) -> None:
+        """Slot counts and masks match the counts by name through collect and remove"""
+        state = CollectionState(self.multiworld)
+        button = self.world.create_item("Button Activation")
+        slot = self.world.item_name_to_slot["Button Activation"]
+        mask = self.world.get_item_slot_mask(["Button Activation", "Feeling of Satisfaction"])
+
+        self.assertFalse(state.has_slot(slot, 1))
+        self.assertFalse(state.has_any_slots(mask, 1))
+        state.collect(button, True)
+        state.collect(button, True)
+        self.assertEqual(2, state.count_slot(slot, 1))
+        self.assertTrue(state.has_slot(slot, 1, 2))
+        self.assertTrue(state.has_any_slots(mask, 1))
+        self.assertFalse(state.has_all_slots(mask, 1))
+        self.assertEqual(1, state.count_slots_unique(mask, 1))
+        self.assertEqual(1, state.count_group_unique("Everything", 1))
+
+        copied = state.copy()
+        copied.remove(button)
+        copied.remove(button)
+        self.assertEqual(0, copied.count_slot(slot, 1))
+        self.assertFalse(copied.has_any_slots(mask, 1))
+        self.assertEqual(0, copied.count_group_unique("Everything", 1))
+        self.assertEqual(2, state.count_slot(slot, 1))
+
+
+class TestItemCounter(unittest.TestCase):
+    def setUp(self) -> None:
+        self.counter = ItemCounter.with_slots({"A": 0, "B": 1})
+        self.counter["A"] = 2
+        self.counter.changed.clear()
+
+    def assertInSync(self, counts: typing.Dict[str, int]) -> None:
+        self.assertEqual([counts.get("A", 0), counts.get("B", 0)], list(self.counter.counts))
+        self.assertEqual(sum(1 << slot for slot, name in enumerate("AB") if counts.get(name, 0) > 0),
+                         self.counter.mask)
+        self.assertEqual(counts, {name: count for name, count in self.counter.items() if count})
+
+    def test_update(self) -> None:
+        """update keeps slots in sync and marks names as changed, from mappings, iterables and keywords"""
+        self.counter.update({"B": 2})
+        self.counter.update(["A", "C"])
+        self.counter.update(B=1)
+        self.assertInSync({"A": 3, "B": 3, "C": 1})
+        self.assertEqual({"A", "B", "C"}, self.counter.changed)
+
+    def test_update_empty(self) -> None:
+        """update of an empty counter keeps slots in sync"""
+        counter = ItemCounter.with_slots({"A": 0, "B": 1})
+        counter.update({"B": 1})
+        self.assertEqual([0, 1], list(counter.counts))
+        self.assertEqual(0b10, counter.mask)
+
+    def test_subtract(self) -> None:
+        """subtract keeps slots in sync and marks names as changed"""
+        self.counter.subtract({"A": 2})
+        self.counter.subtract(["B"])
+        self.assertInSync({"B": -1})
+        self.assertEqual({"A", "B"}, self.counter.changed)
+
+    def test_clear(self) -> None:
+        """clear resets every slot and marks every name as changed"""
+        self.counter["C"] = 1
+        self.counter.clear()
+        self.assertInSync({})
+        self.assertEqual({"A", "C"}, self.counter.changed)
+
+    def test_pop(self) -> None:
+        """pop resets the slot of the popped name, and leaves others alone"""
+        self.counter["B"] = 1
+        self.assertEqual(2, self.counter.pop("A"))
+        self.assertEqual(0, self.counter.pop("A", 0))
+        with self.assertRaises(KeyError):
+            self.counter.pop("A")
+        self.assertInSync({"B": 1})
+        self.assertIn("A", self.counter.changed)
+
+    def test_popitem(self) -> None:
+        """popitem resets the slot of the popped name"""
+        self.assertEqual(("A", 2), self.counter.popitem())
+        self.assertInSync({})
+        self.assertEqual({"A"}, self.counter.changed)
+
+    def test_setdefault(self) -> None:
+        """setdefault only sets and syncs missing names"""
+        self.assertEqual(2, self.counter.setdefault("A", 5))
+        self.assertEqual(4, self.counter.setdefault("B", 4))
+        self.assertInSync({"A": 2, "B": 4})
+        self.assertEqual({"B"}, self.counter.changed)
+
+    def test_copy(self) -> None:
+        """copies keep slots and changed names separately"""
+        copied = self.counter.copy()
+        copied["B"] = 1
+        self.assertInSync({"A": 2})
+        self.assertEqual([2, 1], list(copied.counts))
+        self.assertEqual({"B"}, copied.changed)
+
+
+class TestSweepForEvents(unittest.TestCase):
+    def setUp(self) -> None:
+        self.multiworld = generate_test_multiworld(2)
+        self.rule_calls = {}
+        menu = self.multiworld.get_region("Menu", 1)
+        # each event is what the next location requires
+        for name, requirement, player, event in (("Start", None, 1, "A"), ("First", "A", 1, "B"),
+                                                 ("Second", "B", 1, "Second Event"), ("Never", "Missing", 1, "C"),
+                                                 ("Foreign", "Other", 2, "D")):
+            location = Location(1, name, None, menu)
+            menu.locations.append(location)
+            location.access_rule = self.create_rule(name, requirement, player)
+            location.place_locked_item(Item(event, ItemClassification.progression, None, 1))
+
+    def create_rule(self, name: str, requirement: typing.Optional[str],
+                    player: int) -> typing.Callable[[CollectionState], bool]:
+        def rule(state: CollectionState) -> bool:
+            self.rule_calls[name] = self.rule_calls.get(name, 0) + 1
+            return requirement is None or state.has(requirement, player)
+        return rule
+
+    def sweep(self, incremental: bool) -> CollectionState:
+        self.rule_calls.clear()
+        self.multiworld.worlds[1].incremental_reachability = incremental
+        state = CollectionState(self.multiworld)
+        state.sweep_for_events()
+        return state
+
+    def test_same_events(self) -> None:
+        """Retrying only event locations whose requirements changed finds the same events as retrying all of them"""
+        full = self.sweep(False)
+        self.assertEqual({"Start": 1, "First": 2, "Second": 3, "Never": 4, "Foreign": 4}, self.rule_calls)
+        incremental = self.sweep(True)
+        self.assertEqual({"Start": 1, "First": 2, "Second": 2, "Never": 1, "Foreign": 4}, self.rule_calls)
+        self.assertEqual(full.events, incremental.events)
+        self.assertEqual(full.prog_items[1], incremental.prog_items[1])
+        self.assertTrue(incremental.has("Second Event", 1))
+
+    def test_unreachable_region(self) -> None:
+        """Rules of event locations in unreachable regions aren't tried again until new regions are reached"""
+        locked = Region("Locked", 1, self.multiworld)
+        self.multiworld.regions.append(locked)
+        self.multiworld.get_region("Menu", 1).connect(locked, rule=lambda state: state.has("Second Event", 1))
+        location = Location(1, "Locked", None, locked)
+        locked.locations.append(location)
+        location.access_rule = self.create_rule("Locked", None, 1)
+        location.place_locked_item(Item("Locked Event", ItemClassification.progression, None, 1))
+
+        state = self.sweep(False)
+        self.assertEqual(1, self.rule_calls["Locked"])
+        self.assertTrue(state.has("Locked Event", 1))
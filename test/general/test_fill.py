@@ -2,7 +2,8 @@ from typing import List, Iterable
 import unittest
 
 from Options import Accessibility
-from test.general import generate_items, generate_locations, generate_test_multiworld
+from test.general import force_incremental_reachability, generate_items, generate_locations, \
+    generate_test_multiworld
 from Fill import FillError, balance_multiworld_progression, fill_restrictive, \
     distribute_early_items, distribute_items_restrictive
 from BaseClasses import Entrance, LocationProgressType, MultiWorld, Region, Item, Location, \
@@ -463,6 +464,20 @@ class TestFillRestrictive(unittest.TestCase):
         self.assertEqual(1, len(player1.prog_items))
         self.assertIsNot(loc0.item, player1.prog_items[0], "Filled item was still present in item pool")
 
+    def test_always_allow_on_unreachable_location(self):
+        """Test that locations skipped as unreachable for one item are still offered to always_allow"""
+        multiworld = generate_test_multiworld(2)
+        player1 = generate_player_data(multiworld, 1, 1, 1)
+        player2 = generate_player_data(multiworld, 2, 1, 1)
+        locations = [player1.locations[0], player2.locations[0]]
+        set_rule(locations[0], lambda state: False)
+        locations[0].always_allow = lambda state, item: item.player == player2.id
+
+        fill_restrictive(multiworld, multiworld.state, locations, player1.prog_items + player2.prog_items)
+
+        self.assertEqual(player2.prog_items[0], player1.locations[0].item)
+        self.assertEqual(player1.prog_items[0], player2.locations[0].item)
+
 
 class TestDistributeItemsRestrictive(unittest.TestCase):
     def test_basic_distribute(self):
@@ -858,3 +873,22 @@ class TestBalanceMultiworldProgression(unittest.TestCase):
 
         self.assertRegionContains(
             self.player1.regions[2], self.player2.prog_items[0])
+
+
+class TestFillRestrictiveIncremental(TestFillRestrictive):
+    """Runs the fill tests with World.incremental_reachability"""
+    def setUp(self) -> None:
+        force_incremental_reachability(self)
+
+
+class TestDistributeItemsRestrictiveIncremental(TestDistributeItemsRestrictive):
+    """Runs the distribution tests with World.incremental_reachability"""
+    def setUp(self) -> None:
+        force_incremental_reachability(self)
+
+
+class TestBalanceMultiworldProgressionIncremental(TestBalanceMultiworldProgression):
+    """Runs the balancing tests with World.incremental_reachability"""
+    def setUp(self) -> None:
+        force_incremental_reachability(self)
+        super().setUp()
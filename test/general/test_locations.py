@@ -1,7 +1,9 @@
 import unittest
 from collections import Counter
+from BaseClasses import CollectionState, Item, ItemClassification, Location
+from Fill import swap_location_item
 from worlds.AutoWorld import AutoWorldRegister, call_all
-from . import setup_solo_multiworld
+from . import generate_test_multiworld, setup_solo_multiworld
 
 
 class TestBase(unittest.TestCase):
@@ -66,3 +68,42 @@ class TestBase(unittest.TestCase):
                         for location in locations:
                             self.assertIn(location, world_type.location_name_to_id)
                         self.assertNotIn(group_name, world_type.location_name_to_id)
+
+
+class TestLocationIndexes(unittest.TestCase):
+    def test_indexes_follow_items(self) -> None:
+        """Filled and unfilled locations stay in location cache order however items are placed"""
+        multiworld = generate_test_multiworld(1)
+        menu = multiworld.get_region("Menu", 1)
+        locations = [Location(1, f"Location {number}", number, menu) for number in range(4)]
+        locations[3].place_locked_item(Item("Event", ItemClassification.progression, None, 1))
+        menu.locations += locations
+        multiworld.push_item(locations[1], Item("Filler", ItemClassification.filler, 1, 1), False)
+        locations[2].item = Item("Key", ItemClassification.progression, 2, 1)
+        self.assertEqual(locations[1:], multiworld.get_filled_locations(1))
+        self.assertEqual([locations[0]], multiworld.get_unfilled_locations())
+
+        swap_location_item(locations[1], locations[2])
+        self.assertEqual(locations[1:], multiworld.get_filled_locations())
+        self.assertEqual([locations[0]], multiworld.get_unfilled_locations(1))
+
+        del menu.locations[1]
+        self.assertEqual(locations[2:], multiworld.get_filled_locations())
+        locations[1].item = None  # no longer in the location cache
+        self.assertEqual([locations[0]], multiworld.get_unfilled_locations())
+        locations[2].item = None
+        self.assertEqual(locations[::2], multiworld.get_unfilled_locations())
+        self.assertEqual([locations[3]], multiworld.get_filled_locations())
+
+    def test_classification_changed_after_placing(self) -> None:
+        """Items that become advancements after they were placed are collected by sweeps"""
+        multiworld = generate_test_multiworld(1)
+        menu = multiworld.get_region("Menu", 1)
+        location = Location(1, "Location", None, menu)
+        menu.locations.append(location)
+        location.place_locked_item(Item("Bomb", ItemClassification.filler, None, 1))
+        location.item.classification = ItemClassification.progression
+
+        state = CollectionState(multiworld)
+        state.sweep_for_events()
+        self.assertTrue(state.has("Bomb", 1))
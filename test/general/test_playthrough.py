@@ -0,0 +1,76 @@
+import unittest
+from unittest import mock
+
+from BaseClasses import CollectionState, Item, ItemClassification, Location, SphereSearch
+from . import generate_test_multiworld
+
+
+class TestCreatePlaythrough(unittest.TestCase):
+    def setUp(self) -> None:
+        self.multiworld = generate_test_multiworld(1)
+        self.menu = self.multiworld.get_region("Menu", 1)
+        self.multiworld.completion_condition[1] = lambda state: state.has("Victory", 1)
+
+    def add_location(self, name: str, item: str, keys: int = 0) -> Location:
+        location = Location(1, name, None, self.menu)
+        self.menu.locations.append(location)
+        location.access_rule = lambda state: state.has("Key", 1, keys)
+        location.place_locked_item(Item(item, ItemClassification.progression, None, 1))
+        return location
+
+    def test_culling(self) -> None:
+        """Only the items required to beat the game are kept, and removed items are put back afterwards"""
+        keys = [self.add_location(f"Key {number}", "Key") for number in range(3)]
+        self.add_location("Useless", "Trinket")
+        self.add_location("Goal", "Victory", keys=2)
+
+        with mock.patch.object(self.multiworld, "can_beat_game", wraps=self.multiworld.can_beat_game) as can_beat_game:
+            self.multiworld.spoiler.create_playthrough()
+        # once the second key turns out to be required, the third one is as well
+        self.assertEqual(4, can_beat_game.call_count)
+        playthrough = self.multiworld.spoiler.playthrough
+        self.assertEqual(["1", "2"], [sphere for sphere in playthrough if sphere != "0"])
+        self.assertEqual(2, len(playthrough["1"]))
+        self.assertEqual({"Key"}, set(playthrough["1"].values()))
+        self.assertEqual({"Goal": "Victory"}, playthrough["2"])
+        self.assertTrue(all(location.item for location in self.menu.locations))
+        self.assertEqual(3, sum(location.item.name == "Key" for location in keys))
+
+
+class TestSphereSearch(unittest.TestCase):
+    def setUp(self) -> None:
+        self.multiworld = generate_test_multiworld(1)
+        menu = self.multiworld.get_region("Menu", 1)
+        self.locations = []
+        for keys in range(3):
+            location = Location(1, f"Needs {keys}", None, menu)
+            location.access_rule = lambda state, keys=keys: state.has("Key", 1, keys)
+            menu.locations.append(location)
+            self.locations.append(location)
+
+    def collect_key(self, state: CollectionState) -> None:
+        state.collect(Item("Key", ItemClassification.progression, None, 1), True)
+
+    def test_spheres(self) -> None:
+        """Each location is in exactly one sphere, and spheres only grow with what the state collected"""
+        search = SphereSearch(CollectionState(self.multiworld), reversed(self.locations))
+        self.assertEqual(3, len(search))
+        self.assertEqual([self.locations[0]], search.next_sphere())
+        self.assertEqual([], search.next_sphere())
+        self.collect_key(search.state)
+        self.collect_key(search.state)
+        self.assertEqual([self.locations[2], self.locations[1]], search.next_sphere())
+        self.assertEqual(0, len(search))
+        self.assertEqual([], search.unchecked_locations())
+
+    def test_among(self) -> None:
+        """Searches limited to some indices leave the others for later, and copies search on their own"""
+        search = SphereSearch(CollectionState(self.multiworld), self.locations)
+        self.collect_key(search.state)
+        copied = search.copy(search.state.copy())
+        self.assertEqual([self.locations[1]], search.next_sphere(among=0b110))
+        self.assertEqual([self.locations[0], self.locations[2]], search.unchecked_locations())
+        self.assertEqual([self.locations[2]], search.unchecked_locations(among=0b110))
+        self.assertEqual([0, 2], search.indices(search.unchecked))
+        self.assertEqual(self.locations[:2], copied.next_sphere())
+        self.assertEqual(2, len(search))
@@ -1,8 +1,8 @@
 import unittest
 
-from BaseClasses import CollectionState
+from BaseClasses import CollectionState, Item, ItemClassification, Region
 from worlds.AutoWorld import AutoWorldRegister
-from . import setup_solo_multiworld
+from . import force_incremental_reachability, generate_test_multiworld, setup_solo_multiworld
 
 
 class TestBase(unittest.TestCase):
@@ -69,3 +69,97 @@ class TestBase(unittest.TestCase):
                             locations.add(location)
                     self.assertGreater(len(locations), 0,
                                        msg="Need to be able to reach at least one location to get started.")
+
+
+class TestIncrementalDefaultReachability(TestBase):
+    """Runs the default reachability tests with World.incremental_reachability"""
+    incremental_unsupported = {
+        # logic state is kept outside of prog_items
+        "Super Metroid",
+        "SMZ3",
+        # a key door checks which item was placed in a dungeon, which changes during its dungeon fill
+        "A Link to the Past",
+        # entrances depend on other regions without an indirect condition, which a full search misses as well
+        "Donkey Kong Country 3",
+        "Kingdom Hearts 2",
+        "MegaMan Battle Network 3",
+        "Pokemon Red and Blue",
+    }
+
+    def setUp(self) -> None:
+        force_incremental_reachability(self, *(AutoWorldRegister.world_types[game_name]
+                                               for game_name in self.incremental_unsupported))
+
+
+class TestIncrementalReachability(unittest.TestCase):
+    def setUp(self) -> None:
+        self.multiworld = generate_test_multiworld()
+        self.multiworld.worlds[1].incremental_reachability = True
+        menu = self.multiworld.get_region("Menu", 1)
+        self.first = Region("First", 1, self.multiworld)
+        self.second = Region("Second", 1, self.multiworld)
+        self.hidden = Region("Hidden", 1, self.multiworld)
+        self.multiworld.regions += [self.first, self.second, self.hidden]
+        menu.connect(self.first, rule=lambda state: state.has("Key", 1))
+        self.first.connect(self.second, rule=lambda state: state.has_all(("Key", "Lamp"), 1))
+        hidden_entrance = menu.connect(self.hidden, rule=lambda state: state.can_reach_region("Second", 1))
+        self.multiworld.register_indirect_condition(self.second, hidden_entrance)
+
+    def tearDown(self) -> None:
+        CollectionState.debug_reachability = False
+
+    def collect(self, state: CollectionState, name: str) -> None:
+        state.collect(Item(name, ItemClassification.progression, None, 1), True)
+
+    def test_only_retries_affected_connections(self) -> None:
+        """Blocked connections only get retried once an item they looked at changes"""
+        CollectionState.debug_reachability = True
+        state = CollectionState(self.multiworld)
+        self.assertFalse(self.first.can_reach(state))
+        self.assertEqual({"Key"}, state.blocked_requirements[1][self.multiworld.get_entrance("Menu -> First", 1)])
+
+        self.collect(state, "Lamp")
+        self.assertFalse(self.first.can_reach(state))
+        self.collect(state, "Key")
+        self.assertTrue(self.first.can_reach(state))
+        self.assertTrue(self.second.can_reach(state))
+        self.assertTrue(self.hidden.can_reach(state), "indirect condition was not retried")
+        self.assertFalse(state.blocked_requirements[1])
+
+    def test_retries_region_checks(self) -> None:
+        """Connections that looked at another region are retried on later updates even without an indirect condition"""
+        menu = self.multiworld.get_region("Menu", 1)
+        lookout = Region("Lookout", 1, self.multiworld)
+        self.multiworld.regions.append(lookout)
+        menu.connect(lookout, rule=lambda state: state.can_reach_region("First", 1))
+        state = CollectionState(self.multiworld)
+        self.assertFalse(lookout.can_reach(state))
+        self.collect(state, "Key")
+        self.assertTrue(self.first.can_reach(state))
+        # like a full search, the same update may have tried the connection before reaching First
+        self.collect(state, "Lamp")
+        self.assertTrue(lookout.can_reach(state))
+
+    def test_copy_keeps_pending_changes(self) -> None:
+        """A copy of a stale state still knows which item names changed"""
+        state = CollectionState(self.multiworld)
+        self.assertFalse(self.first.can_reach(state))
+        self.collect(state, "Key")
+        copied = state.copy()
+        self.assertTrue(self.first.can_reach(copied))
+        self.assertTrue(self.first.can_reach(state))
+
+    def test_debug_detects_missing_indirect_condition(self) -> None:
+        """The debug switch catches rules that depend on something other than tracked items"""
+        CollectionState.debug_reachability = True
+        unlocked = False
+        menu = self.multiworld.get_region("Menu", 1)
+        secret = Region("Secret", 1, self.multiworld)
+        self.multiworld.regions.append(secret)
+        menu.connect(secret, rule=lambda state: unlocked)
+        state = CollectionState(self.multiworld)
+        self.assertFalse(secret.can_reach(state))
+        unlocked = True
+        self.collect(state, "Key")
+        with self.assertRaises(RuntimeError):
+            secret.can_reach(state)
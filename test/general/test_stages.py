@@ -0,0 +1,44 @@
+import time
+import unittest
+
+from BaseClasses import Item, ItemClassification, MultiWorld
+from worlds.AutoWorld import call_all
+from . import generate_test_multiworld
+
+
+class TestParallelStages(unittest.TestCase):
+    @staticmethod
+    def create_multiworld(parallel: bool) -> MultiWorld:
+        multiworld = generate_test_multiworld(4)
+        for player in multiworld.player_ids:
+            world = multiworld.worlds[player]
+            world.parallel_stages = parallel
+
+            def create_items(world=world) -> None:
+                for _ in range(5):
+                    # later players finish first, if they run at the same time
+                    time.sleep((len(world.multiworld.worlds) - world.player) / 1000)
+                    world.multiworld.itempool.append(
+                        Item(f"Item {world.random.randrange(100)}", ItemClassification.filler, None, world.player))
+
+            world.create_items = create_items
+        return multiworld
+
+    def test_same_result_as_serial(self) -> None:
+        """Parallel stages leave the item pool like a serial run, with the same per world randomness"""
+        serial = self.create_multiworld(False)
+        call_all(serial, "create_items", workers=4)
+        parallel = self.create_multiworld(True)
+        call_all(parallel, "create_items", workers=4)
+
+        self.assertEqual([(item.player, item.name) for item in serial.itempool],
+                         [(item.player, item.name) for item in parallel.itempool])
+
+    def test_global_random_is_blocked(self) -> None:
+        """Parallel stages can't use the shared random state, as its results would depend on thread timing"""
+        multiworld = self.create_multiworld(True)
+        for player in multiworld.player_ids:
+            multiworld.worlds[player].create_items = lambda: multiworld.random.random()
+        with self.assertRaises(RuntimeError):
+            call_all(multiworld, "create_items", workers=2)
+        self.assertTrue(multiworld.random.passthrough)
@@ -134,6 +134,26 @@ class Base:
             self.assertEqual(self.store.get_remaining(empty_state, 0, 1), [13, 21, 22])
             self.assertEqual(self.store.get_remaining(empty_state, 0, 3), [99])
 
+        def test_get_new_checks(self) -> None:
+            self.assertEqual(self.store.get_new_checks(empty_state, 0, 1),
+                             [(11, 21, 2, 7), (12, 22, 2, 0), (13, 13, 1, 0)])
+            self.assertEqual(self.store.get_new_checks(one_state, 0, 1), [(11, 21, 2, 7), (13, 13, 1, 0)])
+            self.assertEqual(self.store.get_new_checks(full_state, 0, 1), [])
+            # only given locations, ignoring unknown, already checked, duplicate and invalid ones
+            self.assertEqual(self.store.get_new_checks(one_state, 0, 1, [13, 12, 10, 13, 14, "11", 2**70]),
+                             [(13, 13, 1, 0)])
+            self.assertEqual(self.store.get_new_checks(empty_state, 0, 2, {22, 21}), [(21, 23, 2, 0), (22, 12, 1, 0)])
+            self.assertEqual(self.store.get_new_checks(empty_state, 0, 3, []), [])
+            with self.assertRaises(KeyError):
+                self.store.get_new_checks(empty_state, 0, 6)
+
+        def test_get_new_checks_for_receiver(self) -> None:
+            self.assertEqual(self.store.get_new_checks_for_receiver(empty_state, 0, 1),
+                             {1: [(13, 13, 1, 0)], 2: [(22, 12, 1, 0), (23, 11, 1, 0)]})
+            self.assertEqual(self.store.get_new_checks_for_receiver(full_state, 0, 1), {1: [], 2: []})
+            self.assertEqual(self.store.get_new_checks_for_receiver(empty_state, 0, 3), {4: [(9, 99, 3, 0)]})
+            self.assertEqual(self.store.get_new_checks_for_receiver(empty_state, 0, 6), {})
+
         def test_location_set_intersection(self) -> None:
             locations = {10, 11, 12}
             locations.intersection_update(self.store[1])
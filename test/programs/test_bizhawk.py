@@ -0,0 +1,185 @@
+import asyncio
+import base64
+import json
+import typing
+import unittest
+from unittest import mock
+
+from worlds import _bizhawk
+from worlds._bizhawk import BizHawkContext, NotConnectedError, RequestFailedError
+
+
+class FakeConnector:
+    """Stand-in for connector_bizhawk_generic.lua, answering requests from a bytearray as memory."""
+    memory: bytearray
+    messages: typing.List[typing.List[typing.Dict[str, typing.Any]]]
+    watches: typing.Dict[int, typing.Tuple[int, int, typing.Optional[str]]]
+    """watch id -> address, size and data last sent for the watch"""
+    respond: asyncio.Event
+    """cleared to hold back responses, like a connector that stopped answering"""
+
+    def __init__(self) -> None:
+        self.memory = bytearray(range(16))
+        self.messages = []
+        self.watches = {}
+        self.respond = asyncio.Event()
+        self.respond.set()
+
+    async def start(self) -> int:
+        self.server = await asyncio.start_server(self.handle, "127.0.0.1", 0)
+        return self.server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        # the connector forgets watches when it loses the connection
+        self.watches.clear()
+        try:
+            while line := await reader.readline():
+                message = json.loads(line)
+                self.messages.append(message)
+                await self.respond.wait()
+                writer.write(json.dumps(self.process(message)).encode() + b"\n")
+                await writer.drain()
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+
+    def process(self, message: typing.List[typing.Dict[str, typing.Any]]) -> typing.List[typing.Dict[str, typing.Any]]:
+        responses = []
+        failed_guard = None
+        for request in message:
+            if request["type"] == "GROUP":
+                failed_guard = None
+            if failed_guard is not None:
+                responses.append(failed_guard)
+                continue
+            response = self.process_request(request)
+            if response["type"] == "GUARD_RESPONSE" and not response["value"]:
+                failed_guard = response
+            responses.append(response)
+        return responses
+
+    def process_request(self, request: typing.Dict[str, typing.Any]) -> typing.Dict[str, typing.Any]:
+        request_type = request["type"]
+        if request_type == "PING":
+            return {"type": "PONG"}
+        if request_type == "GROUP":
+            return {"type": "GROUP_RESPONSE"}
+        if request_type == "GUARD":
+            expected = base64.b64decode(request["expected_data"])
+            actual = self.memory[request["address"]:request["address"] + len(expected)]
+            return {"type": "GUARD_RESPONSE", "value": actual == expected, "address": request["address"]}
+        if request_type == "READ":
+            data = self.memory[request["address"]:request["address"] + request["size"]]
+            return {"type": "READ_RESPONSE", "value": base64.b64encode(data).decode("ascii")}
+        if request_type == "WATCH":
+            self.watches[request["id"]] = (request["address"], request["size"], None)
+            return {"type": "WATCH_RESPONSE"}
+        if request_type == "UNWATCH":
+            self.watches.pop(request["id"], None)
+            return {"type": "UNWATCH_RESPONSE"}
+        if request_type == "WATCHED":
+            changed = []
+            for watch_id, (address, size, last_data) in self.watches.items():
+                data = base64.b64encode(self.memory[address:address + size]).decode("ascii")
+                if data != last_data:
+                    self.watches[watch_id] = (address, size, data)
+                    changed.append([watch_id, data])
+            return {"type": "WATCHED_RESPONSE", "value": changed}
+        return {"type": "ERROR", "err": f"Unknown command: {request_type}"}
+
+
+class TestBizHawkContext(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.connector = FakeConnector()
+        port = await self.connector.start()
+        self.patch = mock.patch.multiple(_bizhawk, BIZHAWK_SOCKET_PORT_RANGE_START=port,
+                                         BIZHAWK_SOCKET_PORT_RANGE_SIZE=1)
+        self.patch.start()
+        self.ctx = BizHawkContext()
+        self.assertTrue(await _bizhawk.connect(self.ctx))
+
+    async def asyncTearDown(self) -> None:
+        _bizhawk.disconnect(self.ctx)
+        self.connector.respond.set()
+        await self.connector.stop()
+        self.patch.stop()
+
+    async def test_grouped_responses(self) -> None:
+        """Requests made together share a message, and each caller only gets the responses to its own requests"""
+        guarded, read, _ = await asyncio.gather(
+            _bizhawk.guarded_read(self.ctx, [(0, 2, "RAM")], [(4, [0], "RAM")]),
+            _bizhawk.read(self.ctx, [(2, 2, "RAM"), (8, 1, "RAM")]),
+            _bizhawk.ping(self.ctx))
+
+        self.assertIsNone(guarded)
+        self.assertEqual([b"\x02\x03", b"\x08"], read)
+        self.assertEqual(1, len(self.connector.messages))
+        self.assertEqual(["GROUP", "GUARD", "READ", "GROUP", "READ", "READ", "GROUP", "PING"],
+                         [request["type"] for request in self.connector.messages[0]])
+
+        self.assertEqual([b"\x00"], await _bizhawk.read(self.ctx, [(0, 1, "RAM")]))
+        self.assertEqual(["READ"], [request["type"] for request in self.connector.messages[1]])
+        await asyncio.sleep(0)
+        self.assertIsNone(self.ctx._send_task)
+
+    async def test_requests_made_during_a_round_trip(self) -> None:
+        """Requests made while waiting for a response go out together in the next message"""
+        self.connector.respond.clear()
+        first = asyncio.create_task(_bizhawk.ping(self.ctx))
+        while not self.connector.messages:
+            await asyncio.sleep(0.01)
+        later = asyncio.gather(_bizhawk.ping(self.ctx), _bizhawk.read(self.ctx, [(1, 1, "RAM")]))
+        await asyncio.sleep(0.01)
+        self.connector.respond.set()
+
+        await first
+        self.assertEqual([None, [b"\x01"]], await later)
+        self.assertEqual(2, len(self.connector.messages))
+        self.assertEqual(["GROUP", "PING", "GROUP", "READ"],
+                         [request["type"] for request in self.connector.messages[1]])
+
+    async def test_disconnect_fails_requests(self) -> None:
+        """Disconnecting fails requests waiting for a response and requests that weren't sent yet"""
+        self.connector.respond.clear()
+        sent = asyncio.create_task(_bizhawk.ping(self.ctx))
+        while not self.connector.messages:
+            await asyncio.sleep(0.01)
+        queued = asyncio.create_task(_bizhawk.ping(self.ctx))
+        await asyncio.sleep(0)
+        send_task = self.ctx._send_task
+
+        _bizhawk.disconnect(self.ctx)
+        with self.assertRaises(RequestFailedError):
+            await asyncio.wait_for(sent, 5)
+        with self.assertRaises(NotConnectedError):
+            await asyncio.wait_for(queued, 5)
+        self.assertTrue(send_task.cancelled())
+        self.assertIsNone(self.ctx._send_task)
+        self.assertEqual([], self.ctx._pending_requests)
+
+        self.connector.respond.set()
+        self.assertTrue(await _bizhawk.connect(self.ctx))
+        await _bizhawk.ping(self.ctx)
+
+    async def test_watches(self) -> None:
+        """Watched memory is only sent again once it changes, and watches are sent again after reconnecting"""
+        _bizhawk.watch(self.ctx, [(0, 2, "RAM"), (4, 1, "RAM")])
+        self.assertEqual([(0, 2, "RAM"), (4, 1, "RAM")], sorted(await _bizhawk.update_watched(self.ctx)))
+        self.assertEqual({(0, 2, "RAM"): b"\x00\x01", (4, 1, "RAM"): b"\x04"}, self.ctx.watched_memory)
+        self.assertEqual([], await _bizhawk.update_watched(self.ctx))
+
+        self.connector.memory[4] = 40
+        _bizhawk.unwatch(self.ctx, [(0, 2, "RAM")])
+        self.assertEqual([(4, 1, "RAM")], await _bizhawk.update_watched(self.ctx))
+        self.assertEqual({(4, 1, "RAM"): b"\x28"}, self.ctx.watched_memory)
+        self.assertEqual(1, len(self.connector.watches))
+
+        _bizhawk.disconnect(self.ctx)
+        self.assertTrue(await _bizhawk.connect(self.ctx))
+        self.assertEqual([(4, 1, "RAM")], await _bizhawk.update_watched(self.ctx))
+        self.assertEqual(["WATCH", "WATCHED"], [request["type"] for request in self.connector.messages[-1]])
@@ -1,6 +1,8 @@
+import io
 import unittest
 
 import NetUtils
+import Utils
 from CommonClient import CommonContext
 
 
@@ -104,3 +106,22 @@ class TestCommonContext(unittest.IsolatedAsyncioTestCase):
         assert self.ctx.item_names.lookup_in_slot(-1, 3) == "Nothing"
         assert self.ctx.item_names.lookup_in_game(-1, "__TestGame1") == "Nothing"
         assert self.ctx.item_names.lookup_in_game(-1, "__TestGame2") == "Nothing"
+
+    async def test_cached_name_lookups(self):
+        with io.BytesIO() as file:
+            Utils.dump_data_package_cache({
+                "checksum": "1234",
+                "location_name_to_id": {"Cached Location": 2**54 + 1},
+                "item_name_to_id": {"Cached Item": 2**54 + 1},
+            }, file)
+            cache = Utils.DataPackageCache(file.getvalue())
+        self.ctx.item_names.update_game_names("__TestGame2", cache.item_names)
+        self.ctx.location_names.update_game_names("__TestGame2", cache.location_names)
+
+        assert self.ctx.item_names.lookup_in_game(2 ** 54 + 1, "__TestGame2") == "Cached Item"
+        assert self.ctx.item_names.lookup_in_game(2 ** 54 + 2, "__TestGame2") == f"Unknown item (ID: {2 ** 54 + 2})"
+        assert self.ctx.item_names.lookup_in_game(-1, "__TestGame2") == "Nothing"
+        assert self.ctx.location_names.lookup_in_slot(2 ** 54 + 1, 3) == "Cached Location"
+        # tables updated last take precedence in implicit lookups
+        assert self.ctx.item_names[2 ** 54 + 1] == "Cached Item"
+        assert self.ctx.item_names[2 ** 54 + 2] == "Test Item 2 - Duplicate"
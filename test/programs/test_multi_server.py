@@ -38,3 +38,299 @@ class TestResolvePlayerName(unittest.TestCase):
         assert p.resolve_player("ABC") == (1, 2, "abc"), "case insensitive resolves when 1 match"
         assert p.resolve_player("abcd") == (1, 3, "abCD"), "case insensitive resolves when 1 match"
         assert not p.resolve_player("aB"), "partial name shouldn't resolve to player"
+
+
+class TestMultidataFormats(unittest.TestCase):
+    @staticmethod
+    def create_multidata() -> dict:
+        from NetUtils import NetworkSlot, SlotType
+        from Utils import version_tuple
+        return {
+            "slot_data": {1: {"option": 1}, 2: {"option": 2}},
+            "slot_info": {1: NetworkSlot("Player1", "Archipelago", SlotType.player),
+                          2: NetworkSlot("Player2", "Archipelago", SlotType.player)},
+            "connect_names": {"Player1": (0, 1), "Player2": (0, 2)},
+            "locations": {1: {1: (1, 2, 0)}, 2: {1: (2, 1, 0)}},
+            "checks_in_area": {},
+            "server_options": {},
+            "er_hint_data": {},
+            "precollected_items": {1: [], 2: []},
+            "precollected_hints": {1: set(), 2: set()},
+            "version": tuple(version_tuple),
+            "tags": ["AP"],
+            "minimum_versions": {"server": (0, 0, 0), "clients": {}},
+            "seed_name": "12345",
+            "spheres": [{1: {1}}, {2: {1}}],
+            "datapackage": {},
+        }
+
+    def test_formats_load_the_same(self) -> None:
+        """Multidata of the old single pickle format and of the sectioned format load into the same Context"""
+        import pickle
+        import zlib
+        from Utils import MultidataSections, dumps_multidata
+
+        contexts = []
+        for data in (bytes([3]) + zlib.compress(pickle.dumps(self.create_multidata())),
+                     dumps_multidata(self.create_multidata())):
+            ctx = Context("", 0, "", "", 0, 0, False)
+            ctx._load(ctx.decompress(data), {}, False)
+            contexts.append(ctx)
+        old, new = contexts
+
+        self.assertIsInstance(new.slot_data, MultidataSections)
+        self.assertEqual({2: {1}}, new.spheres[1])
+        self.assertEqual(old.spheres, new.spheres)
+        self.assertEqual(old.read_data["slot_data_2"](), new.read_data["slot_data_2"]())
+        self.assertEqual(old.locations[2][1], new.locations[2][1])
+        self.assertEqual(old.player_names, new.player_names)
+
+    def test_sections_are_loaded_on_use(self) -> None:
+        """Sections of the sectioned format are only decompressed when used and can be changed and written again"""
+        from Utils import dumps_multidata, loads_multidata
+
+        multidata = loads_multidata(dumps_multidata(self.create_multidata()))
+        self.assertEqual(0, len(multidata._loaded))
+        self.assertEqual({"option": 2}, multidata["slot_data"][2])
+        self.assertEqual({"slot_data"}, set(multidata._loaded))
+        self.assertNotIn(1, multidata["slot_data"]._loaded)
+
+        multidata["slot_data"][3] = {"option": 3}
+        del multidata["spheres"]
+        multidata = loads_multidata(dumps_multidata(multidata))
+        self.assertEqual({1: {"option": 1}, 2: {"option": 2}, 3: {"option": 3}}, dict(multidata["slot_data"]))
+        self.assertNotIn("spheres", multidata)
+        self.assertEqual(list(self.create_multidata())[:-2], list(multidata)[:-1])
+
+    def test_lazy_sections(self) -> None:
+        """Sections can be loaded later without keeping the multidata alive, including sections split by keys"""
+        import gc
+        import weakref
+        from Utils import dumps_multidata, loads_multidata
+
+        data = dumps_multidata(self.create_multidata())
+        multidata = loads_multidata(data)
+        multidata["slot_data"][3] = {"option": 3}
+        load_slot_data = multidata.lazy("slot_data")
+        load_locations = multidata.lazy("locations")
+        load_spheres = multidata.lazy("spheres")
+        load_missing = multidata.lazy("missing", {})
+        reference = weakref.ref(multidata)
+        del multidata
+        gc.collect()
+        self.assertIsNone(reference())
+
+        slot_data = load_slot_data()
+        self.assertEqual({1: {"option": 1}, 2: {"option": 2}, 3: {"option": 3}}, dict(slot_data))
+        locations = load_locations()
+        self.assertEqual(self.create_multidata()["locations"], dict(locations))
+        self.assertLess(len(locations._data), len(data) // 2)
+        self.assertLess(len(slot_data._data), len(data) // 2)
+        self.assertEqual(self.create_multidata()["spheres"], load_spheres())
+        self.assertEqual({}, load_missing())
+
+    def test_decompressed_size(self) -> None:
+        """The decompressed size is the size of the pickles of all sections, including sections split by keys, and is
+        read from the index without decompressing any section"""
+        import pickle
+        from unittest import mock
+        from Utils import _split_multidata_sections, dumps_multidata, loads_multidata
+
+        multidata = self.create_multidata()
+        expected = 0
+        for key, value in multidata.items():
+            if key in _split_multidata_sections:
+                expected += sum(len(pickle.dumps(sub_value)) for sub_value in value.values())
+            else:
+                expected += len(pickle.dumps(value))
+        multidata = loads_multidata(dumps_multidata(multidata))
+        with mock.patch("zlib.decompress", side_effect=AssertionError("section was decompressed")):
+            self.assertEqual(expected, multidata.decompressed_size())
+
+    def test_memory_mapped_sections(self) -> None:
+        """Sections can be split by other keys and read straight from a memory mapped file"""
+        import mmap
+        import os
+        import tempfile
+        from Utils import MultidataSections, dump_multidata
+
+        data = {"gamespackage": {"Game 1": {"checksum": "1"}, "Game 2": {"checksum": "2"}}, "other": {"Game 1": 1}}
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "data.bin")
+            with open(path, "wb") as file:
+                dump_multidata(data, file, frozenset({"gamespackage"}))
+            with open(path, "rb") as file:
+                sections = MultidataSections.from_buffer(mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ))
+            self.assertEqual({"checksum": "2"}, sections["gamespackage"]["Game 2"])
+            self.assertEqual({"Game 2"}, set(sections["gamespackage"]._loaded))
+            self.assertEqual({"Game 1": 1}, sections["other"])
+            self.assertEqual({}, sections["gamespackage"].get("Game 3", {}))
+            del sections
+
+
+class TestSendNewItems(unittest.IsolatedAsyncioTestCase):
+    async def test_only_dirty_slots(self) -> None:
+        """Only clients of slots that received items get sent new ones, once per client"""
+        from MultiServer import Client, register_location_checks, send_new_items
+
+        ctx = Context("", 0, "", "", 0, 0, False)
+        ctx._load(TestMultidataFormats.create_multidata(), {}, False)
+        clients = []
+        for slot, items_handling in ((1, 0b111), (2, 0b111), (2, 0b111), (2, 0b001)):
+            client = Client(None, ctx)
+            client.team, client.slot, client.items_handling = 0, slot, items_handling
+            ctx.clients[0][slot].append(client)
+            clients.append(client)
+
+        register_location_checks(ctx, 0, 1, [1])
+        self.assertEqual(set(), ctx.dirty_received_items)
+        self.assertEqual([0, 1, 1, 1], [client.send_index for client in clients])
+
+        clients[1].send_index = 0  # pretend this one fell behind, without new items it is left alone
+        send_new_items(ctx)
+        self.assertEqual([0, 0, 1, 1], [client.send_index for client in clients])
+        register_location_checks(ctx, 0, 2, [1])
+        self.assertEqual([1, 0, 1, 1], [client.send_index for client in clients])
+
+
+
+
+class TestHintIndex(unittest.IsolatedAsyncioTestCase):
+    async def test_check_updates_hints(self) -> None:
+        """Checking a hinted location marks the hint as found for everyone knowing it, without touching others"""
+        from unittest import mock
+        from MultiServer import register_location_checks
+        from NetUtils import Hint
+
+        ctx = Context("", 0, "", "", 0, 0, False)
+        ctx._load(TestMultidataFormats.create_multidata(), {}, False)
+        hint = Hint(2, 1, 1, 2, False)
+        other_hint = Hint(1, 2, 1, 1, False)
+        ctx.notify_hints(0, [hint, other_hint])
+        self.assertEqual({hint, other_hint}, ctx.hints[0, 1])
+
+        with mock.patch.object(ctx, "on_changed_hints") as on_changed_hints:
+            register_location_checks(ctx, 0, 1, [1])
+        self.assertEqual([mock.call(0, 1), mock.call(0, 2)], on_changed_hints.call_args_list)
+        found_hint = hint._replace(found=True)
+        self.assertEqual({found_hint, other_hint}, ctx.hints[0, 1])
+        self.assertEqual({found_hint, other_hint}, ctx.hints[0, 2])
+        self.assertEqual({found_hint, other_hint}, set(ctx.read_data["hints_0_1"]()))
+
+        with mock.patch.object(ctx, "on_changed_hints") as on_changed_hints:
+            register_location_checks(ctx, 0, 1, [1])
+        on_changed_hints.assert_not_called()
+class TestSaveJournal(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        import tempfile
+        self.directory = tempfile.TemporaryDirectory()
+        self.save_filename = self.directory.name + "/AP_12345.apsave"
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+
+    def create_context(self) -> Context:
+        from unittest import mock
+
+        ctx = Context("", 0, "", "", 0, 0, False, save_journal=True)
+        ctx._load(TestMultidataFormats.create_multidata(), {}, False)
+        ctx.save_filename = self.save_filename
+        with mock.patch.object(Context, "_start_async_saving"):
+            ctx.init_save()
+        return ctx
+
+    async def test_journal_is_replayed(self) -> None:
+        """Changes saved to the journal are there after loading the save again, which compacts the journal"""
+        import os
+        import pickle
+        import zlib
+        from MultiServer import register_location_checks
+
+        ctx = self.create_context()
+        self.assertTrue(ctx._save())  # nothing to append to yet, so this writes the snapshot
+        self.assertFalse(os.path.exists(ctx.journal_filename))
+
+        register_location_checks(ctx, 0, 1, [1])
+        self.assertTrue(ctx._save())
+        ctx.stored_data["key"] = "value"
+        ctx.journal_stored_data.add("key")
+        ctx.hints_used[0, 1] += 1
+        ctx.journal_sections.add("hints_used")
+        self.assertTrue(ctx._save())
+        self.assertTrue(ctx._save())  # no changes, no record
+        with open(ctx.journal_filename, "rb") as f:
+            data = f.read()
+        first_record_size = int.from_bytes(data[:4], "little") + 4
+        second_record_size = int.from_bytes(data[first_record_size:first_record_size + 4], "little") + 4
+        self.assertEqual(first_record_size + second_record_size, len(data))
+        second_record = pickle.loads(zlib.decompress(data[first_record_size + 4:]))
+        self.assertEqual({"generation": ctx._journal_generation, "stored_data": {"key": "value"},
+                          "sections": {"hints_used": {(0, 1): 1}}}, second_record)
+
+        # the last record was only partially written
+        with open(ctx.journal_filename, "ab") as f:
+            f.write(b"\xff\x00\x00\x00\x01\x02")
+        loaded = self.create_context()
+        self.assertEqual({1}, loaded.location_checks[0, 1])
+        self.assertEqual(ctx.received_items, loaded.received_items)
+        self.assertEqual("value", loaded.stored_data["key"])
+        self.assertEqual(1, loaded.hints_used[0, 1])
+        self.assertFalse(os.path.exists(ctx.journal_filename))
+
+        # a journal left over from an older snapshot is ignored
+        loaded.stored_data["key"] = "new value"
+        self.assertTrue(loaded._save(True))
+        with open(ctx.journal_filename, "wb") as f:
+            f.write(data)
+        loaded = self.create_context()
+        self.assertEqual("new value", loaded.stored_data["key"])
+        self.assertFalse(os.path.exists(ctx.journal_filename))  # so that new records don't follow the old ones
+
+
+class TestAutoShutdown(unittest.IsolatedAsyncioTestCase):
+    async def test_first_timeout(self) -> None:
+        """A server carrying over the rest of an inactivity timeout shuts down once that is over, not a full one"""
+        import asyncio
+        from unittest import mock
+        from MultiServer import auto_shutdown
+
+        ctx = Context("", 0, "", "", 0, 0, False, auto_shutdown=60)
+        ctx.server = mock.MagicMock()
+        await asyncio.wait_for(auto_shutdown(ctx, [], 0.01), 5)
+        self.assertTrue(ctx.exit_event.is_set())
+        ctx.server.ws_server.close.assert_called_once()
+
+
+class TestMetrics(unittest.IsolatedAsyncioTestCase):
+    async def test_served_as_prometheus_text(self) -> None:
+        """Commands are timed by name, unknown ones together, and the endpoint serves cumulative histograms"""
+        import asyncio
+        from MultiServer import serve_metrics
+
+        ctx = Context("", 0, "", "", 0, 0, False, metrics=True)
+        ctx.metrics.observe_command("Sync", 0.002)
+        ctx.metrics.observe_command("Sync", 10)
+        ctx.metrics.observe_command("Made up", 0.002)
+        ctx.metrics.observe_broadcast(100, 3)
+        self.assertEqual({"Sync", "other"}, set(ctx.metrics.command_seconds))
+        self.assertEqual(2, ctx.metrics.command_seconds["Sync"].count)
+        self.assertEqual(300, ctx.metrics.broadcast_sent_bytes)
+        self.assertIn("Sync | 2 |", ctx.metrics.summary())
+
+        server = await serve_metrics(ctx, 0)
+        port = server.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(b"GET /metrics HTTP/1.1\r\nHost: localhost\r\n\r\n")
+        response = (await reader.read()).decode()
+        writer.close()
+        server.close()
+        await server.wait_closed()
+
+        self.assertTrue(response.startswith("HTTP/1.1 200 OK"))
+        lines = response.split("\r\n\r\n", 1)[1].splitlines()
+        self.assertIn('archipelago_command_seconds_bucket{cmd="Sync",le="0.001"} 0', lines)
+        self.assertIn('archipelago_command_seconds_bucket{cmd="Sync",le="0.0025"} 1', lines)
+        self.assertIn('archipelago_command_seconds_bucket{cmd="Sync",le="+Inf"} 2', lines)
+        self.assertIn('archipelago_command_seconds_count{cmd="Sync"} 2', lines)
+        self.assertIn("archipelago_broadcast_sent_bytes_total 300", lines)
+        self.assertIn("archipelago_save_seconds_count 0", lines)
@@ -0,0 +1,83 @@
+import asyncio
+import json
+import typing
+import unittest
+from types import SimpleNamespace
+
+from SNIClient import SNESState, merge_read_ranges, snes_read, snes_read_ranges
+
+
+class TestMergeReadRanges(unittest.TestCase):
+    def test_separate(self) -> None:
+        """Ranges with a gap between them stay separate, sorted by address"""
+        self.assertEqual([(0x10, 2), (0x20, 1)], merge_read_ranges([(0x20, 1), (0x10, 2)]))
+
+    def test_adjacent(self) -> None:
+        """A range starting right where another ends is merged into it"""
+        self.assertEqual([(0x10, 6)], merge_read_ranges([(0x14, 2), (0x10, 4)]))
+
+    def test_overlapping(self) -> None:
+        """Overlapping ranges are merged into one covering both"""
+        self.assertEqual([(0x10, 8)], merge_read_ranges([(0x10, 4), (0x12, 6)]))
+
+    def test_contained(self) -> None:
+        """A range inside another doesn't extend it"""
+        self.assertEqual([(0x10, 8)], merge_read_ranges([(0x12, 2), (0x10, 8), (0x17, 1)]))
+
+    def test_duplicate(self) -> None:
+        """The same range requested twice is only read once"""
+        self.assertEqual([(0x10, 4)], merge_read_ranges([(0x10, 4), (0x10, 4)]))
+
+    def test_chain(self) -> None:
+        """A range merged into another can in turn merge with the next one"""
+        self.assertEqual([(0x10, 12), (0x30, 1)],
+                         merge_read_ranges([(0x30, 1), (0x18, 4), (0x10, 4), (0x14, 4)]))
+
+
+class FakeSNISocket:
+    """Answers GetAddress requests from a bytes object as memory, split over several messages like SNI can."""
+    open = True
+    closed = False
+
+    def __init__(self, memory: bytes, recv_queue: "asyncio.Queue[bytes]") -> None:
+        self.memory = memory
+        self.recv_queue = recv_queue
+        self.requests: typing.List[typing.Dict[str, typing.Any]] = []
+
+    async def send(self, message: str) -> None:
+        request = json.loads(message)
+        self.requests.append(request)
+        operands = request["Operands"]
+        data = b"".join(self.memory[int(address, 16):int(address, 16) + int(size, 16)]
+                        for address, size in zip(operands[::2], operands[1::2]))
+        for start in range(0, len(data), 3):
+            self.recv_queue.put_nowait(data[start:start + 3])
+
+
+class TestSnesReadRanges(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        recv_queue: "asyncio.Queue[bytes]" = asyncio.Queue()
+        self.socket = FakeSNISocket(bytes(range(64)), recv_queue)
+        self.ctx = SimpleNamespace(snes_request_lock=asyncio.Lock(), snes_state=SNESState.SNES_ATTACHED,
+                                   snes_socket=self.socket, snes_recv_queue=recv_queue)
+
+    async def test_original_order(self) -> None:
+        """Ranges are read in one request of merged ranges and returned in the order they were requested"""
+        ranges = [(0x30, 2), (0x10, 4), (0x12, 4), (0x14, 2), (0x20, 1), (0x10, 4)]
+        result = await snes_read_ranges(self.ctx, ranges)
+
+        self.assertEqual([bytes(range(address, address + size)) for address, size in ranges], result)
+        self.assertEqual(1, len(self.socket.requests))
+        self.assertEqual(["10", "6", "20", "1", "30", "2"], self.socket.requests[0]["Operands"])
+
+    async def test_single_read(self) -> None:
+        """snes_read reads a single range through the same request"""
+        self.assertEqual(bytes([5, 6, 7]), await snes_read(self.ctx, 5, 3))
+        self.assertEqual(["5", "3"], self.socket.requests[0]["Operands"])
+
+    async def test_not_attached(self) -> None:
+        """Nothing is requested without an attached device"""
+        self.ctx.snes_state = SNESState.SNES_CONNECTED
+        self.assertIsNone(await snes_read_ranges(self.ctx, [(0, 1)]))
+        self.assertEqual([], await snes_read_ranges(self.ctx, []))
+        self.assertEqual([], self.socket.requests)
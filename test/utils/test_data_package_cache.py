@@ -0,0 +1,69 @@
+# Tests for the binary data package cache in Utils.py
+
+import io
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import Utils
+from Utils import DataPackageCache, dump_data_package_cache
+
+
+class TestDataPackageCache(unittest.TestCase):
+    game_data = {
+        "checksum": "0123abcd",
+        "item_name_to_id": {"Sword": 2, "Shared Name": 1, "Ünïcode": -5},
+        "location_name_to_id": {"Shared Name": 2**54 + 1, "Chest": 3},
+    }
+
+    def dumps(self) -> bytes:
+        with io.BytesIO() as file:
+            dump_data_package_cache(self.game_data, file)
+            return file.getvalue()
+
+    def test_lookups(self) -> None:
+        """Names can be looked up by id, and unknown ids are missing"""
+        cache = DataPackageCache(self.dumps())
+        self.assertEqual({"checksum": "0123abcd"}, cache.meta)
+        self.assertEqual("Sword", cache.item_names[2])
+        self.assertEqual("Ünïcode", cache.item_names[-5])
+        self.assertEqual("Shared Name", cache.location_names[2**54 + 1])
+        self.assertNotIn(3, cache.item_names)
+        self.assertNotIn("Chest", cache.location_names)
+        self.assertEqual([-5, 1, 2], list(cache.item_names))
+        self.assertEqual(2, len(cache.location_names))
+
+    def test_round_trip(self) -> None:
+        """The whole data package can be read back from a memory mapped file"""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "cache.bin")
+            with open(path, "wb") as file:
+                file.write(self.dumps())
+            cache = DataPackageCache.open(path)
+            self.assertEqual(self.game_data, cache.to_game_data())
+            del cache
+
+    def test_invalid(self) -> None:
+        """Other and truncated data is rejected"""
+        data = self.dumps()
+        with self.assertRaises(ValueError):
+            DataPackageCache(b"{}" + data[2:])
+        with self.assertRaises(ValueError):
+            DataPackageCache(data[:-4])
+
+    def test_convert_json(self) -> None:
+        """Json files written by older versions are converted to the binary format when they are first opened"""
+        with tempfile.TemporaryDirectory() as directory, \
+                mock.patch.object(Utils.cache_path, "cached_path", directory, create=True):
+            os.makedirs(Utils.cache_path("datapackage", "Test Game"))
+            with open(Utils.cache_path("datapackage", "Test Game", "0123abcd.json"), "w", encoding="utf-8-sig") as f:
+                json.dump(self.game_data, f)
+
+            self.assertIsNone(Utils.open_data_package_cache("Test Game", "4567ef"))
+            cache = Utils.open_data_package_cache("Test Game", "0123abcd")
+            self.assertEqual("Sword", cache.item_names[2])
+            self.assertTrue(os.path.exists(Utils.cache_path("datapackage", "Test Game", "0123abcd.bin")))
+            self.assertEqual(self.game_data, Utils.load_data_package_for_checksum("Test Game", "0123abcd"))
+            del cache
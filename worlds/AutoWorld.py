@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import concurrent.futures
 import hashlib
 import logging
 import pathlib
@@ -7,7 +8,7 @@ import sys
 import time
 from random import Random
 from dataclasses import make_dataclass
-from typing import (Any, Callable, ClassVar, Dict, FrozenSet, List, Mapping, Optional, Set, TextIO, Tuple,
+from typing import (Any, Callable, ClassVar, Dict, FrozenSet, Iterable, List, Mapping, Optional, Set, TextIO, Tuple,
                     TYPE_CHECKING, Type, Union)
 
 from Options import item_and_loc_options, OptionGroup, PerGameCommonOptions
@@ -57,6 +58,12 @@ class AutoWorldRegister(type):
                                        in dct.get("location_name_groups", {}).items()}
         dct["location_name_groups"]["Everywhere"] = dct["location_names"]
         dct["all_item_and_group_names"] = frozenset(dct["item_names"] | set(dct.get("item_name_groups", {})))
+        # dense slot index per item name, ordered by id
+        dct["item_name_to_slot"] = {name: slot for slot, name in
+                                    enumerate(sorted(dct["item_name_to_id"], key=dct["item_name_to_id"].__getitem__))}
+        dct["item_name_group_masks"] = {group_name: sum(1 << dct["item_name_to_slot"][name] for name in group_set)
+                                        for group_name, group_set in dct["item_name_groups"].items()
+                                        if group_set <= dct["item_names"]}
 
         # move away from get_required_client_version function
         if "game" in dct:
@@ -173,19 +180,57 @@ def call_single(multiworld: "MultiWorld", method_name: str, player: int, *args:
         return ret
 
 
-def call_all(multiworld: "MultiWorld", method_name: str, *args: Any) -> None:
-    world_types: Set[AutoWorldRegister] = set()
+def _assert_unique_items(multiworld: "MultiWorld", player: int, new_items: List["Item"]) -> None:
+    for i, item in enumerate(new_items):
+        for other in new_items[i+1:]:
+            assert item is not other, (
+                f"Duplicate item reference of \"{item.name}\" in \"{multiworld.worlds[player].game}\" "
+                f"of player \"{multiworld.player_name[player]}\". Please make a copy instead.")
+
+
+def _call_parallel(multiworld: "MultiWorld", method_name: str, players: List[int], workers: int, *args: Any) -> None:
+    prev_item_count = len(multiworld.itempool)
+    # shared random state would make results depend on thread timing
+    random_passthrough = multiworld.random.passthrough
+    multiworld.random.passthrough = False
+    try:
+        with concurrent.futures.ThreadPoolExecutor(min(workers, len(players))) as pool:
+            futures = [pool.submit(call_single, multiworld, method_name, player, *args) for player in players]
+    finally:
+        multiworld.random.passthrough = random_passthrough
+    for future in futures:  # re-raise in player order, so the same error shows up regardless of timing
+        future.result()
+    if __debug__:
+        new_items = multiworld.itempool[prev_item_count:]
+        for player in players:
+            _assert_unique_items(multiworld, player, [item for item in new_items if item.player == player])
+
+
+def call_all(multiworld: "MultiWorld", method_name: str, *args: Any, workers: int = 0) -> None:
+    """
+    Call method_name on every world, then its stage_ method on every world type.
+    With more than one worker, worlds with World.parallel_stages run at the same time on a thread pool,
+    after which the other worlds run in player order.
+    """
+    parallel_players: Set[int] = set()
+    if workers > 1:
+        parallel_players = {player for player in multiworld.player_ids if multiworld.worlds[player].parallel_stages}
+        if len(parallel_players) < 2:
+            parallel_players = set()
+    prev_item_count = len(multiworld.itempool)
+    if parallel_players:
+        _call_parallel(multiworld, method_name, sorted(parallel_players), workers, *args)
     for player in multiworld.player_ids:
-        prev_item_count = len(multiworld.itempool)
-        world_types.add(multiworld.worlds[player].__class__)
+        if player in parallel_players:
+            continue
+        player_item_count = len(multiworld.itempool)
         call_single(multiworld, method_name, player, *args)
         if __debug__:
-            new_items = multiworld.itempool[prev_item_count:]
-            for i, item in enumerate(new_items):
-                for other in new_items[i+1:]:
-                    assert item is not other, (
-                        f"Duplicate item reference of \"{item.name}\" in \"{multiworld.worlds[player].game}\" "
-                        f"of player \"{multiworld.player_name[player]}\". Please make a copy instead.")
+            _assert_unique_items(multiworld, player, multiworld.itempool[player_item_count:])
+    if parallel_players:
+        # items were appended in whatever order the threads ran, so restore the order of a serial run
+        multiworld.itempool[prev_item_count:] = sorted(multiworld.itempool[prev_item_count:],
+                                                       key=lambda item: item.player)
 
     call_stage(multiworld, method_name, *args)
 
@@ -259,6 +304,23 @@ class World(metaclass=AutoWorldRegister):
     topology_present: bool = False
     """indicate if this world has any meaningful layout/pathing"""
 
+    incremental_reachability: ClassVar[bool] = False
+    """
+    indicate that entrance access rules of this world only depend on this player's state.prog_items and regions, so
+    CollectionState only has to retry blocked entrances whose item requirements changed. Entrances that checked other
+    regions are retried on every update, like a full search does. Anything else, such as LogicMixin attributes or the
+    items placed at locations, is not tracked. Verify with CollectionState.debug_reachability before turning this on.
+    Location access rules may also check this player's regions; sweep_for_events then only retries event locations
+    whose item requirements or reachable regions changed.
+    """
+
+    parallel_stages: ClassVar[bool] = False
+    """
+    indicate that generate_early, create_regions, create_items, set_rules and generate_basic of this world can run
+    at the same time as those of other worlds. They may then only use self.random, only add items of their own player
+    to multiworld.itempool and not read or change data of other players.
+    """
+
     all_item_and_group_names: ClassVar[FrozenSet[str]] = frozenset()
     """gets automatically populated with all item and item group names"""
 
@@ -304,6 +366,10 @@ class World(metaclass=AutoWorldRegister):
 
     item_names: ClassVar[Set[str]]
     """set of all potential item names"""
+    item_name_to_slot: ClassVar[Dict[str, int]]
+    """automatically generated dense index of item names, used by CollectionState.has_slot and related methods"""
+    item_name_group_masks: ClassVar[Dict[str, int]]
+    """automatically generated slot mask of each item name group that only contains item names"""
     location_names: ClassVar[Set[str]]
     """set of all potential location names"""
 
@@ -514,6 +580,14 @@ class World(metaclass=AutoWorldRegister):
             return True
         return False
 
+    @classmethod
+    def get_item_slot_mask(cls, item_names: Iterable[str]) -> int:
+        """
+        Combines item names into a mask for CollectionState.has_all_slots and related methods.
+        Build masks once when setting rules, not inside of them.
+        """
+        return sum(1 << cls.item_name_to_slot[item_name] for item_name in set(item_names))
+
     # following methods should not need to be overridden.
     def create_filler(self) -> "Item":
         return self.create_item(self.get_filler_item_name())
@@ -43,17 +43,78 @@ class SyncError(Exception):
     pass
 
 
+MemoryRange = typing.Tuple[int, int, str]
+"""`(address, size, domain)` of a range of memory"""
+
+
 class BizHawkContext:
     streams: typing.Optional[typing.Tuple[asyncio.StreamReader, asyncio.StreamWriter]]
     connection_status: ConnectionStatus
+    watched_memory: typing.Dict[MemoryRange, typing.Optional[bytes]]
+    """The data of each range of memory watched with `watch`, as of the last `update_watched`. None until first read."""
     _lock: asyncio.Lock
     _port: typing.Optional[int]
+    _pending_requests: typing.List[typing.Tuple[typing.List[typing.Dict[str, typing.Any]], asyncio.Future]]
+    _send_task: typing.Optional[asyncio.Task]
+    _watch_ids: typing.Dict[MemoryRange, int]
+    _unsent_watches: typing.Set[MemoryRange]
+    _unsent_unwatches: typing.Set[int]
 
     def __init__(self) -> None:
         self.streams = None
         self.connection_status = ConnectionStatus.NOT_CONNECTED
+        self.watched_memory = {}
         self._lock = asyncio.Lock()
         self._port = None
+        self._pending_requests = []
+        self._send_task = None
+        self._watch_ids = {}
+        self._unsent_watches = set()
+        self._unsent_unwatches = set()
+        self._next_watch_id = 0
+
+    async def _send_requests(self, req_list: typing.List[typing.Dict[str, typing.Any]]) \
+            -> typing.List[typing.Dict[str, typing.Any]]:
+        """Sends the requests in one message together with any others made until the event loop gets to send them, each
+        list in its own group, and returns the responses to these requests."""
+        future = asyncio.get_running_loop().create_future()
+        self._pending_requests.append((req_list, future))
+        if self._send_task is None or self._send_task.done():
+            self._send_task = asyncio.create_task(self._send_pending_requests())
+            self._send_task.add_done_callback(self._on_send_task_done)
+        return await future
+
+    def _on_send_task_done(self, task: asyncio.Task) -> None:
+        if self._send_task is task:
+            self._send_task = None
+
+    async def _send_pending_requests(self) -> None:
+        """Sends the pending requests until there are none left, batching those made during a round trip into the next
+        message."""
+        while self._pending_requests:
+            pending, self._pending_requests = self._pending_requests, []
+            grouped = len(pending) > 1
+            message: typing.List[typing.Dict[str, typing.Any]] = []
+            for req_list, _ in pending:
+                if grouped:
+                    message.append({"type": "GROUP"})
+                message.extend(req_list)
+
+            try:
+                responses = json.loads(await self._send_message(json.dumps(message)))
+            except asyncio.CancelledError:
+                _fail_requests(pending, RequestFailedError("Connection closed"))
+                raise
+            except Exception as exc:
+                _fail_requests(pending, exc)
+                continue
+
+            index = 0
+            for req_list, future in pending:
+                index += grouped
+                if not future.done():
+                    future.set_result(responses[index:index + len(req_list)])
+                index += len(req_list)
 
     async def _send_message(self, message: str):
         async with self._lock:
@@ -89,6 +150,13 @@ class BizHawkContext:
                 raise RequestFailedError("Connection reset") from exc
 
 
+def _fail_requests(pending: typing.List[typing.Tuple[typing.List[typing.Dict[str, typing.Any]], asyncio.Future]],
+                   exc: BaseException) -> None:
+    for _, future in pending:
+        if not future.done():
+            future.set_exception(exc)
+
+
 async def connect(ctx: BizHawkContext) -> bool:
     """Attempts to establish a connection with a connector script. Returns True if successful."""
     rotation_steps = 0 if ctx._port is None else ctx._port - BIZHAWK_SOCKET_PORT_RANGE_START
@@ -100,6 +168,9 @@ async def connect(ctx: BizHawkContext) -> bool:
             ctx.streams = await asyncio.open_connection("127.0.0.1", port)
             ctx.connection_status = ConnectionStatus.TENTATIVE
             ctx._port = port
+            # the connector forgets watches when it loses the connection
+            ctx._unsent_watches = set(ctx.watched_memory)
+            ctx._unsent_unwatches.clear()
             return True
         except (TimeoutError, ConnectionRefusedError):
             continue
@@ -111,7 +182,12 @@ async def connect(ctx: BizHawkContext) -> bool:
 
 
 def disconnect(ctx: BizHawkContext) -> None:
-    """Closes the connection to the connector script."""
+    """Closes the connection to the connector script and fails requests that haven't gotten a response yet."""
+    if ctx._send_task is not None:
+        ctx._send_task.cancel()
+        ctx._send_task = None
+    _fail_requests(ctx._pending_requests, NotConnectedError("Disconnected from BizHawk before the request was sent"))
+    ctx._pending_requests = []
     if ctx.streams is not None:
         ctx.streams[1].close()
         ctx.streams = None
@@ -125,8 +201,11 @@ async def get_script_version(ctx: BizHawkContext) -> int:
 async def send_requests(ctx: BizHawkContext, req_list: typing.List[typing.Dict[str, typing.Any]]) -> typing.List[typing.Dict[str, typing.Any]]:
     """Sends a list of requests to the BizHawk connector and returns their responses.
 
+    Lists of requests sent at the same time, like from functions run with `asyncio.gather`, are pipelined into one
+    message and executed on the same frame. A failed guard still only affects the requests of its own list.
+
     It's likely you want to use the wrapper functions instead of this."""
-    responses = json.loads(await ctx._send_message(json.dumps(req_list)))
+    responses = await ctx._send_requests(req_list)
     errors: typing.List[ConnectorError] = []
 
     for response in responses:
@@ -324,3 +403,70 @@ async def write(ctx: BizHawkContext, write_list: typing.List[typing.Tuple[int, t
     - `value` is a list of bytes to write, in order, starting at `address`
     - `domain` is the name of the region of memory the address corresponds to"""
     await guarded_write(ctx, write_list, [])
+
+
+def watch(ctx: BizHawkContext, watch_list: typing.List[MemoryRange]) -> None:
+    """Starts watching ranges of memory. From the next `update_watched` on, `ctx.watched_memory` holds their data, and
+    the connector only sends them again once they change, instead of them having to be read every time.
+
+    Items in `watch_list` should be organized `(address, size, domain)` where
+    - `address` is the address of the first byte of data
+    - `size` is the number of bytes to watch
+    - `domain` is the name of the region of memory the address corresponds to"""
+    for memory_range in watch_list:
+        if memory_range not in ctx.watched_memory:
+            ctx.watched_memory[memory_range] = None
+            ctx._watch_ids[memory_range] = ctx._next_watch_id
+            ctx._next_watch_id += 1
+            ctx._unsent_watches.add(memory_range)
+
+
+def unwatch(ctx: BizHawkContext, watch_list: typing.List[MemoryRange]) -> None:
+    """Stops watching ranges of memory started with `watch`, taking effect with the next `update_watched`."""
+    for memory_range in watch_list:
+        if memory_range in ctx.watched_memory:
+            del ctx.watched_memory[memory_range]
+            if memory_range in ctx._unsent_watches:
+                ctx._unsent_watches.remove(memory_range)
+            else:
+                ctx._unsent_unwatches.add(ctx._watch_ids[memory_range])
+            del ctx._watch_ids[memory_range]
+
+
+async def update_watched(ctx: BizHawkContext) -> typing.List[MemoryRange]:
+    """Updates `ctx.watched_memory` with the watched ranges of memory that changed since the last update, and returns
+    those ranges. The game watcher of `BizHawkClientContext` calls this every iteration, together with its own requests.
+    """
+    if not ctx.watched_memory and not ctx._unsent_unwatches:
+        return []
+
+    unsent_unwatches, ctx._unsent_unwatches = ctx._unsent_unwatches, set()
+    unsent_watches, ctx._unsent_watches = ctx._unsent_watches, set()
+    try:
+        res = await send_requests(ctx, [
+            {"type": "UNWATCH", "id": watch_id} for watch_id in unsent_unwatches
+        ] + [{
+            "type": "WATCH",
+            "id": ctx._watch_ids[memory_range],
+            "address": memory_range[0],
+            "size": memory_range[1],
+            "domain": memory_range[2]
+        } for memory_range in unsent_watches] + [{"type": "WATCHED"}])
+    except Exception:
+        # send these again on the next update, if they weren't dropped in the meantime
+        ctx._unsent_unwatches |= unsent_unwatches
+        ctx._unsent_watches |= unsent_watches & ctx.watched_memory.keys()
+        raise
+
+    if res[-1]["type"] != "WATCHED_RESPONSE":
+        raise SyncError(f"Expected response of type WATCHED_RESPONSE but got {res[-1]['type']}")
+
+    ranges = {watch_id: memory_range for memory_range, watch_id in ctx._watch_ids.items()}
+    changed: typing.List[MemoryRange] = []
+    for watch_id, data in res[-1]["value"]:
+        memory_range = ranges.get(watch_id)
+        if memory_range is not None:
+            ctx.watched_memory[memory_range] = base64.b64decode(data)
+            changed.append(memory_range)
+
+    return changed
@@ -13,11 +13,11 @@ import Patch
 import Utils
 
 from . import BizHawkContext, ConnectionStatus, NotConnectedError, RequestFailedError, connect, disconnect, get_hash, \
-    get_script_version, get_system, ping
+    get_script_version, get_system, ping, unwatch, update_watched
 from .client import BizHawkClient, AutoBizHawkClientRegister
 
 
-EXPECTED_SCRIPT_VERSION = 1
+EXPECTED_SCRIPT_VERSION = 2
 
 
 class AuthStatus(enum.IntEnum):
@@ -154,13 +154,14 @@ async def _game_watcher(ctx: BizHawkClientContext):
 
             showed_connecting_message = False
 
-            await ping(ctx.bizhawk_ctx)
+            # pipelined into a single message, which also brings the changes to watched memory for the handler
+            _, rom_hash, _ = await asyncio.gather(ping(ctx.bizhawk_ctx), get_hash(ctx.bizhawk_ctx),
+                                                  update_watched(ctx.bizhawk_ctx))
 
             if not showed_connected_message:
                 showed_connected_message = True
                 logger.info("Connected to BizHawk")
 
-            rom_hash = await get_hash(ctx.bizhawk_ctx)
             if ctx.rom_hash is not None and ctx.rom_hash != rom_hash:
                 if ctx.server is not None and not ctx.server.socket.closed:
                     logger.info(f"ROM changed. Disconnecting from server.")
@@ -169,6 +170,7 @@ async def _game_watcher(ctx: BizHawkClientContext):
                 ctx.username = None
                 ctx.client_handler = None
                 ctx.finished_game = False
+                unwatch(ctx.bizhawk_ctx, list(ctx.bizhawk_ctx.watched_memory))
                 await ctx.disconnect(False)
             ctx.rom_hash = rom_hash
 
@@ -62,7 +62,7 @@ class SMCollectionState(metaclass=AutoLogicRegister):
             self.smbm = {}
 
     def copy_mixin(self, ret) -> CollectionState:
-        ret.smbm = {player: copy.deepcopy(self.smbm[player]) for player in self.smbm}
+        ret.smbm = {player: self.smbm[player].copy() for player in self.smbm}
         return ret
 
     def get_game_players(self, multiword: MultiWorld, game_name: str):
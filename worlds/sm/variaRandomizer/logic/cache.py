@@ -1,49 +1,41 @@
-# the caching decorator for helpers functions
+# the caching decorator for helpers functions.
+# the results are stored in the SMBoolManager they are computed for, in the cache
+# of its current items (see SMBoolManager.updateCache).
 class VersionedCache(object):
-    __slots__ = ( 'cache', 'masterCache', 'nextSlot', 'size')
+    __slots__ = ( 'nextSlot', )
 
     def __init__(self):
-        self.cache = []
-        self.masterCache = {}
         self.nextSlot = 0
-        self.size = 0
-
-    def reset(self):
-        # reinit the whole cache
-        self.masterCache = {}
-        self.update(0)
-
-    def update(self, newKey):
-        cache = self.masterCache.get(newKey, None)
-        if cache is None:
-            cache = [ None ] * self.size
-            self.masterCache[newKey] = cache
-        self.cache = cache
 
+    # for helpers methods, called with the helpers object
     def decorator(self, func):
-        return self._decorate(func.__name__, self._new_slot(), func)
+        slot = self._new_slot()
+        def _decorator(helpers):
+            cache = helpers.smbm.cache
+            ret = cache.get(slot)
+            if ret is None:
+                ret = func(helpers)
+                cache[slot] = ret
+            return ret
+        return _decorator
 
-    # for lambdas
+    # for lambdas, called with the SMBoolManager
     def ldeco(self, func):
-        return self._decorate(func.__code__, self._new_slot(), func)
+        slot = self._new_slot()
+        def _decorator(sm):
+            cache = sm.cache
+            ret = cache.get(slot)
+            if ret is None:
+                ret = func(sm)
+                cache[slot] = ret
+            return ret
+        return _decorator
 
     def _new_slot(self):
         slot = self.nextSlot
         self.nextSlot += 1
-        self.size += 1
         return slot
 
-    def _decorate(self, name, slot, func):
-        def _decorator(arg):
-            #ret = self.cache[slot]
-            #if ret is not None:
-            #    return ret
-            #else:
-                ret = func(arg)
-            #    self.cache[slot] = ret
-                return ret
-        return _decorator
-
 Cache = VersionedCache()
 
 class RequestCache(object):
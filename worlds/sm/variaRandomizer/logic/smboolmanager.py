@@ -1,6 +1,5 @@
 # object to handle the smbools and optimize them
 
-from ..logic.cache import Cache
 from ..logic.smbool import SMBool, smboolFalse
 from ..logic.helpers import Bosses
 from ..logic.logic import Logic
@@ -9,24 +8,31 @@ from ..utils.objectives import Objectives
 from ..utils.parameters import Knows, isKnows
 import logging
 import sys
+from collections import OrderedDict
 
 class SMBoolManager(object):
     items = ['ETank', 'Missile', 'Super', 'PowerBomb', 'Bomb', 'Charge', 'Ice', 'HiJump', 'SpeedBooster', 'Wave', 'Spazer', 'SpringBall', 'Varia', 'Plasma', 'Grapple', 'Morph', 'Reserve', 'Gravity', 'XRayScope', 'SpaceJump', 'ScrewAttack', 'Nothing', 'NoEnergy', 'MotherBrain', 'Hyper', 'Gunship'] + Bosses.Golden4() + Bosses.miniBosses()
     countItems = ['Missile', 'Super', 'PowerBomb', 'ETank', 'Reserve']
 
     percentItems = ['Bomb', 'Charge', 'Ice', 'HiJump', 'SpeedBooster', 'Wave', 'Spazer', 'SpringBall', 'Varia', 'Plasma', 'Grapple', 'Morph', 'Gravity', 'XRayScope', 'SpaceJump', 'ScrewAttack']
+    # position in the cache key of each item, shared by all instances so that their keys can be compared
+    itemsPositions = None
+    # names of the helpers functions for each helpers class
+    facadeFunctions = {}
+    # number of items combinations kept in cacheVersions, the least recently used ones are dropped past it
+    cacheVersionsSize = 2048
     def __init__(self, player=0, maxDiff=sys.maxsize, onlyBossLeft = False):
-        self._items = { }
-        self._counts = { }
+        # the collected items are stored in the cache key, this is the smbool returned for each collected item
+        self._smbools = { }
 
         self.player = player
         self.maxDiff = maxDiff
-        self.onlyBossLeft = onlyBossLeft
 
         # cache related
-        #self.cacheKey = 0
-        #self.computeItemsPositions()
-        Cache.reset()
+        if SMBoolManager.itemsPositions is None:
+            SMBoolManager.computeItemsPositions()
+        self.cacheKey = 0
+        self.onlyBossLeft = onlyBossLeft
         Logic.factory('vanilla')
         self.helpers = Logic.HelpersGraph(self)
         self.doorsManager = DoorsManager()
@@ -35,25 +41,36 @@ class SMBoolManager(object):
         self.createKnowsFunctions(player)
         self.resetItems()
 
-    def computeItemsPositions(self):
+    @classmethod
+    def computeItemsPositions(cls):
         # compute index in cache key for each items
-        self.itemsPositions = {}
-        maxBitsForCountItem = 7 # 128 values with 7 bits
-        for (i, item) in enumerate(self.countItems):
+        itemsPositions = {}
+        maxBitsForCountItem = 16 # 65536 values with 16 bits
+        for (i, item) in enumerate(cls.countItems):
             pos = i*maxBitsForCountItem
             bitMask = (2<<(maxBitsForCountItem-1))-1
             bitMask = bitMask << pos
-            self.itemsPositions[item] = (pos, bitMask)
-        for (i, item) in enumerate(self.items, (i+1)*maxBitsForCountItem+1):
-            if item in self.countItems:
+            itemsPositions[item] = (pos, bitMask)
+        for (i, item) in enumerate(cls.items, (i+1)*maxBitsForCountItem+1):
+            if item in cls.countItems:
                 continue
-            self.itemsPositions[item] = (i, 1<<i)
+            itemsPositions[item] = (i, 1<<i)
+        cls.itemsPositions = itemsPositions
+
+    @classmethod
+    def getItemPosition(cls, item):
+        itemsPositions = cls.itemsPositions
+        position = itemsPositions.get(item, None)
+        if position is None:
+            # items outside of the known ones get the next free bit
+            pos = max(pos for (pos, bitMask) in itemsPositions.values()) + 1
+            position = (pos, 1<<pos)
+            itemsPositions[item] = position
+        return position
 
     def computeNewCacheKey(self, item, value):
         # generate an unique integer for each items combinations which is use as key in the cache.
-        if item in ['Nothing', 'NoEnergy']:
-            return
-        (pos, bitMask) = self.itemsPositions[item]
+        (pos, bitMask) = self.getItemPosition(item)
 #        print("--------------------- {} {} ----------------------------".format(item, value))
 #        print("old:  "+format(self.cacheKey, '#067b'))
         self.cacheKey = (self.cacheKey & (~bitMask)) | (value<<pos)
@@ -70,6 +87,41 @@ class SMBoolManager(object):
                 msg += " {}: {}".format(item, value)
         print("items:{}".format(msg))
 
+    @property
+    def onlyBossLeft(self):
+        return self._onlyBossLeft
+
+    @onlyBossLeft.setter
+    def onlyBossLeft(self, onlyBossLeft):
+        # the helpers results depend on it
+        self._onlyBossLeft = onlyBossLeft
+        self.resetCache()
+
+    def resetCache(self):
+        # the results of the helpers for each items combination (cache key), shared with the copies of this object
+        self.cacheVersions = OrderedDict()
+        self.updateCache()
+
+    def updateCache(self):
+        cache = self.cacheVersions.get(self.cacheKey, None)
+        if cache is None:
+            cache = {}
+            self.cacheVersions[self.cacheKey] = cache
+            if len(self.cacheVersions) > self.cacheVersionsSize:
+                self.cacheVersions.popitem(last=False)
+        else:
+            self.cacheVersions.move_to_end(self.cacheKey)
+        self.cache = cache
+
+    def copy(self):
+        # the items are in the cache key and everything else doesn't change, so only the helpers
+        # have to be bound to the copy. it has the same items, so it keeps using the cached results.
+        ret = self.__class__.__new__(self.__class__)
+        ret.__dict__.update(self.__dict__)
+        ret.helpers = Logic.HelpersGraph(ret)
+        ret.createFacadeFunctions()
+        return ret
+
     def isEmpty(self):
         for item in self.items:
             if self.haveItem(item):
@@ -83,9 +135,9 @@ class SMBoolManager(object):
         # get a dict of collected items and how many (to be displayed on the solver spoiler)
         itemsDict = {}
         for item in self.items:
-            itemsDict[item] = 1 if self._items[item] == True else 0
+            itemsDict[item] = 1 if self.haveItem(item) == True else 0
         for item in self.countItems:
-            itemsDict[item] = self._counts[item]
+            itemsDict[item] = self.itemCount(item)
         return itemsDict
 
     def withItem(self, item, func):
@@ -98,56 +150,45 @@ class SMBoolManager(object):
         return ret
 
     def resetItems(self):
-        self._items = { item : smboolFalse for item in self.items }
-        self._counts = { item : 0 for item in self.countItems }
-
-        #self.cacheKey = 0
-        #Cache.update(self.cacheKey)
+        self.cacheKey = 0
+        self.updateCache()
 
     def addItem(self, item):
         # a new item is available
-        self._items[item] = SMBool(True, items=[item])
         if self.isCountItem(item):
-            count = self._counts[item] + 1
-            self._counts[item] = count
-            #self.computeNewCacheKey(item, count)
-        #else:
-            #self.computeNewCacheKey(item, 1)
+            self.computeNewCacheKey(item, self.itemCount(item) + 1)
+        else:
+            self.computeNewCacheKey(item, 1)
 
-        #Cache.update(self.cacheKey)
+        self.updateCache()
 
     def addItems(self, items):
         if len(items) == 0:
             return
         for item in items:
-            self._items[item] = SMBool(True, items=[item])
             if self.isCountItem(item):
-                count = self._counts[item] + 1
-                self._counts[item] = count
-                #self.computeNewCacheKey(item, count)
-            #else:
-                #self.computeNewCacheKey(item, 1)
+                self.computeNewCacheKey(item, self.itemCount(item) + 1)
+            else:
+                self.computeNewCacheKey(item, 1)
 
-        #Cache.update(self.cacheKey)
+        self.updateCache()
 
     def removeItem(self, item):
         # randomizer removed an item (or the item was added to test a post available)
         if self.isCountItem(item):
-            count = self._counts[item] - 1
-            self._counts[item] = count
-            if count == 0:
-                self._items[item] = smboolFalse
-            #self.computeNewCacheKey(item, count)
+            self.computeNewCacheKey(item, self.itemCount(item) - 1)
         else:
-            self._items[item] = smboolFalse
-            #self.computeNewCacheKey(item, 0)
+            self.computeNewCacheKey(item, 0)
 
-        #Cache.update(self.cacheKey)
+        self.updateCache()
 
     def createFacadeFunctions(self):
-        for fun in dir(self.helpers):
-            if fun != 'smbm' and fun[0:2] != '__':
-                setattr(self, fun, getattr(self.helpers, fun))
+        functions = SMBoolManager.facadeFunctions.get(type(self.helpers), None)
+        if functions is None:
+            functions = [fun for fun in dir(self.helpers) if fun != 'smbm' and fun[0:2] != '__']
+            SMBoolManager.facadeFunctions[type(self.helpers)] = functions
+        for fun in functions:
+            setattr(self, fun, getattr(self.helpers, fun))
 
     def traverse(self, doorName):
         return self.doorsManager.traverse(self, doorName)
@@ -162,8 +203,8 @@ class SMBoolManager(object):
         return SMBool(100*(currentItemsCount/totalItemsCount) >= percent)
 
     def getCollectedItemsCount(self):
-        return (len([item for item in self._items if self.haveItem(item) and item in self.percentItems])
-                + sum([self.itemCount(item) for item in self._items if self.isCountItem(item)]))
+        return (len([item for item in self.percentItems if self.haveItem(item)])
+                + sum([self.itemCount(item) for item in self.countItems]))
 
     def createKnowsFunctions(self, player):
         # for each knows we have a function knowsKnows (ex: knowsAlcatrazEscape()) which
@@ -185,14 +226,14 @@ class SMBoolManager(object):
     def changeKnows(self, knows, newVal):
         if isKnows(knows):
             self._setKnowsFunction(knows, newVal)
-            #Cache.reset()
+            self.resetCache()
         else:
             raise ValueError("Invalid knows "+str(knows))
 
     def restoreKnows(self, knows):
         if isKnows(knows):
             self._createKnowsFunction(knows)
-            #Cache.reset()
+            self.resetCache()
         else:
             raise ValueError("Invalid knows "+str(knows))
         
@@ -202,11 +243,19 @@ class SMBoolManager(object):
     def itemCount(self, item):
         # return integer
         #self.state.item_count(item, self.player)
-        return self._counts[item]
+        (pos, bitMask) = self.getItemPosition(item)
+        return (self.cacheKey & bitMask) >> pos
 
     def haveItem(self, item):
         #return self.state.has(item, self.player)
-        return self._items[item]
+        (pos, bitMask) = self.getItemPosition(item)
+        if self.cacheKey & bitMask == 0:
+            return smboolFalse
+        smbool = self._smbools.get(item, None)
+        if smbool is None:
+            smbool = SMBool(True, items=[item])
+            self._smbools[item] = smbool
+        return smbool
     
     def haveItems(self, items):
         for item in items:
@@ -245,39 +294,37 @@ class SMBoolManagerPlando(SMBoolManager):
     def __init__(self):
         super(SMBoolManagerPlando, self).__init__()
 
+    def copy(self):
+        ret = super(SMBoolManagerPlando, self).copy()
+        ret._duplicates = set(self._duplicates)
+        return ret
+
+    def resetItems(self):
+        self._duplicates = set()
+        super(SMBoolManagerPlando, self).resetItems()
+
     def addItem(self, item):
         # a new item is available
         already = self.haveItem(item)
         isCount = self.isCountItem(item)
-        if isCount or not already:
-            self._items[item] = SMBool(True, items=[item])
+        if isCount:
+            self.computeNewCacheKey(item, self.itemCount(item) + 1)
+        elif not already:
+            self.computeNewCacheKey(item, 1)
         else:
             # handle duplicate major items (plandos)
-            self._items['dup_'+item] = True
-        if isCount:
-            count = self._counts[item] + 1
-            self._counts[item] = count
-            #self.computeNewCacheKey(item, count)
-        #else:
-            #self.computeNewCacheKey(item, 1)
+            self._duplicates.add(item)
 
-        #Cache.update(self.cacheKey)
+        self.updateCache()
 
     def removeItem(self, item):
         # randomizer removed an item (or the item was added to test a post available)
         if self.isCountItem(item):
-            count = self._counts[item] - 1
-            self._counts[item] = count
-            if count == 0:
-                self._items[item] = smboolFalse
-            #self.computeNewCacheKey(item, count)
+            self.computeNewCacheKey(item, self.itemCount(item) - 1)
         else:
-            dup = 'dup_'+item
-            if self._items.get(dup, None) is None:
-                self._items[item] = smboolFalse
-                #self.computeNewCacheKey(item, 0)
+            if item not in self._duplicates:
+                self.computeNewCacheKey(item, 0)
             else:
-                del self._items[dup]
-                #self.computeNewCacheKey(item, 1)
+                self._duplicates.remove(item)
 
-        #Cache.update(self.cacheKey)
+        self.updateCache()